@@ -11,5 +11,23 @@ else
     echo "Running tests using python unittest"
     python -m unittest recorder_tests.test_core
     python -m unittest recorder_tests.test_fluentnao_translator
+    python -m unittest recorder_tests.test_fluentnao_rules
+    python -m unittest recorder_tests.test_fluentnao_emitter
+    python -m unittest recorder_tests.test_fluentnao_motion
+    python -m unittest recorder_tests.test_fluentnao_optimizer
+    python -m unittest recorder_tests.test_fluentnao_playback
+    python -m unittest recorder_tests.test_fluentnao_scheduler
+    python -m unittest recorder_tests.test_fluentnao_compiler
+    python -m unittest recorder_tests.test_fluentnao_futures
+    python -m unittest recorder_tests.test_fluentnao_metadata
+    python -m unittest recorder_tests.test_fluentnao_scriptstore
+    python -m unittest recorder_tests.test_capture
+    python -m unittest recorder_tests.test_pose
+    python -m unittest recorder_tests.test_keyframes
+    python -m unittest recorder_tests.test_session
+    python -m unittest recorder_tests.test_offline
+    python -m unittest recorder_tests.test_trace
+    python -m unittest recorder_tests.test_timing
+    python -m unittest recorder_tests.test_metrics
 fi
 
@@ -16,27 +16,24 @@ class Arms():
     def go(self):
         self.nao.go()
 
+    def send(self):
+        self.nao.send()
+        return self;
+
 
     ###################################
     # Stiff
     ###################################
     def stiff(self):
-        self.left_stiff()
-        self.right_stiff()
+        self.nao.stiffness.set([self.joints.Chains.LArm, self.joints.Chains.RArm], 1.0)
         return self;
         
     def left_stiff(self):
-        pNames = self.joints.Chains.LArm
-        pStiffnessLists = 1.0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.LArm], 1.0)
         return self;
 
     def right_stiff(self):
-        pNames = self.joints.Chains.RArm
-        pStiffnessLists = 1.0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.RArm], 1.0)
         return self;
 
 
@@ -44,22 +41,15 @@ class Arms():
     # Relax
     ###################################
     def relax(self):
-        self.left_relax()
-        self.right_relax()
+        self.nao.stiffness.set([self.joints.Chains.LArm, self.joints.Chains.RArm], 0)
         return self;
 
     def left_relax(self):
-        pNames = self.joints.Chains.LArm
-        pStiffnessLists = 0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.LArm], 0)
         return self;
 
     def right_relax(self):
-        pNames = self.joints.Chains.RArm
-        pStiffnessLists = 0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.RArm], 0)
         return self;
 
     ###################################
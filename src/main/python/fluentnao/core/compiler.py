@@ -0,0 +1,179 @@
+import ast
+import collections
+import hashlib
+import threading
+
+# number of compiled scripts kept
+SCRIPT_CACHE_SIZE = 64
+
+# nodes allowed in a script line: calls on the nao object with literal arguments
+ALLOWED_NODES = (ast.Expression, ast.Call, ast.Attribute, ast.Name, ast.Load, ast.keyword,
+                 ast.Num, ast.Str, ast.List, ast.Tuple,
+                 ast.UnaryOp, ast.UAdd, ast.USub,
+                 ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div)
+
+ALLOWED_NAMES = ("nao", "True", "False", "None")
+
+
+class ScriptError(Exception):
+
+    def __init__(self, line, message):
+        Exception.__init__(self, "line %s: %s" % (line, message))
+        self.line = line
+        self.message = message
+
+
+class CompiledScript():
+    """
+    A script parsed and checked once. Each line is a code object evaluated
+    with only the robot in scope.
+    """
+
+    # init method
+    def __init__(self, lines):
+
+        # list of (line number, source, code object)
+        self.lines = lines
+
+    def run(self, nao, log=None, cancelled=None):
+        """
+        Run each line in turn, returns False if cancelled() became true first
+        """
+        namespace = {"nao": nao}
+        # the proxy calls of each line are counted under its source, see Nao.measure()
+        measure = getattr(nao, "measure", None)
+        for (line, source, code) in self.lines:
+            if cancelled and cancelled():
+                return False
+            if log:
+                log("line " + str(line) + ": " + source)
+            try:
+                if measure:
+                    with measure(source):
+                        eval(code, {"__builtins__": {}}, namespace)
+                else:
+                    eval(code, {"__builtins__": {}}, namespace)
+            except Exception as e:
+                raise ScriptError(line, str(e))
+        return True
+
+
+def normalise_line(cmd):
+    # lines may be written with or without the nao. prefix
+    cmd = cmd.replace("nao.", "").strip()
+    cmd = cmd.replace(";", "").strip()
+    if len(cmd) > 0:
+        return "nao." + cmd
+    return None
+
+
+def check_node(node, line):
+    for child in ast.walk(node):
+        if not isinstance(child, ALLOWED_NODES):
+            raise ScriptError(line, "%s is not allowed" % type(child).__name__)
+        if isinstance(child, ast.Name) and not child.id in ALLOWED_NAMES:
+            raise ScriptError(line, "unknown name %s" % child.id)
+        if isinstance(child, ast.Attribute) and child.attr.startswith("_"):
+            raise ScriptError(line, "private attribute %s" % child.attr)
+        if isinstance(child, ast.Call) and (child.starargs or child.kwargs):
+            raise ScriptError(line, "argument unpacking is not allowed")
+
+
+def check_surface(node, surface, line):
+    """
+    Follow a chain of attribute lookups and calls from nao through surface,
+    the robot scripts will run on, so unknown limbs and methods are reported
+    before the script runs. Fluent calls are assumed to return the object
+    they were called on. Returns the object the chain ends at, None if it
+    cannot be followed.
+    """
+    if isinstance(node, ast.Expression):
+        return check_surface(node.body, surface, line)
+    if isinstance(node, ast.Name):
+        return surface if node.id == "nao" else None
+    if isinstance(node, ast.Attribute):
+        target = check_surface(node.value, surface, line)
+        if target is None:
+            return None
+        if not hasattr(target, node.attr):
+            raise ScriptError(line, "%s has no %s" % (type(target).__name__.lower(), node.attr))
+        return getattr(target, node.attr)
+    if isinstance(node, ast.Call):
+        function = check_surface(node.func, surface, line)
+        if function is None:
+            return None
+        if not callable(function):
+            raise ScriptError(line, "%s cannot be called" % node.func.attr)
+        return getattr(function, "__self__", None)
+    return None
+
+
+def compile_script(cmds, split_str=";", surface=None):
+    """
+    Parse a script into a CompiledScript, raising ScriptError with the line
+    number of the first line that is not a valid FluentNao call. If surface is
+    given the calls are also checked against it.
+    """
+    lines = []
+    line = 0
+    for cmd in cmds.split(split_str):
+        line += 1
+        if "#" in cmd:
+            continue
+        source = normalise_line(cmd)
+        if not source:
+            continue
+        try:
+            tree = ast.parse(source, "<script>", "eval")
+        except SyntaxError as e:
+            raise ScriptError(line, "syntax error: %s" % e.msg)
+        check_node(tree, line)
+        if surface is not None:
+            check_surface(tree, surface, line)
+        lines.append((line, source, compile(tree, "<script line %s>" % line, "eval")))
+    return CompiledScript(lines)
+
+
+class ScriptCache():
+    """
+    Compiled scripts keyed by a hash of their text so running the same script
+    again skips parsing
+    """
+
+    # init method
+    def __init__(self, size=SCRIPT_CACHE_SIZE):
+
+        self.size = size
+        self.scripts = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, cmds, split_str, surface):
+        data = split_str + "\0" + cmds
+        if isinstance(data, unicode):
+            data = data.encode("utf-8")
+        # a script checked against one kind of robot may not suit another
+        return (type(surface), hashlib.sha1(data).hexdigest())
+
+    def get(self, cmds, split_str=";", surface=None):
+        key = self.key(cmds, split_str, surface)
+        with self.lock:
+            script = self.scripts.pop(key, None)
+            if script is not None:
+                self.scripts[key] = script
+                return script
+
+        # errors are raised before anything is cached
+        script = compile_script(cmds, split_str, surface)
+        with self.lock:
+            self.scripts[key] = script
+            while len(self.scripts) > self.size:
+                self.scripts.popitem(last=False)
+        return script
+
+    def clear(self):
+        with self.lock:
+            self.scripts.clear()
+
+
+# shared by all robots, scripts do not depend on the robot they run on
+SCRIPT_CACHE = ScriptCache()
@@ -14,6 +14,10 @@ class Elbows():
 
     def go(self):
         self.nao.go()
+
+    def send(self):
+        self.nao.send()
+        return self;
         
     ###################################
     # Bent
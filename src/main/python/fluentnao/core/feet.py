@@ -12,6 +12,10 @@ class Feet():
     def go(self):
         self.nao.go()
 
+    def send(self):
+        self.nao.send()
+        return self;
+
 
     ###################################
     # point
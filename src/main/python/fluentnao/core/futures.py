@@ -0,0 +1,317 @@
+import threading
+import time
+
+from fluentnao.core.scheduler import WAIT_FOREVER
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskFuture(object):
+    """
+    Result of a robot call running in the background. The call runs on its own
+    daemon thread so the caller never blocks, NAOqi tasks it posts are recorded
+    with task() so cancel() can stop them and on_cancel() adds any other way of
+    cutting it short. run is called with the future as its only argument.
+    """
+
+    def __init__(self, run, dispatch=None):
+        super(TaskFuture, self).__init__()
+        self.run = run
+        self.dispatch = dispatch
+        self.condition = threading.Condition()
+        self.finished = False
+        self.was_cancelled = False
+        self.value = None
+        self.error = None
+        self.callbacks = []
+
+        # (proxy, task id) of NAOqi tasks started by this future & functions called on cancel()
+        self.tasks = []
+        self.cancel_functions = []
+
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        try:
+            value = self.run(self)
+            error = None
+        except Exception as e:
+            value = None
+            error = e
+        # a cancelled call is only finished once it has returned
+        if self.was_cancelled:
+            self._finish(None, TaskCancelled())
+        else:
+            self._finish(value, error)
+
+    def _finish(self, value, error):
+        with self.condition:
+            if self.finished:
+                return
+            self.value = value
+            self.error = error
+            self.finished = True
+            callbacks = self.callbacks
+            self.callbacks = []
+            self.condition.notify_all()
+        for callback in callbacks:
+            self._call(callback)
+
+    def _call(self, callback):
+        if self.dispatch:
+            self.dispatch(lambda: callback(self))
+        else:
+            callback(self)
+
+    ###################################
+    # tasks
+    ###################################
+    def task(self, proxy, taskId):
+        """
+        Record a NAOqi task started by this future, returns the task id
+        """
+        with self.condition:
+            self.tasks.append((proxy, taskId))
+            cancelled = self.was_cancelled
+        if cancelled:
+            proxy.stop(taskId)
+        return taskId
+
+    def wait_task(self, proxy, taskId, timeout=WAIT_FOREVER):
+        self.task(proxy, taskId)
+        return proxy.wait(taskId, timeout)
+
+    def on_cancel(self, function):
+        """
+        Call function if the future is cancelled, straight away if it already has been
+        """
+        with self.condition:
+            cancelled = self.was_cancelled
+            if not cancelled:
+                self.cancel_functions.append(function)
+        if cancelled:
+            function()
+        return self
+
+    ###################################
+    # state
+    ###################################
+    def done(self):
+        return self.finished
+
+    def cancelled(self):
+        return self.was_cancelled
+
+    def cancel(self):
+        """
+        Stop the NAOqi tasks started so far and any started later, returns
+        False if the future had already finished. The future finishes with
+        TaskCancelled, and its callbacks run, once the call has returned.
+        """
+        with self.condition:
+            if self.finished:
+                return False
+            if self.was_cancelled:
+                return True
+            self.was_cancelled = True
+            tasks = list(self.tasks)
+            functions = self.cancel_functions
+            self.cancel_functions = []
+        for (proxy, taskId) in tasks:
+            proxy.stop(taskId)
+        for function in functions:
+            function()
+        return True
+
+    def result(self, timeout=None):
+        """
+        Wait up to timeout seconds (forever by default) for the call to finish
+        and return its result or raise its exception
+        """
+        with self.condition:
+            if not self.finished:
+                self.condition.wait(timeout)
+            if not self.finished:
+                raise TaskTimeout("task did not finish within %s seconds" % timeout)
+            if self.error is not None:
+                raise self.error
+            return self.value
+
+    def exception(self, timeout=None):
+        try:
+            self.result(timeout)
+        except TaskTimeout:
+            raise
+        except Exception as e:
+            return e
+        return None
+
+    def add_done_callback(self, callback):
+        """
+        Call callback(future) once the future has finished, straight away if
+        it already has
+        """
+        with self.condition:
+            if not self.finished:
+                self.callbacks.append(callback)
+                return self
+        self._call(callback)
+        return self
+
+
+def gather(futures, timeout=None, cancel_on_timeout=False):
+    """
+    Wait for all the futures given and return their results in order. If
+    timeout seconds pass first TaskTimeout is raised, optionally cancelling
+    the futures still running.
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    try:
+        results = []
+        for future in futures:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            results.append(future.result(remaining))
+        return results
+    except TaskTimeout:
+        if cancel_on_timeout:
+            for future in futures:
+                future.cancel()
+        raise
+
+
+class AsyncNao():
+    """
+    Non-blocking versions of the blocking Nao calls. Each method returns a
+    TaskFuture straight away instead of waiting for the robot. dispatch, if
+    given, is used to run done callbacks, e.g. on the UI thread.
+    """
+
+    # init method
+    def __init__(self, nao, dispatch=None):
+
+        self.nao = nao
+        self.log = nao.log
+        self.dispatch = dispatch
+
+    def call(self, function, *args):
+        """
+        Run any blocking call in the background
+        """
+        return TaskFuture(lambda future: function(*args), self.dispatch)
+
+    def run(self, start):
+        """
+        Call start(cancelled) in the background to submit moves, start may
+        block while they queue behind each other and should stop submitting
+        once cancelled() returns True. The future completes when the moves
+        have finished, cancelling stops the moves in flight.
+        """
+        def run(future):
+            future.on_cancel(self.nao.scheduler.stop)
+            start(future.cancelled)
+            if not future.cancelled():
+                self.nao.go()
+        return TaskFuture(run, self.dispatch)
+
+    def sleep(self, seconds):
+        # start anything already planned so it runs during the wait
+        self.nao.send()
+
+        def run(future):
+            wakeup = threading.Event()
+            future.on_cancel(wakeup.set)
+            wakeup.wait(seconds)
+        return TaskFuture(run, self.dispatch)
+
+    def run_script(self, cmds, split_str=";"):
+        """
+        Run a script and wait for its moves, cancelling stops the moves in
+        flight and the lines not yet run
+        """
+        def run(future):
+            future.on_cancel(self.nao.scheduler.stop)
+            self.nao.naoscript.run_script(cmds, split_str, future.cancelled)
+            if future.cancelled():
+                # moves planned by the last line run are not started
+                self.nao.plan.clear()
+            else:
+                self.nao.go()
+        return TaskFuture(run, self.dispatch)
+
+    ###################################
+    # text to speech
+    ###################################
+    def say(self, text):
+        tts = self.nao.env.tts
+        taskId = tts.post.say(text)
+        return TaskFuture(lambda future: future.wait_task(tts, taskId), self.dispatch)
+
+    ###################################
+    # motion
+    ###################################
+    def go(self, chains=None):
+        """
+        Start the pending fluent calls and return a future that completes when
+        every task on the chains given (all chains by default) has finished
+        """
+        self.nao.send()
+        scheduler = self.nao.scheduler
+        if chains is None:
+            chains = scheduler.all_chains()
+        tasks = scheduler.running(chains)
+
+        def run(future):
+            for (proxy, taskId) in tasks:
+                future.task(proxy, taskId)
+            for (proxy, taskId) in tasks:
+                proxy.wait(taskId, WAIT_FOREVER)
+            scheduler.forget(chains, tasks)
+        return TaskFuture(run, self.dispatch)
+
+    def posture(self, name, speed=.5):
+        self.log("goToPosture=%s|speed=%s" % (name, speed))
+        self.nao.send()
+        scheduler = self.nao.scheduler
+        chains = scheduler.all_chains()
+        posture = self.nao.env.robotPosture
+
+        def run(future):
+            # queued behind the moves on any chain, skipped if cancelled meanwhile
+            taskId = scheduler.submit(chains, lambda: None if future.cancelled() else posture.post.goToPosture(name, speed),
+                                      proxy=posture)
+            if taskId is not None:
+                future.wait_task(posture, taskId)
+                scheduler.forget(chains, [(posture, taskId)])
+        return TaskFuture(run, self.dispatch)
+
+    def stand_init(self, speed=.5):
+        return self.posture("StandInit", speed)
+
+    def sit_relax(self, speed=.5):
+        return self.posture("SitRelax", speed)
+
+    def stand_zero(self, speed=.5):
+        return self.posture("StandZero", speed)
+
+    def lying_belly(self, speed=.5):
+        return self.posture("LyingBelly", speed)
+
+    def lying_back(self, speed=.5):
+        return self.posture("LyingBack", speed)
+
+    def stand(self, speed=.5):
+        return self.posture("Stand", speed)
+
+    def crouch(self, speed=.5):
+        return self.posture("Crouch", speed)
+
+    def sit(self, speed=.5):
+        return self.posture("Sit", speed)
@@ -12,25 +12,23 @@ class Head():
     def go(self):
         self.nao.go()
 
+    def send(self):
+        self.nao.send()
+        return self;
+
 
     ###################################
     # Stiff
     ###################################
     def stiff(self):
-        pNames = self.joints.Chains.Head
-        pStiffnessLists = 1.0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.Head], 1.0)
         return self;
 
     ###################################
     # Relax
     ###################################
     def relax(self):
-        pNames = self.joints.Chains.Head
-        pStiffnessLists = 0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.Head], 0)
         return self;
 
     ###################################
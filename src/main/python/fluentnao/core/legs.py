@@ -13,28 +13,25 @@ class Legs():
 
     def go(self):
         self.nao.go()
+
+    def send(self):
+        self.nao.send()
+        return self;
         
 
     ###################################
     # Stiff
     ###################################
     def stiff(self):
-        self.left_stiff()
-        self.right_stiff()
+        self.nao.stiffness.set([self.joints.Chains.LLeg, self.joints.Chains.RLeg], 1.0)
         return self;
         
     def left_stiff(self):
-        pNames = self.joints.Chains.LLeg
-        pStiffnessLists = 1.0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.LLeg], 1.0)
         return self;
 
     def right_stiff(self):
-        pNames = self.joints.Chains.RLeg
-        pStiffnessLists = 1.0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.RLeg], 1.0)
         return self;
 
 
@@ -42,22 +39,15 @@ class Legs():
     # Relax
     ###################################
     def relax(self):
-        self.left_relax()
-        self.right_relax()
+        self.nao.stiffness.set([self.joints.Chains.LLeg, self.joints.Chains.RLeg], 0)
         return self;
 
     def left_relax(self):
-        pNames = self.joints.Chains.LLeg
-        pStiffnessLists = 0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.LLeg], 0)
         return self;
 
     def right_relax(self):
-        pNames = self.joints.Chains.RLeg
-        pStiffnessLists = 0
-        pTimeLists = 1.0
-        self.nao.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.nao.stiffness.set([self.joints.Chains.RLeg], 0)
         return self;
 
     ###################################
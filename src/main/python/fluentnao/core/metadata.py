@@ -0,0 +1,130 @@
+import json
+import os
+
+# robots are identified by their body id so each robot gets its own cache file
+BODY_ID_KEY = "Device/DeviceList/ChestBoard/BodyId"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fluentnao", "metadata")
+
+CACHE_VERSION = 1
+
+
+class JointMetadata():
+    """
+    Joint names per chain and joint limits for a robot. These never change
+    for a given robot so they are read once and saved to disk, the next
+    connection to the same robot starts without any round trips.
+    """
+
+    # init method
+    def __init__(self, nao, cache_dir=DEFAULT_CACHE_DIR):
+
+        self.nao = nao
+        self.joints = nao.joints
+        self.log = nao.log
+        self.cache_dir = cache_dir
+
+        # chain or joint name -> list of joint names
+        self.chain_joints = {}
+
+        # joint name -> [min angle, max angle, max velocity, max torque]
+        self.limits = {}
+
+        self.loaded = False
+
+    ###################################
+    # loading
+    ###################################
+    def robot_id(self):
+        try:
+            body_id = self.nao.env.memory.getData(BODY_ID_KEY)
+            if body_id:
+                return str(body_id)
+        except Exception:
+            pass
+        # None if the robot cannot be told apart from others
+        if self.nao.env.proxyAddr:
+            return str(self.nao.env.proxyAddr)
+        return None
+
+    def cache_path(self):
+        robot_id = self.robot_id() if self.cache_dir else None
+        if not robot_id:
+            return None
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in robot_id)
+        return os.path.join(self.cache_dir, safe_id + ".json")
+
+    def load(self):
+        path = self.cache_path()
+        if not (path and self.read(path)):
+            self.fetch()
+            if path:
+                self.write(path)
+        self.loaded = True
+        return self;
+
+    def fetch(self):
+        motion = self.nao.env.motion
+        for chain in self.joints.Chains:
+            self.chain_joints[chain] = list(motion.getJointNames(chain))
+
+        body_names = self.chain_joints[self.joints.Chains.Body]
+        for name, limits in zip(body_names, motion.getLimits(self.joints.Chains.Body)):
+            self.limits[name] = list(limits)
+        self.log("fetched joint metadata for %s joints" % len(self.limits))
+
+    def read(self, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return False
+            # json gives us unicode strings, proxies expect plain strings
+            self.chain_joints = dict((str(c), [str(n) for n in names])
+                                     for c, names in data["chains"].items())
+            self.limits = dict((str(n), limits) for n, limits in data["limits"].items())
+            self.log("read joint metadata from %s" % path)
+            return True
+        except (IOError, ValueError, KeyError):
+            return False
+
+    def write(self, path):
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(path, "w") as f:
+                json.dump({"version": CACHE_VERSION,
+                           "chains": self.chain_joints,
+                           "limits": self.limits}, f)
+        except (IOError, OSError) as e:
+            self.log("unable to save joint metadata to %s: %s" % (path, e))
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    ###################################
+    # queries
+    ###################################
+    def joint_names(self, chain):
+        self.ensure_loaded()
+        if not chain in self.chain_joints:
+            # single joints and less common chains are fetched on demand
+            self.chain_joints[chain] = list(self.nao.env.motion.getJointNames(chain))
+        return self.chain_joints[chain]
+
+    def joint_limits(self, jointName):
+        self.ensure_loaded()
+        if not jointName in self.limits:
+            self.limits[jointName] = list(self.nao.env.motion.getLimits(jointName)[0])
+        return self.limits[jointName]
+
+    def min_angle(self, jointName):
+        return self.joint_limits(jointName)[0]
+
+    def max_angle(self, jointName):
+        return self.joint_limits(jointName)[1]
+
+    def max_velocity(self, jointName):
+        # in rad.s-1
+        return self.joint_limits(jointName)[2]
@@ -1,13 +1,14 @@
-import httplib
-import json
+from fluentnao.core.compiler import SCRIPT_CACHE, ScriptError
+from fluentnao.core.scriptstore import ScriptStore, ScriptStoreError
 
 class NaoScript():
 
     # init method
-    def __init__(self, nao):
+    def __init__(self, nao, store=None):
         
         self.nao = nao
         self.log = nao.log
+        self.store = store or ScriptStore(log=self.log)
 
     def go(self):
         self.nao.go()
@@ -17,44 +18,45 @@ class NaoScript():
     ###################################
     def get(self, scriptId):  
         
-        # setup
-        uri = 'naoscript.herokuapp.com'
-        headers = {"Content-type": "application/x-www-form-urlencoded","Accept": "text/plain"}
-
-        # connect & request
-        conn = httplib.HTTPConnection(uri)
-        conn.request("GET", "/behaviors/" + str(scriptId) + ".json", "", headers)
-
-        # response & read
-        response = conn.getresponse()
-        data = response.read()
-
-        # close
-        conn.close()
+        # downloaded scripts are kept on disk, see ScriptStore
+        try:
+            script = self.store.get(scriptId)
+        except ScriptStoreError as e:
+            self.log("unable to get script: %s" % e)
+            self.nao.say("I could not download script " + str(scriptId))
+            return self;
 
-        # parse json
-        json_result = json.loads(data)
-        
         # run script
-        script = str(json_result['script']).strip()
         self.run_script(script, '\r\n')
 
         return self;
 
-    def run_script(self, cmds, split_str=";"):
-        line = 0;
+    def prefetch(self, scriptIds):
+        """
+        Download the scripts of a show before it starts so get() does not wait for the network
+        """
+        errors = self.store.prefetch(scriptIds)
+        for scriptId in errors:
+            self.log("unable to prefetch script %s: %s" % (scriptId, errors[scriptId]))
+        return self;
+
+    def run_script(self, cmds, split_str=";", cancelled=None):
+        # parsed & checked once, running the same script again reuses the compiled lines,
+        # if cancelled is given the script stops once it returns true
         try:
-            if (len(cmds) > 0):
-                for cmd in cmds.split(split_str):
-                    line += 1
-                    if not "#" in cmd:
-                        cmd = cmd.replace("nao.", "").strip()
-                        cmd = cmd.replace(";", "").strip()
-                        if (len(cmd) > 0):
-                            cmd = "self.nao." + cmd
-                            self.log("line " + str(line) + ": " + cmd)
-                            eval(cmd)   
-        except:
-            self.log("errors occured")
-            self.nao.say("you have an error in your code on line " + str(line))
-        
+            script = SCRIPT_CACHE.get(cmds, split_str, self.nao)
+            with self.nao.measure("run_script"):
+                if script.run(self.nao, self.log, cancelled):
+                    # start any moves not followed by go()
+                    self.nao.send()
+        except ScriptError as e:
+            self.log("errors occured: %s" % e)
+            self.nao.say("you have an error in your code on line " + str(e.line))
+        return self;
+
+    def check_script(self, cmds, split_str=";"):
+        """
+        Compile a script without running it, raises ScriptError for the first bad line
+        """
+        SCRIPT_CACHE.get(cmds, split_str, self.nao)
+        return self;
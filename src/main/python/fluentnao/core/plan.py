@@ -0,0 +1,93 @@
+import threading
+
+
+class MotionPlan():
+    """
+    Joint targets collected from fluent calls. Instead of each call posting its
+    own move, targets are added here and go() compiles them into a single
+    multi-joint interpolation call. A joint given several targets before go()
+    moves through them one after another. Fluent calls may come from several
+    threads, e.g. a voice command and a background future, so the plan is
+    only changed under its lock.
+    """
+
+    # init method
+    def __init__(self, nao):
+
+        self.nao = nao
+        self.log = nao.log
+
+        # joint names in the order first targeted
+        self.names = []
+
+        # joint name -> list of (angle in radians, duration in seconds)
+        self.targets = {}
+
+        # names of the fluent commands that added targets, see Nao.command()
+        self.commands = []
+
+        self.lock = threading.Lock()
+
+    def add(self, jointName, angleInRadians, durationInSeconds):
+        command = self.nao.command()
+        with self.lock:
+            if not jointName in self.targets:
+                self.names.append(jointName)
+                self.targets[jointName] = []
+            self.targets[jointName].append((angleInRadians, durationInSeconds))
+            if command is not None and not command in self.commands:
+                self.commands.append(command)
+        return self;
+
+    def is_empty(self):
+        return not self.names
+
+    def clear(self):
+        with self.lock:
+            self.reset()
+
+    def compile(self):
+        """
+        Return (names, angle lists, time lists) suitable for ALMotion.angleInterpolation
+        with times measured from the start of the plan
+        """
+        with self.lock:
+            return self.compile_targets()
+
+    def take(self):
+        """
+        Compile and clear the plan in one step, so a target added by another
+        thread goes into either this plan or the next. Returns (names, angle
+        lists, time lists, commands) or None if the plan is empty
+        """
+        with self.lock:
+            if not self.names:
+                return None
+            (names, angleLists, timeLists) = self.compile_targets()
+            commands = self.commands
+            self.reset()
+            return (names, angleLists, timeLists, commands)
+
+    ###################################
+    # called holding the lock
+    ###################################
+
+    def reset(self):
+        self.names = []
+        self.targets = {}
+        self.commands = []
+
+    def compile_targets(self):
+        angleLists = []
+        timeLists = []
+        for name in self.names:
+            angles = []
+            times = []
+            elapsed = 0.0
+            for angle, duration in self.targets[name]:
+                elapsed += duration
+                angles.append(angle)
+                times.append(elapsed)
+            angleLists.append(angles)
+            timeLists.append(times)
+        return (list(self.names), angleLists, timeLists)
@@ -0,0 +1,160 @@
+import bisect
+
+from fluentnao.core.scheduler import POLICY_QUEUE
+
+# maximum number of angle values sent in a single interpolation call, longer
+# trajectories are split into chunks that are played back to back
+DEFAULT_MAX_KEYS = 2000
+
+# time allowed to move from the current position to the first recorded frame
+DEFAULT_LEAD_IN = 1.0
+
+# interpolation type of bezier handles, as exported by Choregraphe
+BEZIER_HANDLE = 3
+
+
+def interpolate_key(times, angles, t):
+    i = bisect.bisect_left(times, t)
+    if i == 0:
+        return angles[0]
+    if i >= len(times):
+        return angles[-1]
+    fraction = (t - times[i - 1]) / float(times[i] - times[i - 1])
+    return angles[i - 1] + fraction * (angles[i] - angles[i - 1])
+
+
+def chunk_boundaries(time_lists, max_keys):
+    # walk the distinct key times in order and close a chunk whenever adding
+    # the keys at the next time would exceed max_keys, less one key per joint
+    # kept for the keys split_trajectory() adds at each boundary
+    room = max_keys - len(time_lists)
+    if room < len(time_lists):
+        raise ValueError("max_keys must be at least twice the number of joints, got %s for %s joints"
+                         % (max_keys, len(time_lists)))
+    counts = {}
+    for times in time_lists:
+        for t in times:
+            counts[t] = counts.get(t, 0) + 1
+
+    boundaries = []
+    total = 0
+    previous = None
+    for t in sorted(counts.keys()):
+        if total and total + counts[t] > room:
+            boundaries.append(previous)
+            total = 0
+        total += counts[t]
+        previous = t
+    if previous is not None:
+        boundaries.append(previous)
+    return boundaries
+
+
+def split_trajectory(names, angle_lists, time_lists, max_keys=DEFAULT_MAX_KEYS):
+    """
+    Split a trajectory into chunks of at most max_keys angle values.
+    Each chunk is a (names, angle_lists, time_lists) tuple with times relative
+    to the start of the chunk. Joints whose motion spans a chunk boundary get
+    an interpolated key at the boundary so they keep moving smoothly.
+    """
+    chunks = []
+    start = 0.0
+    for end in chunk_boundaries(time_lists, max_keys):
+        chunk_names = []
+        chunk_angles = []
+        chunk_times = []
+        for name, angles, times in zip(names, angle_lists, time_lists):
+            first = bisect.bisect_right(times, start)
+            last = bisect.bisect_right(times, end)
+            keys = [float(a) for a in angles[first:last]]
+            key_times = [float(t - start) for t in times[first:last]]
+            # joints that are part way between two keys at the boundary
+            if 0 < last < len(times) and (not key_times or key_times[-1] < end - start):
+                keys.append(float(interpolate_key(times, angles, end)))
+                key_times.append(float(end - start))
+            if keys:
+                chunk_names.append(name)
+                chunk_angles.append(keys)
+                chunk_times.append(key_times)
+        chunks.append((chunk_names, chunk_angles, chunk_times))
+        start = end
+    return chunks
+
+
+def bezier_control_points(angles, times):
+    """
+    Return the control points angleInterpolationBezier() expects for the keys
+    of one joint, [angle, left handle, right handle] per key. Handles are flat
+    and reach a third of the way to the neighbouring keys so each joint eases
+    in and out of every key.
+    """
+    points = []
+    for i, (angle, t) in enumerate(zip(angles, times)):
+        before = t - (times[i - 1] if i > 0 else 0.0)
+        after = (times[i + 1] - t) if i + 1 < len(times) else before
+        points.append([float(angle), [BEZIER_HANDLE, -before / 3.0, 0.0], [BEZIER_HANDLE, after / 3.0, 0.0]])
+    return points
+
+
+class Playback():
+
+    # init method
+    def __init__(self, nao):
+
+        # jobs for threading
+        self.nao = nao
+        self.joints = nao.joints
+        self.chains = nao.chains
+        self.log = nao.log
+
+    def go(self):
+        self.nao.go()
+
+    ###################################
+    # Trajectories
+    ###################################
+    def trajectory(self, names, angle_lists, time_lists, bezier=False, max_keys=DEFAULT_MAX_KEYS, cancelled=None):
+        """
+        Play keyframes for many joints at once. angle_lists holds a list of
+        angles in radians for each joint in names and time_lists the matching
+        times in seconds from now. Every chunk is a single interpolation call,
+        each chunk is queued behind the previous one so they play back to back.
+        Queueing waits for the chunk before, so this blocks for most of the
+        playback, see AsyncNao.run(). No more chunks are started once
+        cancelled, if given, returns True.
+        """
+        chunks = split_trajectory(names, angle_lists, time_lists, max_keys)
+        chains = self.nao.scheduler.chains_for(names)
+        for i, chunk in enumerate(chunks):
+            if not chunk[0]:
+                continue
+            self.log("playing chunk %s of %s: %s joints" % (i + 1, len(chunks), len(chunk[0])))
+            # chunks after the first queue behind the previous one on the same chains,
+            # nothing is posted if cancelled while waiting
+            self.nao.scheduler.submit(chains, lambda: self.post_chunk(chunk, bezier, cancelled), POLICY_QUEUE)
+            if cancelled and cancelled():
+                break
+        return self;
+
+    def post_chunk(self, chunk, bezier, cancelled=None):
+        if cancelled and cancelled():
+            return None
+        (names, angles, times) = chunk
+        if bezier:
+            points = [bezier_control_points(a, t) for (a, t) in zip(angles, times)]
+            return self.nao.env.motion.post.angleInterpolationBezier(names, times, points)
+        return self.nao.env.motion.post.angleInterpolation(names, angles, times, True)
+
+    def frames(self, names, times, frames, lead_in=DEFAULT_LEAD_IN, bezier=False, max_keys=DEFAULT_MAX_KEYS,
+               cancelled=None):
+        """
+        Play recorded frames, each frame holding an angle in radians for every
+        joint in names. times are the recording timestamps, playback starts
+        lead_in seconds from now so the robot can reach the first frame.
+        """
+        if len(times) == 0:
+            return self;
+        start = times[0]
+        time_list = [t - start + lead_in for t in times]
+        angle_lists = [[float(frame[i]) for frame in frames] for i in range(len(names))]
+        return self.trajectory(names, angle_lists, [time_list] * len(names), bezier, max_keys, cancelled)
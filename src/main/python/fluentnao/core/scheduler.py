@@ -0,0 +1,157 @@
+import threading
+
+# a new command on a chain that is still moving waits for the running task
+POLICY_QUEUE = "queue"
+
+# a new command on a chain that is still moving stops the running task
+POLICY_PREEMPT = "preempt"
+
+# no timeout when waiting for queued tasks
+WAIT_FOREVER = 0
+
+# default timeout in ms used by go()
+DEFAULT_WAIT_TIMEOUT = 15000
+
+
+class MotionScheduler():
+    """
+    Keep track of motion tasks in flight for each kinematic chain. Commands
+    on independent chains run concurrently, a command on a chain that is
+    still moving is queued behind or preempts the running task depending on
+    the policy. All methods are thread safe.
+    """
+
+    # init method
+    def __init__(self, nao, policy=POLICY_QUEUE):
+
+        self.nao = nao
+        self.joints = nao.joints
+        self.log = nao.log
+        self.policy = policy
+
+        self.chain_names = [self.joints.Chains.Head,
+                            self.joints.Chains.LArm, self.joints.Chains.RArm,
+                            self.joints.Chains.LLeg, self.joints.Chains.RLeg]
+
+        # joint name -> chain name
+        self.joint_chains = {}
+        for chain in self.chain_names:
+            for jointName in getattr(self.joints, chain):
+                self.joint_chains[jointName] = chain
+
+        # chain -> list of (proxy, task id) in flight on that chain
+        self.tasks = dict((chain, []) for chain in self.chain_names)
+        self.lock = threading.Lock()
+
+        # held while submitting to a chain so commands on the same chain are
+        # ordered, always acquired in chain_names order to avoid deadlock
+        self.chain_locks = dict((chain, threading.Lock()) for chain in self.chain_names)
+
+    ###################################
+    # chains
+    ###################################
+    def chains_for(self, names):
+        """
+        Return the chains used by a chain name, joint name or list of either
+        """
+        if isinstance(names, basestring):
+            names = [names]
+        chains = set()
+        for name in names:
+            if name == self.joints.Chains.Body:
+                chains.update(self.chain_names)
+            elif name in self.tasks:
+                chains.add(name)
+            elif name in self.joint_chains:
+                chains.add(self.joint_chains[name])
+        return [c for c in self.chain_names if c in chains]
+
+    def all_chains(self):
+        return list(self.chain_names)
+
+    ###################################
+    # tasks
+    ###################################
+    def submit(self, chains, post, policy=None, proxy=None):
+        """
+        Post a task using the chains given. post is a function that starts
+        the task and returns its task id, proxy is the module the task runs
+        on (ALMotion by default). Nothing is recorded if post returns None.
+        """
+        policy = policy or self.policy
+        proxy = proxy or self.nao.env.motion
+        locks = [self.chain_locks[c] for c in self.chain_names if c in chains]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for (taskProxy, taskId) in self.running(chains):
+                if policy == POLICY_PREEMPT:
+                    self.log("preempting task %s" % taskId)
+                    taskProxy.stop(taskId)
+                else:
+                    taskProxy.wait(taskId, WAIT_FOREVER)
+            self.forget(chains)
+
+            taskId = post()
+            if taskId is not None:
+                with self.lock:
+                    for chain in chains:
+                        self.tasks[chain].append((proxy, taskId))
+            return taskId
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def running(self, chains=None):
+        """
+        Return the distinct (proxy, task id) pairs in flight on the chains given
+        (all chains by default)
+        """
+        if chains is None:
+            chains = self.chain_names
+        result = []
+        with self.lock:
+            for chain in chains:
+                for taskId in self.tasks[chain]:
+                    if not taskId in result:
+                        result.append(taskId)
+        return result
+
+    def forget(self, chains, tasks=None):
+        with self.lock:
+            for chain in chains:
+                if tasks is None:
+                    self.tasks[chain] = []
+                else:
+                    self.tasks[chain] = [t for t in self.tasks[chain] if not t in tasks]
+
+    def is_busy(self, chain):
+        for (taskProxy, taskId) in self.running([chain]):
+            if taskProxy.isRunning(taskId):
+                return True
+        return False
+
+    def wait(self, chains=None, timeout=DEFAULT_WAIT_TIMEOUT):
+        """
+        Block until the tasks on the chains given (all chains by default) have finished
+        """
+        if chains is None:
+            chains = self.chain_names
+        tasks = self.running(chains)
+        for (taskProxy, taskId) in tasks:
+            #self.log("trying: %s" % (taskId))
+            taskProxy.wait(taskId, timeout)
+            #self.log("released: %s" % (taskId))
+        # only forget what we waited for, other threads may have added tasks since
+        self.forget(chains, tasks)
+
+    def stop(self, chains=None):
+        """
+        Stop the tasks running on the chains given (all chains by default)
+        """
+        if chains is None:
+            chains = self.chain_names
+        tasks = self.running(chains)
+        for (taskProxy, taskId) in tasks:
+            taskProxy.stop(taskId)
+        self.forget(chains, tasks)
@@ -0,0 +1,187 @@
+import hashlib
+import httplib
+import json
+import os
+import socket
+import threading
+import time
+
+DEFAULT_HOST = "naoscript.herokuapp.com"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fluentnao", "scripts")
+
+# seconds to wait for the script server
+DEFAULT_TIMEOUT = 5.0
+
+# scripts fetched more recently than this (seconds) are used without asking the server
+DEFAULT_MAX_AGE = 300.0
+
+# number of scripts kept on disk
+DEFAULT_MAX_ENTRIES = 256
+
+HEADERS = {"Content-type": "application/x-www-form-urlencoded", "Accept": "text/plain"}
+
+
+class ScriptStoreError(Exception):
+    pass
+
+
+class ScriptStore():
+    """
+    On disk cache of scripts downloaded from the NaoScript server. Cached
+    scripts are revalidated with ETag/Last-Modified, used as they are when
+    fetched recently and used as a fallback when the server cannot be
+    reached. The least recently used scripts are dropped once more than
+    max_entries are stored.
+    """
+
+    # init method
+    def __init__(self, host=DEFAULT_HOST, cache_dir=DEFAULT_CACHE_DIR, timeout=DEFAULT_TIMEOUT,
+                 max_age=DEFAULT_MAX_AGE, max_entries=DEFAULT_MAX_ENTRIES, log=None):
+
+        self.host = host
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.log = log or (lambda msg: None)
+        self.lock = threading.Lock()
+
+    ###################################
+    # cache files
+    ###################################
+    def path(self, scriptId):
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(scriptId))
+        return os.path.join(self.cache_dir, safe_id + ".json")
+
+    def read(self, scriptId):
+        try:
+            with open(self.path(scriptId)) as f:
+                entry = json.load(f)
+            # the file time records when the script was last used
+            os.utime(self.path(scriptId), None)
+            return entry
+        except (IOError, OSError, ValueError):
+            return None
+
+    def write(self, scriptId, entry):
+        try:
+            with self.lock:
+                if not os.path.exists(self.cache_dir):
+                    os.makedirs(self.cache_dir)
+                tmp_path = self.path(scriptId) + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(entry, f)
+                os.rename(tmp_path, self.path(scriptId))
+                self.evict()
+        except (IOError, OSError) as e:
+            self.log("unable to save script %s: %s" % (scriptId, e))
+
+    def evict(self):
+        names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        if len(names) <= self.max_entries:
+            return
+        paths = sorted((os.path.join(self.cache_dir, n) for n in names), key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            os.remove(path)
+
+    def cached(self, scriptId):
+        """
+        Return the cached script text or None
+        """
+        entry = self.read(scriptId)
+        return entry["script"] if entry else None
+
+    ###################################
+    # fetching
+    ###################################
+    def connect(self):
+        return httplib.HTTPConnection(self.host, timeout=self.timeout)
+
+    def get(self, scriptId, connection=None):
+        """
+        Return the text of a script, from the cache if it is fresh or the
+        server says it has not changed, from the server otherwise. If the
+        server cannot be reached the cached copy is used whatever its age.
+        """
+        (script, error) = self.load(scriptId, connection)
+        if script is None:
+            raise ScriptStoreError("unable to get script %s: %s" % (scriptId, error))
+        return script
+
+    def load(self, scriptId, connection=None):
+        """
+        As get() but return (script, error), error being the exception raised
+        asking the server or None. script is the cached copy if the server
+        could not be used, or None if there is no copy.
+        """
+        entry = self.read(scriptId)
+        if entry and time.time() - entry.get("fetched", 0) < self.max_age:
+            return (entry["script"], None)
+
+        try:
+            entry = self.fetch(scriptId, entry, connection)
+        except (socket.error, httplib.HTTPException, ValueError, KeyError) as e:
+            if entry:
+                self.log("using cached script %s, server unavailable: %s" % (scriptId, e))
+                return (entry["script"], e)
+            return (None, e)
+        return (entry["script"], None)
+
+    def fetch(self, scriptId, entry=None, connection=None):
+        headers = dict(HEADERS)
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        conn = connection or self.connect()
+        try:
+            conn.request("GET", "/behaviors/" + str(scriptId) + ".json", "", headers)
+            response = conn.getresponse()
+            data = response.read()
+        finally:
+            if not connection:
+                conn.close()
+
+        if response.status == httplib.NOT_MODIFIED and entry:
+            entry["fetched"] = time.time()
+            self.write(scriptId, entry)
+            return entry
+        if response.status != httplib.OK:
+            raise httplib.HTTPException("server returned %s for script %s" % (response.status, scriptId))
+
+        script = str(json.loads(data)['script']).strip()
+        new_entry = {"script": script,
+                     "sha1": hashlib.sha1(script).hexdigest(),
+                     "etag": response.getheader("etag"),
+                     "last_modified": response.getheader("last-modified"),
+                     "fetched": time.time()}
+        if entry and entry.get("sha1") == new_entry["sha1"]:
+            self.log("script %s unchanged" % scriptId)
+        self.write(scriptId, new_entry)
+        return new_entry
+
+    def prefetch(self, scriptIds):
+        """
+        Load several scripts up front over a single connection so running
+        them later needs no network. Returns a dict of script id -> error for
+        the scripts that could not be loaded.
+        """
+        errors = {}
+        conn = self.connect()
+        try:
+            for scriptId in scriptIds:
+                (script, error) = self.load(scriptId, conn)
+                if error is None:
+                    continue
+                if script is None:
+                    errors[scriptId] = ScriptStoreError("unable to get script %s: %s" % (scriptId, error))
+                # a failed request can leave the connection unusable, e.g. after
+                # a timeout, so start again with a fresh one
+                conn.close()
+                conn = self.connect()
+        finally:
+            conn.close()
+        return errors
@@ -0,0 +1,75 @@
+import threading
+
+# seconds taken to change the stiffness of joints
+STIFFNESS_TIME = 1.0
+
+# stiffnesses read back closer than this to the one wanted are left alone
+STIFFNESS_ACCURACY = 0.01
+
+
+class Stiffness():
+    """
+    Stiffness last set on each joint, so chains already stiff or relaxed are
+    not sent again and several chains change in a single call. The robot
+    changes stiffness on its own too (postures, rest, hot joints, other
+    ALMotion clients) so joints that look unchanged are read back before
+    being skipped, see set().
+    """
+
+    # init method
+    def __init__(self, nao):
+
+        self.nao = nao
+        self.log = nao.log
+        self.lock = threading.Lock()
+
+        # joint name -> stiffness last set
+        self.states = {}
+
+    ###################################
+    # changes
+    ###################################
+    def set(self, chains, stiffness, duration=STIFFNESS_TIME):
+        """
+        Change the stiffness of the joints of chains not already at stiffness.
+        Joints last set to stiffness are read back in one call in case the
+        robot has changed them since, the rest are changed without reading.
+        """
+        stiffness = float(stiffness)
+        names = []
+        for chain in chains:
+            names.extend(self.nao.metadata.joint_names(chain))
+        with self.lock:
+            known = [n for n in names if self.states.get(n) == stiffness]
+
+        # reading is much quicker than a change, which blocks for duration
+        if known:
+            actual = dict(zip(known, self.nao.env.motion.getStiffnesses(known)))
+        else:
+            actual = {}
+        changed = [n for n in names if not n in actual or abs(actual[n] - stiffness) > STIFFNESS_ACCURACY]
+        if not changed:
+            self.log("stiffness of %s already %s" % (chains, stiffness))
+            return self;
+
+        # one call with a stiffness & time list per joint
+        self.nao.env.motion.stiffnessInterpolation(changed, [[stiffness]] * len(changed),
+                                                   [[duration]] * len(changed))
+        with self.lock:
+            for name in changed:
+                self.states[name] = stiffness
+        return self;
+
+    def stiffness(self, jointName):
+        # None if not known
+        with self.lock:
+            return self.states.get(jointName)
+
+    def invalidate(self):
+        """
+        Forget the known stiffnesses so the next changes are all sent without
+        reading them back first, e.g. after rest() or a posture
+        """
+        with self.lock:
+            self.states.clear()
+        return self;
@@ -13,6 +13,10 @@ class Wrists():
 
     def go(self):
         self.nao.go()
+
+    def send(self):
+        self.nao.send()
+        return self;
         
     ###################################
     # Center
@@ -18,20 +18,40 @@ from fluentnao.core.wrists import Wrists
 from fluentnao.core.leds import Leds
 from fluentnao.core.audio import Audio
 from fluentnao.core.naoscript import NaoScript
+from fluentnao.core.playback import Playback
+from fluentnao.core.metadata import JointMetadata, DEFAULT_CACHE_DIR
+from fluentnao.core.plan import MotionPlan
+from fluentnao.core.scheduler import MotionScheduler
+from fluentnao.core.futures import AsyncNao
+from fluentnao.core.stiffness import Stiffness
 
 import almath
-import math
+import inspect
+import threading
 import time
 
+
+class NoSpan(object):
+    # stands in for a trace span when not tracing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NO_SPAN = NoSpan()
+
+# limbs whose fluent methods are measured as commands, see Nao.measure_commands()
+FLUENT_LIMBS = ['head', 'hands', 'wrists', 'elbows', 'arms', 'feet', 'legs']
+
+
 class Nao(object):
 
     # init method
-    def __init__(self, env, log_function=None):
+    def __init__(self, env, log_function=None, metadata_cache_dir=DEFAULT_CACHE_DIR):
         super(Nao, self).__init__()
         
-        # jobs for threading
-        self.jobs = []
-        
         # set motion proxy & log
         self.env = env
         self.log_function = log_function
@@ -41,11 +61,26 @@ class Nao(object):
         # joints
         self.joints = Joints()
         self.chains = self.joints.Chains
+        # joint names & limits, saved in metadata_cache_dir unless it is None
+        self.metadata = JointMetadata(self, metadata_cache_dir)
+
+        # joint targets from fluent calls waiting for go()
+        self.plan = MotionPlan(self)
+
+        # stiffness last set per joint, see stiffness.invalidate()
+        self.stiffness = Stiffness(self)
+
+        # motion tasks in flight per chain
+        self.scheduler = MotionScheduler(self)
+
+        # non-blocking versions of the blocking calls returning futures
+        self.background = AsyncNao(self)
 
         # other
         self.naoscript = NaoScript(self)
         self.leds = Leds(self)
         self.audio = Audio(self)
+        self.playback = Playback(self)
 
         # head
         self.head = Head(self)
@@ -63,6 +98,12 @@ class Nao(object):
         # global duration
         self.set_duration(1.5)
 
+        # fluent command running on each thread, see command()
+        self.commands = threading.local()
+        if self.counter() is not None:
+            for prefix in FLUENT_LIMBS:
+                self.measure_commands(prefix, getattr(self, prefix))
+
     def log(self, msg):
         if (self.log_function):
             self.log_function(msg)
@@ -77,65 +118,68 @@ class Nao(object):
         return self;
 
     def wait(self, seconds):
-        time.sleep(seconds)
+        # start anything already planned so it runs during the wait
+        self.send()
+        with self.span("wait"):
+            time.sleep(seconds)
         return self;
 
 
     ###################################
     # Postures
     ###################################
+    def posture(self, name, speed):
+        # postures move the whole body so wait for everything else first
+        self.send()
+        self.scheduler.submit(self.scheduler.all_chains(),
+                              lambda: self.env.robotPosture.post.goToPosture(name, speed),
+                              proxy=self.env.robotPosture)
+        self.go()
+        self.stiffness.invalidate()
+        return self;
+
     def stand_init(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("StandInit", speed))
-        taskId = self.env.robotPosture.post.goToPosture("StandInit", speed)
-        self.jobs.append(taskId)
-        self.go()
+        self.posture("StandInit", speed)
         return self;
     
     def sit_relax(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("SitRelax", speed))
-        taskId = self.env.robotPosture.post.goToPosture("SitRelax", speed)
-        self.jobs.append(taskId)
-        self.go()
+        self.posture("SitRelax", speed)
         return self;
     
     def stand_zero(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("StandZero", speed))
-        taskId = self.env.robotPosture.post.goToPosture("StandZero", speed)
-        self.jobs.append(taskId)
-        self.go()
+        self.posture("StandZero", speed)
         return self;
     
     def lying_belly(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("LyingBelly", speed))
-        taskId = self.env.robotPosture.post.goToPosture("LyingBelly", speed)
-        self.jobs.append(taskId)
-        self.go()
+        self.posture("LyingBelly", speed)
         return self;
     
     def lying_back(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("LyingBack", speed))
-        taskId = self.env.robotPosture.post.goToPosture("LyingBack", speed)
-        self.jobs.append(taskId)
-        self.go()
+        self.posture("LyingBack", speed)
         return self;
     
     def stand(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("Stand", speed))
         self.env.robotPosture.goToPosture("Stand", speed)
         self.env.motion.waitUntilMoveIsFinished();
+        self.stiffness.invalidate()
         return self;
     
     def crouch(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("Crouch", speed))
-        taskId = self.env.robotPosture.post.goToPosture("Crouch", speed)
-        self.jobs.append(taskId)
-        self.go()
+        self.posture("Crouch", speed)
         return self;
     
     def sit(self, speed=.5):
         self.log("goToPosture=%s|speed=%s" % ("Sit", speed))
         self.env.robotPosture.post.goToPosture("Sit", speed)
         self.env.motion.waitUntilMoveIsFinished();
+        self.stiffness.invalidate()
         return self;
 
 
@@ -143,21 +187,16 @@ class Nao(object):
     # stiffness
     ###################################
     def stiff(self):
-        pNames = self.joints.Chains.Body
-        pStiffnessLists = 1.0
-        pTimeLists = 1.0
-        self.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.stiffness.set([self.joints.Chains.Body], 1.0)
         return self;
 
     def rest(self):
         self.env.motion.rest()
+        self.stiffness.invalidate()
         return self;
 
     def relax(self):
-        pNames = self.joints.Chains.Body
-        pStiffnessLists = 0
-        pTimeLists = 1.0
-        self.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
+        self.stiffness.set([self.joints.Chains.Body], 0)
         return self;
 
     ###################################
@@ -221,16 +260,75 @@ class Nao(object):
     # blocking
     ###################################
     
-    def go(self):
-        for taskId in self.jobs:
-            #self.log("trying: %s" % (taskId))
-            self.env.motion.wait(taskId, 15000)   
-            #self.log("released: %s" % (taskId))
+    def send(self):
+        # compile pending fluent calls into a single interpolation call
+        plan = self.plan.take()
+        if plan is not None:
+            (names, angleLists, timeLists, commands) = plan
+            self.log("sending plan for %s" % names)
+            # the calls starting the move count towards each command that planned it
+            with self.measure(commands, new_run=False):
+                self.playback.trajectory(names, angleLists, timeLists)
+        return self
 
-        self.jobs[:] = []
+    def go(self):
+        with self.span("go"):
+            self.send()
+            self.scheduler.wait()
         #self.log("done")
         
         return self         
+
+    def span(self, name):
+        # mark part of a session in the trace if the environment records to one supporting spans,
+        # see naoutil.trace.ChromeTraceRecorder
+        recorder = getattr(self.env, 'recorder', None)
+        if recorder is not None and hasattr(recorder, 'span'):
+            return recorder.span(name)
+        return NO_SPAN
+
+    def counter(self):
+        # the naoutil.metrics.RpcCounter the environment records to, if any
+        recorder = getattr(self.env, 'recorder', None)
+        if recorder is not None and hasattr(recorder, 'measure'):
+            return recorder
+        return None
+
+    def measure(self, name, new_run=True):
+        # count the proxy calls made under name (or each of a list of names) if the environment
+        # records to a counter, see naoutil.metrics.RpcCounter
+        counter = self.counter()
+        if counter is not None:
+            return counter.measure(name, new_run)
+        return NO_SPAN
+
+    def command(self):
+        # name of the fluent command running on this thread, e.g. "arms.up", or None
+        return getattr(self.commands, 'name', None)
+
+    def measure_commands(self, prefix, limb):
+        """
+        Count the proxy calls made by each fluent method of limb under the
+        command name "<prefix>.<method>". Moves are only started by send(),
+        which counts its calls towards every command that planned them.
+        """
+        for (method, function) in inspect.getmembers(limb, inspect.ismethod):
+            if method.startswith('_') or method in ('go', 'send'):
+                continue
+            setattr(limb, method, self.measured_command(prefix + "." + method, function))
+
+    def measured_command(self, name, function):
+        def call(*args, **kwargs):
+            # commands calling other commands, e.g. arms.forward(), count as the outer one
+            if self.command() is not None:
+                return function(*args, **kwargs)
+            self.commands.name = name
+            try:
+                with self.measure(name):
+                    return function(*args, **kwargs)
+            finally:
+                self.commands.name = None
+        return call
             
     ###################################
     # movement
@@ -248,10 +346,8 @@ class Nao(object):
         self.log("setting %s to %s" % (chain, angleListInRadians))
 
         # motion w/ blocking call
-        taskId = self.env.motion.post.angleInterpolationWithSpeed(chain, angleListInRadians, fractionMaxSpeed)    
-
-        # save task id
-        self.jobs.append(taskId)
+        self.scheduler.submit(self.scheduler.chains_for(chain),
+                              lambda: self.env.motion.post.angleInterpolationWithSpeed(chain, angleListInRadians, fractionMaxSpeed))
         
 
     def move_with_degrees(self, chain, angleListInDegrees, fractionMaxSpeed = 0.3):
@@ -262,14 +358,11 @@ class Nao(object):
         self.move(chain, angleListInRadians, fractionMaxSpeed)
 
     def move_with_degrees_and_duration(self, jointName, angleInDegrees, durationInSeconds):
-        # fraction of max speed
-        fractionMaxSpeed = self.get_fraction_max_speed(jointName, angleInDegrees, durationInSeconds)
-
         # convert to radians
         angleInRadians = angleInDegrees * almath.TO_RAD
 
-        # move
-        self.move(jointName, [angleInRadians], fractionMaxSpeed)
+        # add to the plan, the move starts on go()
+        self.plan.add(jointName, angleInRadians, durationInSeconds)
 
     ###################################
     # helpers
@@ -277,24 +370,21 @@ class Nao(object):
 
     def get_target_angles_for_chain(self, chain, angle):
         # Get the Number of Joints
-        numBodies = len(self.env.motion.getJointNames(chain))
+        numBodies = len(self.metadata.joint_names(chain))
     
         # We prepare a collection of floats
         return [angle] * numBodies
 
     def get_max_degrees_per_second(self, jointName):
-        limits = self.env.motion.getLimits(jointName);
-        minAngle = limits[0][0]
-        maxAngle = limits[0][1]
-        maxChange = limits[0][2]  # in rad.s-1
+        maxChange = self.metadata.max_velocity(jointName)  # in rad.s-1
 
         #self.log("maxChange: " + str(maxChange) + " for " + jointName)
-        return math.degrees(maxChange)
+        return maxChange * almath.TO_DEG
 
     def get_fraction_max_speed(self, jointName, desiredPositionInDegrees, executionTimeInSeconds):
         # current position in degrees
         useSensors = False;
-        currentPositionInDegrees = math.degrees(self.env.motion.getAngles(jointName, useSensors)[0]);
+        currentPositionInDegrees = self.env.motion.getAngles(jointName, useSensors)[0] * almath.TO_DEG;
         #self.log("pos in deg: " + str(currentPositionInDegrees))
 
         # distance
@@ -329,6 +419,14 @@ def init_modules_for_development(pathToCore):
     import fluentnao.core.leds
     import fluentnao.core.audio
     import fluentnao.core.naoscript
+    import fluentnao.core.playback
+    import fluentnao.core.metadata
+    import fluentnao.core.plan
+    import fluentnao.core.scheduler
+    import fluentnao.core.futures
+    import fluentnao.core.compiler
+    import fluentnao.core.scriptstore
+    import fluentnao.core.stiffness
 
     reload(fluentnao.core.arms)
     reload(fluentnao.core.joints)
@@ -340,4 +438,13 @@ def init_modules_for_development(pathToCore):
     reload(fluentnao.core.feet)
     reload(fluentnao.core.leds)
     reload(fluentnao.core.audio)
+    # naoscript binds names from compiler & scriptstore so they are reloaded first
+    reload(fluentnao.core.compiler)
+    reload(fluentnao.core.scriptstore)
     reload(fluentnao.core.naoscript)
+    reload(fluentnao.core.playback)
+    reload(fluentnao.core.metadata)
+    reload(fluentnao.core.plan)
+    reload(fluentnao.core.stiffness)
+    reload(fluentnao.core.scheduler)
+    reload(fluentnao.core.futures)
@@ -0,0 +1,177 @@
+'''
+Created on 18 Oct 2026
+
+@author: dsnowdon
+
+Count the proxy calls a session makes, per module & method, so the number of
+round trips a fluent command or script costs can be seen and kept in check.
+
+RpcCounter is passed as the recorder of a NaoEnvironment (see
+make_environment()), optionally wrapping another recorder such as a
+TraceRecorder which still sees every call. Calls are counted as
+"<proxy>.<method>", "<proxy>.post.<method>" for posted calls, the same names
+ChromeTraceRecorder uses. measure() counts the calls made while the body of a
+with statement runs and adds them to the totals kept for its name, fluentnao
+measures each run_script(), each line of a script and each fluent command
+(e.g. "arms.up", including its share of the go() starting the move) this way.
+
+rpc_budget() turns a measurement into an assertion for tests, typically run
+against an OfflineBackend:
+
+    with rpc_budget(counter, 2, name="arms.up().go()"):
+        nao.arms.up().go()
+'''
+import collections
+import contextlib
+import threading
+
+ScopeStats = collections.namedtuple('ScopeStats', ['runs', 'calls'])
+
+
+def call_name(proxy, method, post):
+    return "{}.{}{}".format(proxy, "post." if post else "", method)
+
+
+@contextlib.contextmanager
+def no_span():
+    yield
+
+
+class CallCounts(collections.Counter):
+    '''
+    Number of calls of each proxy method
+    '''
+    def total(self, methods=None):
+        '''
+        Return the number of calls, only counting those of methods if given. Each
+        of methods is a call name or a prefix of one, "ALMotion" counts every
+        call of ALMotion and "ALMotion.getAngles" only that method.
+        '''
+        if methods is None:
+            return sum(self.values())
+        if isinstance(methods, basestring):
+            methods = [methods]
+        return sum(count for (name, count) in self.items()
+                   if any(name == m or name.startswith(m + '.') for m in methods))
+
+    def describe(self):
+        return ", ".join("{} x{}".format(name, count) for (name, count) in sorted(self.items()))
+
+
+class RpcBudgetExceeded(AssertionError):
+    pass
+
+
+class RpcCounter(object):
+    '''
+    Count proxy calls, passing each on to recorder if one is given. Calls made
+    by any thread while a measurement is open count towards it, so calls made
+    by background futures or the motion scheduler are included.
+    '''
+    def __init__(self, recorder=None):
+        super(RpcCounter, self).__init__()
+        self.recorder = recorder
+        self.lock = threading.Lock()
+        self.totals = CallCounts()
+        # measurements in progress & name -> [runs, CallCounts] of finished ones
+        self.active = []
+        self.scopes = {}
+
+    def record(self, proxy, method, post, args, result, error, start, duration, thread):
+        name = call_name(proxy, method, post)
+        with self.lock:
+            self.totals[name] += 1
+            for counts in self.active:
+                counts[name] += 1
+        if self.recorder is not None:
+            self.recorder.record(proxy, method, post, args, result, error, start, duration, thread)
+
+    @contextlib.contextmanager
+    def measure(self, name, new_run=True):
+        '''
+        Count the calls made while the body of a with statement runs, the
+        CallCounts are the value of the with statement. Measurements may nest,
+        a call counts towards every open one. name may be a list of names
+        which each get the calls. If new_run is false the calls are added to
+        the last run of each name rather than counted as a run of their own.
+        '''
+        names = [name] if isinstance(name, basestring) else list(name)
+        counts = CallCounts()
+        with self.lock:
+            self.active.append(counts)
+        try:
+            yield counts
+        finally:
+            with self.lock:
+                # by identity, counts of different measurements may be equal
+                self.active = [c for c in self.active if c is not counts]
+                for n in names:
+                    scope = self.scopes.setdefault(n, [0, CallCounts()])
+                    if new_run or scope[0] == 0:
+                        scope[0] += 1
+                    scope[1].update(counts)
+
+    def span(self, name):
+        # spans are left to the wrapped recorder, see fluentnao.nao.Nao.span()
+        if self.recorder is not None and hasattr(self.recorder, 'span'):
+            return self.recorder.span(name)
+        return no_span()
+
+    def names(self):
+        with self.lock:
+            return sorted(self.scopes.keys())
+
+    def scope(self, name):
+        '''
+        Return the ScopeStats of a measurement name, None if it has not run
+        '''
+        with self.lock:
+            if not name in self.scopes:
+                return None
+            (runs, calls) = self.scopes[name]
+            return ScopeStats(runs, CallCounts(calls))
+
+    def report(self):
+        '''
+        Return a table of the calls made by each measurement name
+        '''
+        lines = ["{:<32} {:>7} {:>9} {}".format("scope", "runs", "calls/run", "calls")]
+        for name in self.names():
+            s = self.scope(name)
+            lines.append("{:<32} {:>7} {:>9.1f} {}".format(
+                         name, s.runs, s.calls.total() / float(s.runs), s.calls.describe()))
+        return "\n".join(lines)
+
+    def clear(self):
+        with self.lock:
+            self.totals.clear()
+            self.scopes.clear()
+
+    def close(self):
+        if self.recorder is not None and hasattr(self.recorder, 'close'):
+            self.recorder.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@contextlib.contextmanager
+def rpc_budget(counter, limit, methods=None, name="budget"):
+    '''
+    Raise RpcBudgetExceeded, an AssertionError, if the body of a with statement
+    makes more than limit calls through counter, only counting those of methods
+    if given (see CallCounts.total()). counter may also be a fluentnao Nao whose
+    environment records to an RpcCounter, ValueError is raised if it does not.
+    '''
+    with counter.measure(name) as counts:
+        if not isinstance(counts, CallCounts):
+            raise ValueError("{} needs an RpcCounter or a Nao recording to one, got {}".format(name, counter))
+        yield counts
+    used = counts.total(methods)
+    if used > limit:
+        raise RpcBudgetExceeded("{} made {} calls{}, budget is {}: {}".format(
+                                name, used, " of {}".format(methods) if methods else "", limit,
+                                counts.describe()))
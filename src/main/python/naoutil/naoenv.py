@@ -10,6 +10,8 @@ loggers. Instead code just passes around NaoEnvironment instances
 import inspect
 import os
 import logging
+import threading
+import time
 
 from naoqi import ALProxy
 
@@ -55,9 +57,13 @@ PROXY_SHORT_NAMES = { 'audioDevice' : 'ALAudioDevice',
 Hold information about the NAO environment and provide abstraction for logging
 '''
 class NaoEnvironment(object):
-    def __init__(self, box_, proxies={}, ipaddr=None, port=None):
+    def __init__(self, box_, proxies={}, ipaddr=None, port=None, backend=None, recorder=None):
         super(NaoEnvironment, self).__init__()
         self.box = box_
+        # if set proxies come from backend (see naoutil.offline) instead of ALProxy
+        self.backend = backend
+        # if set every call made through a proxy is passed to recorder (see naoutil.trace)
+        self.recorder = recorder
         self.app_name = None
         self.resources_path = None
         self.data_path = None
@@ -179,21 +185,61 @@ class NaoEnvironment(object):
 
     # invoke ALProxy to store the proxy we need
     def add_proxy(self, longName):
-        self.proxies[longName] = self.create_proxy(longName)
+        proxy = self.create_proxy(longName)
+        if self.recorder:
+            proxy = RecordingProxy(proxy, longName, self.recorder)
+        self.proxies[longName] = proxy
 
     # invoke ALProxy to create the proxy we need
     def create_proxy(self, longName):
-        if self.proxyAddr and self.proxyPort:
+        if self.backend:
+            self.logger.debug('Creating offline proxy: {name}'.format(name=longName))
+            return self.backend.create_proxy(longName)
+        elif self.proxyAddr and self.proxyPort:
             self.logger.debug('Creating proxy: {name} at {proxy.proxyAddr}:{proxy.proxyPort}'.format(name=longName, proxy=self))
             return ALProxy(longName, self.proxyAddr, self.proxyPort)
         else:
             self.logger.debug('Creating proxy: {name}'.format(name=longName))
             return ALProxy(longName)
 
+'''
+Wrap a proxy so that every method call made through it, including calls
+made through post, is passed to recorder.record() with its arguments, result
+or exception, start time, duration and thread name
+'''
+class RecordingProxy(object):
+    def __init__(self, proxy, name, recorder, is_post=False):
+        super(RecordingProxy, self).__init__()
+        self.proxy = proxy
+        self.name = name
+        self.recorder = recorder
+        self.is_post = is_post
+
+    def __getattr__(self, method):
+        if method == 'post' and not self.is_post:
+            return RecordingProxy(self.proxy.post, self.name, self.recorder, True)
+        target = getattr(self.proxy, method)
+        if not callable(target):
+            return target
+
+        def call(*args):
+            start = time.time()
+            try:
+                result = target(*args)
+            except Exception as e:
+                self.recorder.record(self.name, method, self.is_post, args, None, e,
+                                     start, time.time() - start, threading.current_thread().name)
+                raise
+            self.recorder.record(self.name, method, self.is_post, args, result, None,
+                                 start, time.time() - start, threading.current_thread().name)
+            return result
+        return call
+
 '''
 Create environment object.
 Needs to be called from a process with an ALBroker running (for example
-within choreographe code)
+within choreographe code) unless a backend such as naoutil.offline.OfflineBackend
+is given
 '''
-def make_environment(box_, proxies={}, ipaddr=None, port=None):
-    return NaoEnvironment(box_, proxies, ipaddr, port)
\ No newline at end of file
+def make_environment(box_, proxies={}, ipaddr=None, port=None, backend=None, recorder=None):
+    return NaoEnvironment(box_, proxies, ipaddr, port, backend, recorder)
\ No newline at end of file
@@ -0,0 +1,702 @@
+'''
+Created on 18 Oct 2026
+
+@author: dsnowdon
+
+In-process stand-ins for the NAOqi modules used by fluentnao and the recorder
+so both can run, be tested and be benchmarked on a machine with no robot.
+Pass an OfflineBackend to make_environment() and every proxy the environment
+creates is served by it instead of ALProxy.
+
+Joint limits are those of a NAO H25 V4. Interpolation commands are
+integrated piecewise linearly between their keys so getAngles() reports
+where the joints would be at the time it is called.
+'''
+import math
+import random
+import threading
+import time
+
+'''
+Joints of the Body chain in ALMotion order with [min angle, max angle, max velocity, max torque]
+'''
+BODY_LIMITS = [('HeadYaw', [-2.0857, 2.0857, 8.26797, 0.5]),
+               ('HeadPitch', [-0.6720, 0.5149, 7.19407, 1.0]),
+               ('LShoulderPitch', [-2.0857, 2.0857, 8.26797, 0.8]),
+               ('LShoulderRoll', [-0.3142, 1.3265, 7.19407, 1.0]),
+               ('LElbowYaw', [-2.0857, 2.0857, 8.26797, 0.5]),
+               ('LElbowRoll', [-1.5446, -0.0349, 7.19407, 1.0]),
+               ('LWristYaw', [-1.8238, 1.8238, 24.6229, 0.1]),
+               ('LHand', [0.0, 1.0, 8.33333, 0.1]),
+               ('LHipYawPitch', [-1.145303, 0.740810, 4.16174, 3.2]),
+               ('LHipRoll', [-0.379472, 0.790477, 4.16174, 3.2]),
+               ('LHipPitch', [-1.535889, 0.484090, 6.40239, 3.2]),
+               ('LKneePitch', [-0.092346, 2.112528, 6.40239, 3.2]),
+               ('LAnklePitch', [-1.189516, 0.922747, 6.40239, 3.2]),
+               ('LAnkleRoll', [-0.397880, 0.769001, 4.16174, 3.2]),
+               ('RHipYawPitch', [-1.145303, 0.740810, 4.16174, 3.2]),
+               ('RHipRoll', [-0.790477, 0.379472, 4.16174, 3.2]),
+               ('RHipPitch', [-1.535889, 0.484090, 6.40239, 3.2]),
+               ('RKneePitch', [-0.103083, 2.120198, 6.40239, 3.2]),
+               ('RAnklePitch', [-1.186448, 0.932056, 6.40239, 3.2]),
+               ('RAnkleRoll', [-0.768992, 0.397935, 4.16174, 3.2]),
+               ('RShoulderPitch', [-2.0857, 2.0857, 8.26797, 0.8]),
+               ('RShoulderRoll', [-1.3265, 0.3142, 7.19407, 1.0]),
+               ('RElbowYaw', [-2.0857, 2.0857, 8.26797, 0.5]),
+               ('RElbowRoll', [0.0349, 1.5446, 7.19407, 1.0]),
+               ('RWristYaw', [-1.8238, 1.8238, 24.6229, 0.1]),
+               ('RHand', [0.0, 1.0, 8.33333, 0.1])]
+
+BODY_JOINTS = [n for (n, _) in BODY_LIMITS]
+
+JOINT_LIMITS = dict(BODY_LIMITS)
+
+CHAINS = {'Body': BODY_JOINTS,
+          'JointActuators': BODY_JOINTS,
+          'Joints': BODY_JOINTS,
+          'Head': BODY_JOINTS[0:2],
+          'LArm': BODY_JOINTS[2:8],
+          'LLeg': BODY_JOINTS[8:14],
+          'RLeg': BODY_JOINTS[14:20],
+          'RArm': BODY_JOINTS[20:26]}
+
+
+def symmetric_posture(head, arm, leg, hand):
+    '''
+    Build a posture from the angles in degrees of the head, left arm & left leg
+    (without the hand), the right side mirrors the left
+    '''
+    angles = dict(zip(CHAINS['Head'], head))
+    for side in ('L', 'R'):
+        sign = 1 if side == 'L' else -1
+        for (name, value) in zip(['ShoulderPitch', 'ShoulderRoll', 'ElbowYaw', 'ElbowRoll', 'WristYaw'], arm):
+            angles[side + name] = value if name.endswith('Pitch') else value * sign
+        for (name, value) in zip(['HipYawPitch', 'HipRoll', 'HipPitch', 'KneePitch', 'AnklePitch', 'AnkleRoll'], leg):
+            angles[side + name] = value if name.endswith('Pitch') else value * sign
+    radians = dict((n, math.radians(v)) for (n, v) in angles.iteritems())
+    radians['LHand'] = radians['RHand'] = hand
+    return radians
+
+
+'''
+Approximate joint angles of the standard postures
+'''
+POSTURES = {'StandZero': symmetric_posture([0, 0], [0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0], 0.0),
+            'StandInit': symmetric_posture([0, 0], [84, 8, -70, -23, 6], [0, 0, -25, 40, -20, 0], 0.3),
+            'Stand': symmetric_posture([0, 0], [84, 8, -70, -23, 6], [0, 0, -9, 12, -5, 0], 0.3),
+            'Crouch': symmetric_posture([0, 0], [85, 5, -80, -50, 5], [0, 0, -50, 120, -68, 0], 0.3),
+            'Sit': symmetric_posture([0, 0], [50, 10, -80, -60, 5], [-10, 0, -85, 50, 0, 0], 0.3),
+            'SitRelax': symmetric_posture([0, 0], [60, 15, -60, -30, 5], [-30, 5, -60, 70, 0, 0], 0.3),
+            'LyingBelly': symmetric_posture([0, 0], [90, 0, 0, -5, 0], [0, 0, 0, 0, 0, 0], 0.3),
+            'LyingBack': symmetric_posture([0, 0], [90, 0, 0, -5, 0], [0, 0, 0, 0, 0, 0], 0.3)}
+
+BODY_ID_KEY = "Device/DeviceList/ChestBoard/BodyId"
+
+SENSOR_KEY_PREFIX = "Device/SubDeviceList/"
+
+DEFAULT_BODY_ID = "OfflineNao"
+
+# seconds taken to say each word
+SPEECH_WORD_TIME = 0.35
+
+
+class Clock(object):
+    '''
+    Simulated time in seconds since the backend started, running speed times
+    faster than real time
+    '''
+    def __init__(self, speed=1.0):
+        super(Clock, self).__init__()
+        self.speed = float(speed)
+        self.start = time.time()
+
+    def now(self):
+        return (time.time() - self.start) * self.speed
+
+    def sleep(self, seconds, event=None):
+        '''
+        Wait for seconds of simulated time, returns True early if event is set
+        '''
+        real_seconds = max(0.0, seconds) / self.speed
+        if event is None:
+            time.sleep(real_seconds)
+            return False
+        return event.wait(real_seconds)
+
+
+class OfflineTask(object):
+    def __init__(self, taskId):
+        super(OfflineTask, self).__init__()
+        self.taskId = taskId
+        self.done = threading.Event()
+        self.stopped = threading.Event()
+        self.on_stop = []
+        self.result = None
+        self.error = None
+
+
+class OfflineProxy(object):
+    '''
+    Behaves like ALProxy: public methods of the module are called after the
+    backend latency, post runs them in a task & wait, stop and isRunning
+    manage the tasks
+    '''
+    def __init__(self, backend, name):
+        super(OfflineProxy, self).__init__()
+        self.backend = backend
+        self.name = name
+        self.module = backend.modules[name]
+        self.post = OfflinePostProxy(self)
+
+    def __getattr__(self, method):
+        if method.startswith('_') or not hasattr(self.module, method):
+            raise AttributeError("{} has no method {}".format(self.name, method))
+        def call(*args):
+            return self.backend.call(self.module, method, args)
+        return call
+
+    def wait(self, taskId, timeoutPeriod):
+        return self.backend.wait_task(taskId, timeoutPeriod)
+
+    def stop(self, taskId):
+        self.backend.stop_task(taskId)
+
+    def isRunning(self, taskId):
+        return self.backend.is_running(taskId)
+
+
+class OfflinePostProxy(object):
+    def __init__(self, proxy):
+        super(OfflinePostProxy, self).__init__()
+        self.proxy = proxy
+
+    def __getattr__(self, method):
+        # check the method exists before returning a task for it
+        getattr(self.proxy, method)
+        def post(*args):
+            return self.proxy.backend.post(self.proxy.module, method, args)
+        return post
+
+
+class OfflineMotion(object):
+    '''
+    ALMotion stand-in. Each joint follows a list of (time, angle) keys, new
+    commands replace the keys from the current angle onwards.
+    '''
+    def __init__(self, backend):
+        super(OfflineMotion, self).__init__()
+        self.backend = backend
+        self.lock = threading.RLock()
+        self.keys = dict((n, [(0.0, 0.0)]) for n in BODY_JOINTS)
+        self.stiffnesses = dict((n, 0.0) for n in BODY_JOINTS)
+
+    ###################################
+    # integration
+    ###################################
+    def _names(self, names):
+        if isinstance(names, basestring):
+            names = [names]
+        joints = []
+        for name in names:
+            if name in CHAINS:
+                joints.extend(CHAINS[name])
+            elif name in JOINT_LIMITS:
+                joints.append(name)
+            else:
+                raise RuntimeError("ALMotion: unknown joint or chain {}".format(name))
+        return joints
+
+    def _per_joint(self, values, count):
+        '''
+        Normalise the forms NAOqi accepts for angles & times to one list per joint
+        '''
+        if not isinstance(values, (list, tuple)):
+            values = [[values]]
+        elif len(values) and not isinstance(values[0], (list, tuple)):
+            values = [list(values)] if count == 1 else [[v] for v in values]
+        else:
+            values = [list(v) for v in values]
+        if len(values) == 1 and count > 1:
+            values = values * count
+        if len(values) != count:
+            raise RuntimeError("ALMotion: expected values for {} joints, got {}".format(count, len(values)))
+        return values
+
+    def _clamp(self, name, angle):
+        limits = JOINT_LIMITS[name]
+        return min(max(angle, limits[0]), limits[1])
+
+    def _angle(self, name, t):
+        keys = self.keys[name]
+        if t <= keys[0][0]:
+            return keys[0][1]
+        for (k0, k1) in zip(keys, keys[1:]):
+            if t < k1[0]:
+                return k0[1] + (k1[1] - k0[1]) * (t - k0[0]) / (k1[0] - k0[0])
+        return keys[-1][1]
+
+    def _move(self, joints, angle_lists, time_lists):
+        '''
+        Start moving each joint through its keys, times relative to now.
+        Returns the time the last joint arrives.
+        '''
+        now = self.backend.clock.now()
+        end = now
+        with self.lock:
+            for (name, angles, times) in zip(joints, angle_lists, time_lists):
+                keys = [(now, self._angle(name, now))]
+                for (a, t) in zip(angles, times):
+                    if t > 0 and now + t > keys[-1][0]:
+                        keys.append((now + t, self._clamp(name, a)))
+                self.keys[name] = keys
+                end = max(end, keys[-1][0])
+        self.backend.on_stop(lambda: self._hold(joints))
+        return end
+
+    def _hold(self, joints):
+        now = self.backend.clock.now()
+        with self.lock:
+            for name in joints:
+                self.keys[name] = [(now, self._angle(name, now))]
+
+    def _set_posture(self, angles):
+        with self.lock:
+            for (name, angle) in angles.iteritems():
+                self.keys[name] = [(0.0, self._clamp(name, angle))]
+
+    def _speed_times(self, joints, targets, fraction):
+        now = self.backend.clock.now()
+        fraction = min(max(fraction, 0.01), 1.0)
+        return [[abs(target - self._angle(name, now)) / (JOINT_LIMITS[name][2] * fraction) or 0.01]
+                for (name, [target]) in zip(joints, targets)]
+
+    def _end_time(self):
+        with self.lock:
+            return max(keys[-1][0] for keys in self.keys.itervalues())
+
+    ###################################
+    # ALMotion API
+    ###################################
+    def getJointNames(self, name):
+        return self._names(name)
+
+    def getBodyNames(self, name):
+        return self._names(name)
+
+    def getLimits(self, name):
+        return [list(JOINT_LIMITS[n]) for n in self._names(name)]
+
+    def getAngles(self, names, useSensors):
+        now = self.backend.clock.now()
+        with self.lock:
+            return [self._angle(n, now) for n in self._names(names)]
+
+    def angleInterpolation(self, names, angleLists, timeLists, isAbsolute):
+        joints = self._names(names)
+        angle_lists = self._per_joint(angleLists, len(joints))
+        time_lists = self._per_joint(timeLists, len(joints))
+        if not isAbsolute:
+            now = self.backend.clock.now()
+            angle_lists = [[self._angle(n, now) + a for a in angles] for (n, angles) in zip(joints, angle_lists)]
+        self.backend.wait_until(self._move(joints, angle_lists, time_lists))
+
+    def angleInterpolationWithSpeed(self, names, targetAngles, maxSpeedFraction):
+        joints = self._names(names)
+        targets = self._per_joint(targetAngles, len(joints))
+        targets = [[self._clamp(n, t[-1])] for (n, t) in zip(joints, targets)]
+        self.backend.wait_until(self._move(joints, targets, self._speed_times(joints, targets, maxSpeedFraction)))
+
+    def angleInterpolationBezier(self, jointNames, times, controlPoints):
+        joints = self._names(jointNames)
+        time_lists = self._per_joint(times, len(joints))
+        # the bezier handles are ignored, joints move linearly between the control points
+        angle_lists = [[p[0] if isinstance(p, (list, tuple)) else p for p in points]
+                       for points in self._per_joint(controlPoints, len(joints))]
+        self.backend.wait_until(self._move(joints, angle_lists, time_lists))
+
+    def setAngles(self, names, angles, fractionMaxSpeed):
+        joints = self._names(names)
+        targets = [[self._clamp(n, t[-1])] for (n, t) in zip(joints, self._per_joint(angles, len(joints)))]
+        self._move(joints, targets, self._speed_times(joints, targets, fractionMaxSpeed))
+
+    def changeAngles(self, names, changes, fractionMaxSpeed):
+        joints = self._names(names)
+        now = self.backend.clock.now()
+        targets = [[self._angle(n, now) + c[-1]] for (n, c) in zip(joints, self._per_joint(changes, len(joints)))]
+        self.setAngles(joints, [t[0] for t in targets], fractionMaxSpeed)
+
+    def _stiffness_state(self):
+        # as reported by BodyStiffnessChanged, 0 no joint stiff, 1 some & 2 all
+        stiff = [s > 0.0 for s in self.stiffnesses.values()]
+        return 2 if all(stiff) else (1 if any(stiff) else 0)
+
+    def _set_stiffnesses(self, joints, stiffness_lists):
+        with self.lock:
+            before = self._stiffness_state()
+            for (name, stiffnesses) in zip(joints, stiffness_lists):
+                self.stiffnesses[name] = min(max(float(stiffnesses[-1]), 0.0), 1.0)
+            after = self._stiffness_state()
+        if after != before:
+            self.backend.raise_event("BodyStiffnessChanged", after)
+
+    def stiffnessInterpolation(self, names, stiffnessLists, timeLists):
+        joints = self._names(names)
+        time_lists = self._per_joint(timeLists, len(joints))
+        self._set_stiffnesses(joints, self._per_joint(stiffnessLists, len(joints)))
+        self.backend.wait_until(self.backend.clock.now() + max(times[-1] for times in time_lists))
+
+    def setStiffnesses(self, names, stiffnesses):
+        joints = self._names(names)
+        self._set_stiffnesses(joints, self._per_joint(stiffnesses, len(joints)))
+
+    def getStiffnesses(self, names):
+        with self.lock:
+            return [self.stiffnesses[n] for n in self._names(names)]
+
+    def wakeUp(self):
+        self.setStiffnesses('Body', 1.0)
+        self.backend.modules['ALRobotPosture'].goToPosture('StandInit', 0.5)
+
+    def rest(self):
+        self.backend.modules['ALRobotPosture'].goToPosture('Crouch', 0.5)
+        self.setStiffnesses('Body', 0.0)
+
+    def moveIsActive(self):
+        return self._end_time() > self.backend.clock.now()
+
+    def waitUntilMoveIsFinished(self):
+        self.backend.wait_until(self._end_time())
+
+    def stopMove(self):
+        self._hold(BODY_JOINTS)
+
+    def killAll(self):
+        self._hold(BODY_JOINTS)
+
+    # whole body balance is not simulated
+    def wbEnable(self, isEnabled):
+        pass
+
+    def wbEnableBalanceConstraint(self, isEnabled, supportLeg):
+        pass
+
+    def wbFootState(self, stateName, supportLeg):
+        pass
+
+    def wbGoToBalance(self, supportLeg, duration):
+        self.backend.wait_until(self.backend.clock.now() + duration)
+
+    def setFallManagerEnabled(self, value):
+        pass
+
+
+class OfflineMemory(object):
+    '''
+    ALMemory stand-in, joint position sensor keys read the simulated angles
+    '''
+    def __init__(self, backend):
+        super(OfflineMemory, self).__init__()
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.data = {BODY_ID_KEY: DEFAULT_BODY_ID}
+        self.subscribers = {}
+
+    def getData(self, key):
+        if key.startswith(SENSOR_KEY_PREFIX):
+            name = key[len(SENSOR_KEY_PREFIX):].split('/', 1)[0]
+            if name in JOINT_LIMITS:
+                return self.backend.modules['ALMotion'].getAngles(name, True)[0]
+        with self.lock:
+            if not key in self.data:
+                raise RuntimeError("ALMemory: no data for key {}".format(key))
+            return self.data[key]
+
+    def getListData(self, keys):
+        return [self.getData(k) for k in keys]
+
+    def insertData(self, key, value):
+        with self.lock:
+            self.data[key] = value
+
+    def raiseEvent(self, name, value):
+        self.insertData(name, value)
+        self.backend.notify(name, value)
+
+    def subscribeToEvent(self, name, module, callback):
+        # remote modules cannot be called back, use OfflineBackend.subscribeToEvent
+        with self.lock:
+            self.subscribers.setdefault(name, set()).add(module)
+
+    def unsubscribeToEvent(self, name, module):
+        with self.lock:
+            self.subscribers.get(name, set()).discard(module)
+
+    def getDataListName(self):
+        with self.lock:
+            return self.data.keys()
+
+
+class OfflineTextToSpeech(object):
+    def __init__(self, backend):
+        super(OfflineTextToSpeech, self).__init__()
+        self.backend = backend
+        self.language = "English"
+        self.volume = 1.0
+        self.spoken = []
+
+    def say(self, text):
+        self.spoken.append(text)
+        self.backend.wait_until(self.backend.clock.now() + SPEECH_WORD_TIME * len(str(text).split()))
+
+    def stopAll(self):
+        pass
+
+    def getLanguage(self):
+        return self.language
+
+    def setLanguage(self, language):
+        self.language = language
+
+    def getAvailableLanguages(self):
+        return ["English", "French"]
+
+    def getVolume(self):
+        return self.volume
+
+    def setVolume(self, volume):
+        self.volume = volume
+
+
+class OfflineRobotPosture(object):
+    def __init__(self, backend, posture="Crouch"):
+        super(OfflineRobotPosture, self).__init__()
+        self.backend = backend
+        self.posture = posture
+
+    def goToPosture(self, postureName, maxSpeedFraction):
+        if not postureName in POSTURES:
+            return False
+        angles = POSTURES[postureName]
+        names = sorted(angles.keys())
+        self.backend.modules['ALMotion'].angleInterpolationWithSpeed(names, [angles[n] for n in names],
+                                                                     maxSpeedFraction)
+        self.posture = postureName
+        return True
+
+    def getPosture(self):
+        return self.posture
+
+    def getPostureList(self):
+        return sorted(POSTURES.keys())
+
+    def stopMove(self):
+        self.backend.modules['ALMotion'].stopMove()
+
+
+class OfflineLeds(object):
+    def __init__(self, backend):
+        super(OfflineLeds, self).__init__()
+        self.backend = backend
+        self.colours = {}
+        self.intensities = {}
+
+    def fadeRGB(self, name, rgb, duration):
+        self.colours[name] = rgb
+        self.backend.wait_until(self.backend.clock.now() + duration)
+
+    def fade(self, name, intensity, duration):
+        self.intensities[name] = intensity
+        self.backend.wait_until(self.backend.clock.now() + duration)
+
+    def setIntensity(self, name, intensity):
+        self.intensities[name] = intensity
+
+    def getIntensity(self, name):
+        return self.intensities.get(name, 1.0)
+
+    def on(self, name):
+        self.intensities[name] = 1.0
+
+    def off(self, name):
+        self.intensities[name] = 0.0
+
+    def rasta(self, duration):
+        self.backend.wait_until(self.backend.clock.now() + duration)
+
+
+class OfflineSpeechRecognition(object):
+    '''
+    ALSpeechRecognition stand-in, use OfflineBackend.recognise() to simulate
+    a word being heard
+    '''
+    def __init__(self, backend):
+        super(OfflineSpeechRecognition, self).__init__()
+        self.backend = backend
+        self.language = "English"
+        self.vocabulary = []
+        self.word_spotting = False
+
+    def setWordListAsVocabulary(self, vocabulary, enableWordSpotting=False):
+        self.vocabulary = list(vocabulary)
+        self.word_spotting = enableWordSpotting
+
+    def setVocabulary(self, vocabulary, enableWordSpotting):
+        self.setWordListAsVocabulary(vocabulary, enableWordSpotting)
+
+    def getLanguage(self):
+        return self.language
+
+    def setLanguage(self, language):
+        self.language = language
+
+    def setAudioExpression(self, enabled):
+        pass
+
+    def setVisualExpression(self, enabled):
+        pass
+
+    def subscribe(self, name):
+        pass
+
+    def unsubscribe(self, name):
+        pass
+
+    def pause(self, paused):
+        pass
+
+
+class OfflineBackend(object):
+    '''
+    Serves proxies for the offline modules. Every call waits latency seconds
+    plus a random amount up to jitter seconds, as a round trip to a robot
+    would. Simulated time runs speed times faster than real time so
+    benchmarks need not wait for the robot to move.
+    '''
+    def __init__(self, latency=0.0, jitter=0.0, speed=1.0, posture="Crouch", seed=None):
+        super(OfflineBackend, self).__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.clock = Clock(speed)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.tasks = {}
+        self.next_task_id = 1
+        self.callbacks = {}
+        self.modules = {'ALMotion': OfflineMotion(self),
+                        'ALMemory': OfflineMemory(self),
+                        'ALTextToSpeech': OfflineTextToSpeech(self),
+                        'ALRobotPosture': OfflineRobotPosture(self, posture),
+                        'ALLeds': OfflineLeds(self),
+                        'ALSpeechRecognition': OfflineSpeechRecognition(self)}
+        if posture in POSTURES:
+            self.modules['ALMotion']._set_posture(POSTURES[posture])
+
+    def create_proxy(self, longName):
+        if not longName in self.modules:
+            raise RuntimeError("Module {} is not available offline".format(longName))
+        return OfflineProxy(self, longName)
+
+    ###################################
+    # calls & tasks
+    ###################################
+    def delay(self):
+        seconds = self.latency
+        if self.jitter:
+            seconds += self.random.uniform(0, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def call(self, module, method, args):
+        self.delay()
+        return getattr(module, method)(*args)
+
+    def post(self, module, method, args):
+        self.delay()
+        with self.lock:
+            task = OfflineTask(self.next_task_id)
+            self.next_task_id += 1
+            self.tasks[task.taskId] = task
+
+        def run():
+            self.local.task = task
+            try:
+                task.result = getattr(module, method)(*args)
+            except Exception as e:
+                task.error = e
+            finally:
+                task.done.set()
+                with self.lock:
+                    self.tasks.pop(task.taskId, None)
+
+        thread = threading.Thread(target=run, name="offline-{}-{}".format(method, task.taskId))
+        thread.daemon = True
+        thread.start()
+        return task.taskId
+
+    def current_task(self):
+        return getattr(self.local, 'task', None)
+
+    def on_stop(self, function):
+        # called by modules for work to undo if the task running them is stopped
+        task = self.current_task()
+        if task:
+            task.on_stop.append(function)
+
+    def wait_until(self, end):
+        '''
+        Block until simulated time end, returning early if the task calling
+        this is stopped
+        '''
+        task = self.current_task()
+        self.clock.sleep(end - self.clock.now(), task.stopped if task else None)
+
+    def wait_task(self, taskId, timeoutPeriod):
+        with self.lock:
+            task = self.tasks.get(taskId)
+        if task is None:
+            return True
+        # as with ALProxy.wait the timeout is in ms & 0 waits for ever
+        task.done.wait(timeoutPeriod / 1000.0 if timeoutPeriod else None)
+        return task.done.is_set()
+
+    def stop_task(self, taskId):
+        with self.lock:
+            task = self.tasks.get(taskId)
+        if task and not task.stopped.is_set():
+            task.stopped.set()
+            for function in task.on_stop:
+                function()
+
+    def is_running(self, taskId):
+        with self.lock:
+            return taskId in self.tasks
+
+    def shutdown(self):
+        with self.lock:
+            taskIds = self.tasks.keys()
+        for taskId in taskIds:
+            self.stop_task(taskId)
+
+    ###################################
+    # events, same interface as naoutil.memory
+    ###################################
+    def subscribeToEvent(self, dataName, callback):
+        with self.lock:
+            self.callbacks[dataName] = callback
+
+    def unsubscribeToEvent(self, dataName):
+        with self.lock:
+            self.callbacks.pop(dataName, None)
+
+    def notify(self, name, value, message=''):
+        with self.lock:
+            callback = self.callbacks.get(name)
+        if callback:
+            callback(name, value, message)
+
+    def raise_event(self, name, value):
+        self.modules['ALMemory'].raiseEvent(name, value)
+
+    def recognise(self, word, confidence=1.0):
+        self.raise_event("WordRecognized", [word, confidence])
@@ -0,0 +1,300 @@
+'''
+Created on 18 Oct 2026
+
+@author: dsnowdon
+
+Record the proxy calls of a session to disk and serve them back later, or
+write them in the Chrome trace event format to be viewed on a timeline.
+
+TraceRecorder is passed as the recorder of a NaoEnvironment (see
+make_environment()) and writes one JSON object per call to a gzip file.
+ReplayBackend reads such a file and is passed as the backend of a
+NaoEnvironment: each call is answered with the result recorded for the same
+proxy, method & arguments, in the order they were recorded, without waiting
+for anything. A session captured once with a robot can then be rerun as
+often as needed without one.
+
+ChromeTraceRecorder is used the same way as TraceRecorder but writes a
+Chrome trace event file (chrome://tracing, Perfetto) in which each call is a
+begin & end event on the thread that made it, posted tasks are async events
+running until a wait, stop or isRunning call sees them finish, and code can
+add spans of its own (fluentnao marks each go()).
+'''
+import contextlib
+import gzip
+import json
+import os
+import threading
+import time
+
+'''
+Fields of each call in a trace
+'''
+PROXY = 'proxy'
+METHOD = 'method'
+POST = 'post'
+ARGS = 'args'
+RESULT = 'result'
+ERROR = 'error'
+START = 'start'
+DURATION = 'duration'
+THREAD = 'thread'
+
+
+class ReplayError(Exception):
+    pass
+
+
+def to_json(value):
+    '''
+    Convert NAOqi values to the JSON equivalent, so values compare the same
+    before & after being written
+    '''
+    return json.loads(json.dumps(value, default=repr))
+
+
+def args_key(args):
+    return json.dumps(args, sort_keys=True)
+
+
+class TraceRecorder(object):
+    '''
+    Write calls to a gzip file of JSON lines, start times are seconds since
+    the recorder was created
+    '''
+    def __init__(self, path):
+        super(TraceRecorder, self).__init__()
+        self.path = path
+        self.lock = threading.Lock()
+        self.start = time.time()
+        self.count = 0
+        self.out = gzip.open(path, 'wb')
+
+    def record(self, proxy, method, post, args, result, error, start, duration, thread):
+        call = {PROXY: proxy, METHOD: method, POST: post, ARGS: list(args),
+                START: round(start - self.start, 6), DURATION: round(duration, 6), THREAD: thread}
+        if error is None:
+            call[RESULT] = result
+        else:
+            call[ERROR] = str(error)
+        line = json.dumps(call, default=repr, separators=(',', ':'))
+        with self.lock:
+            if self.out:
+                self.out.write(line)
+                self.out.write('\n')
+                self.count += 1
+
+    def close(self):
+        with self.lock:
+            if self.out:
+                self.out.close()
+                self.out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# events held in memory before being written to a Chrome trace
+DEFAULT_BUFFER_EVENTS = 1000
+
+# longest argument summary written for each call
+MAX_ARGS_LENGTH = 200
+
+
+class ChromeTraceRecorder(object):
+    '''
+    Stream calls and spans to a Chrome trace event JSON file, at most
+    buffer_events events are held before being written. If include_args is
+    true a summary of the arguments of each call is included.
+    '''
+    def __init__(self, path, buffer_events=DEFAULT_BUFFER_EVENTS, include_args=True):
+        super(ChromeTraceRecorder, self).__init__()
+        self.path = path
+        self.buffer_events = buffer_events
+        self.include_args = include_args
+        self.lock = threading.Lock()
+        self.start = time.time()
+        self.pid = os.getpid()
+        self.buffer = []
+        self.count = 0
+        # thread name -> tid & (proxy, task id) -> event name of tasks not yet finished
+        self.threads = {}
+        self.tasks = {}
+        self.out = open(path, 'w')
+        self.out.write('[')
+
+    def timestamp(self, t):
+        # microseconds since the recorder started
+        return int(round((t - self.start) * 1000000))
+
+    def tid(self, thread):
+        if not thread in self.threads:
+            self.threads[thread] = len(self.threads) + 1
+            self.buffer.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid,
+                                'tid': self.threads[thread], 'args': {'name': thread}})
+        return self.threads[thread]
+
+    def add(self, events):
+        with self.lock:
+            if not self.out:
+                return
+            for event in events:
+                event['pid'] = self.pid
+                event['tid'] = self.tid(event.pop('thread'))
+                self.buffer.append(event)
+            if len(self.buffer) >= self.buffer_events:
+                self.flush_buffer()
+
+    def flush_buffer(self):
+        for event in self.buffer:
+            if self.count:
+                self.out.write(',')
+            self.out.write('\n')
+            self.out.write(json.dumps(event, default=repr, separators=(',', ':')))
+            self.count += 1
+        self.buffer = []
+
+    def record(self, proxy, method, post, args, result, error, start, duration, thread):
+        name = "{}.{}{}".format(proxy, "post." if post else "", method)
+        begin = {'name': name, 'cat': 'rpc', 'ph': 'B', 'ts': self.timestamp(start), 'thread': thread}
+        end = {'name': name, 'cat': 'rpc', 'ph': 'E', 'ts': self.timestamp(start + duration), 'thread': thread}
+        if self.include_args:
+            begin['args'] = {'args': repr(args)[:MAX_ARGS_LENGTH]}
+        if error is not None:
+            end['args'] = {'error': str(error)}
+        events = [begin, end]
+
+        # posted tasks run from the post until they are seen to have finished
+        if post and error is None:
+            task_name = "{}.{}".format(proxy, method)
+            with self.lock:
+                self.tasks[(proxy, result)] = task_name
+            events.append({'name': task_name, 'cat': 'task', 'ph': 'b', 'id': "{}:{}".format(proxy, result),
+                           'ts': self.timestamp(start + duration), 'thread': thread})
+        elif method in ('wait', 'stop', 'isRunning') and args and error is None:
+            finished = ((method == 'wait' and (result or (len(args) > 1 and args[1] == 0)))
+                        or method == 'stop' or (method == 'isRunning' and not result))
+            with self.lock:
+                task_name = self.tasks.pop((proxy, args[0]), None) if finished else None
+            if task_name:
+                events.append({'name': task_name, 'cat': 'task', 'ph': 'e', 'id': "{}:{}".format(proxy, args[0]),
+                               'ts': self.timestamp(start + duration), 'thread': thread})
+        self.add(events)
+
+    @contextlib.contextmanager
+    def span(self, name, category='fluent'):
+        '''
+        Add the body of a with statement to the trace as a span of its own
+        '''
+        thread = threading.current_thread().name
+        self.add([{'name': name, 'cat': category, 'ph': 'B', 'ts': self.timestamp(time.time()), 'thread': thread}])
+        try:
+            yield
+        finally:
+            self.add([{'name': name, 'cat': category, 'ph': 'E', 'ts': self.timestamp(time.time()),
+                       'thread': thread}])
+
+    def close(self):
+        with self.lock:
+            if self.out:
+                self.flush_buffer()
+                self.out.write('\n]\n')
+                self.out.close()
+                self.out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_trace(path):
+    '''
+    Return the list of calls in a trace file
+    '''
+    f = gzip.open(path, 'rb')
+    try:
+        return [json.loads(line) for line in f if line.strip()]
+    finally:
+        f.close()
+
+
+class ReplayProxy(object):
+    def __init__(self, backend, name, is_post=False):
+        super(ReplayProxy, self).__init__()
+        self.backend = backend
+        self.name = name
+        self.is_post = is_post
+
+    def __getattr__(self, method):
+        if method == 'post' and not self.is_post:
+            return ReplayProxy(self.backend, self.name, True)
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def call(*args):
+            return self.backend.call(self.name, method, self.is_post, args)
+        return call
+
+
+class ReplayBackend(object):
+    '''
+    Answer proxy calls from a trace. Calls are matched on proxy, method and
+    arguments and each match returns the next recorded result, the last one
+    being repeated once they run out. If no call had the same arguments the
+    results of the method with any arguments are used instead, unless strict
+    is true when ReplayError is raised as it is for methods never recorded.
+    Recorded exceptions are raised as RuntimeError, as ALProxy does.
+    '''
+    def __init__(self, path, strict=False):
+        super(ReplayBackend, self).__init__()
+        self.path = path
+        self.strict = strict
+        self.lock = threading.Lock()
+        self.replayed = 0
+        # (proxy, method, post, args) & (proxy, method, post) -> [calls, index of next call]
+        self.exact = {}
+        self.any_args = {}
+        for call in read_trace(path):
+            method_key = (call[PROXY], call[METHOD], call[POST])
+            self.exact.setdefault(method_key + (args_key(call[ARGS]),), [[], 0])[0].append(call)
+            self.any_args.setdefault(method_key, [[], 0])[0].append(call)
+
+    def create_proxy(self, longName):
+        return ReplayProxy(self, longName)
+
+    def next_call(self, calls):
+        (recorded, index) = calls
+        calls[1] = min(index + 1, len(recorded) - 1)
+        return recorded[index]
+
+    def call(self, proxy, method, post, args):
+        method_key = (proxy, method, post)
+        with self.lock:
+            calls = self.exact.get(method_key + (args_key(to_json(list(args))),))
+            if calls is None and not self.strict:
+                calls = self.any_args.get(method_key)
+            if calls is None:
+                raise ReplayError("No recorded call of {}.{}{} with arguments {}"
+                                  .format(proxy, "post." if post else "", method, args))
+            call = self.next_call(calls)
+            self.replayed += 1
+        if ERROR in call:
+            raise RuntimeError(call[ERROR])
+        return call[RESULT]
+
+    ###################################
+    # same interface as OfflineBackend
+    ###################################
+    def subscribeToEvent(self, dataName, callback):
+        pass
+
+    def unsubscribeToEvent(self, dataName):
+        pass
+
+    def shutdown(self):
+        pass
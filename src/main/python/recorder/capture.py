@@ -0,0 +1,177 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Continuous, fixed-rate capture of joint angles into a preallocated ring buffer
+so that whole performances can be recorded, not just hand-picked keyframes.
+'''
+
+import threading
+import time
+import logging
+
+import numpy
+
+DEFAULT_CAPTURE_RATE = 50.0
+
+# ten minutes at the default rate
+DEFAULT_CAPTURE_CAPACITY = int(DEFAULT_CAPTURE_RATE * 60 * 10)
+
+
+class FrameBuffer(object):
+    """
+    Fixed size ring buffer of timestamped joint frames. All storage is
+    allocated up front so memory use does not grow however long we record for,
+    once the buffer is full the oldest frames are overwritten.
+    """
+
+    def __init__(self, capacity, width):
+        super(FrameBuffer, self).__init__()
+        self.capacity = capacity
+        self.width = width
+        self.times = numpy.zeros(capacity, dtype=numpy.float64)
+        self.frames = numpy.zeros((capacity, width), dtype=numpy.float64)
+        self.lock = threading.Lock()
+        # total number of frames ever written, the write position is derived from this
+        self.written = 0
+        # value of written when drain() was last called
+        self.drained = 0
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def append(self, timestamp, angles):
+        with self.lock:
+            pos = self.written % self.capacity
+            self.times[pos] = timestamp
+            self.frames[pos] = angles
+            self.written += 1
+
+    def overwritten(self):
+        """
+        Return the number of frames that were overwritten before being drained
+        """
+        with self.lock:
+            return max(0, self.written - self.drained - self.capacity)
+
+    def clear(self):
+        with self.lock:
+            self.written = 0
+            self.drained = 0
+
+    def snapshot(self):
+        """
+        Return copies of (times, frames) for everything held in the buffer
+        in chronological order.
+        """
+        with self.lock:
+            return self._copy_range(max(0, self.written - self.capacity), self.written)
+
+    def drain(self):
+        """
+        Return copies of (times, frames) for all frames written since the last
+        call to drain(). Consumers that persist frames should call this at least
+        once per buffer capacity to avoid losing data.
+        """
+        with self.lock:
+            start = max(self.drained, self.written - self.capacity)
+            result = self._copy_range(start, self.written)
+            self.drained = self.written
+            return result
+
+    def _copy_range(self, start, end):
+        # start and end are absolute frame counts, callers must hold the lock
+        count = end - start
+        first = start % self.capacity
+        if first + count <= self.capacity:
+            return (self.times[first:first + count].copy(),
+                    self.frames[first:first + count].copy())
+        else:
+            split = self.capacity - first
+            times = numpy.concatenate((self.times[first:], self.times[:count - split]))
+            frames = numpy.concatenate((self.frames[first:], self.frames[:count - split]))
+            return (times, frames)
+
+
+class JointCapture(object):
+    """
+    Sample the joint angles on a background thread at a fixed rate. Samples are
+    scheduled against absolute deadlines so that slow reads do not make the
+    capture drift, if a read overruns its slot we skip to the next deadline and
+    count the missed samples.
+    """
+
+    def __init__(self, motion, joint_names, rate=DEFAULT_CAPTURE_RATE,
+                 capacity=DEFAULT_CAPTURE_CAPACITY, use_sensors=True, sink=None):
+        super(JointCapture, self).__init__()
+        self.motion = motion
+        self.joint_names = joint_names
+        self.rate = float(rate)
+        self.period = 1.0 / self.rate
+        self.use_sensors = use_sensors
+        self.buffer = FrameBuffer(capacity, len(joint_names))
+        # optional object with a write(times, frames) method. If present the
+        # buffer is drained into it whenever half full so nothing is lost
+        self.sink = sink
+        self.flush_frames = max(1, capacity // 2)
+        self.missed = 0
+        self.errors = 0
+        self.logger = logging.getLogger("recorder.capture.JointCapture")
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.is_running():
+            return
+        self.buffer.clear()
+        self.missed = 0
+        self.errors = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="JointCapture")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self._flush()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _read(self):
+        # "Body" returns the angles in the same order as JOINT_NAMES
+        return self.motion.getAngles("Body", self.use_sensors)
+
+    def _flush(self):
+        if self.sink:
+            (times, frames) = self.buffer.drain()
+            if len(times):
+                self.sink.write(times, frames)
+
+    def _run(self):
+        self.logger.debug("Starting capture at {} Hz".format(self.rate))
+        next_time = time.time()
+        while not self._stop_event.is_set():
+            timestamp = time.time()
+            try:
+                self.buffer.append(timestamp, self._read())
+            except Exception as e:
+                self.errors += 1
+                self.logger.error("Failed to read joint angles: {}".format(e))
+
+            if self.sink and self.buffer.written - self.buffer.drained >= self.flush_frames:
+                self._flush()
+
+            next_time += self.period
+            now = time.time()
+            if now > next_time:
+                # we overran one or more slots, don't try to catch up with a burst of reads
+                skipped = int((now - next_time) / self.period) + 1
+                self.missed += skipped
+                next_time += skipped * self.period
+            self._stop_event.wait(next_time - now)
+        self.logger.debug("Capture stopped, {} frames, {} missed".format(self.buffer.written, self.missed))
@@ -6,31 +6,28 @@ Created on 6 Jul 2013
 
 import math
 import logging
+import threading
+from cStringIO import StringIO
 
 import naoutil.naoenv as naoenv
 from naoutil.general import find_class
 from naoutil import broker
 from naoutil import memory
 import fluentnao.nao as nao
+from fluentnao.core.compiler import ScriptError
+from fluentnao.core.metadata import DEFAULT_CACHE_DIR
 
 from mathutil import FLOAT_CMP_ACCURACY, feq
+from pose import JOINT_NAMES
+from capture import JointCapture, DEFAULT_CAPTURE_RATE, DEFAULT_CAPTURE_CAPACITY
+from session import SessionWriter, ENCODING_FLOAT32
+from timing import Timings
 
 WORD_RECOGNITION_MIN_CONFIDENCE = 0.55
 
 DEFAULT_TRANSLATOR_NAME = "translators.fluentnao.core.FluentNaoTranslator"
 default_translator = None
 
-# joint names in same order as returned by ALMotion.getAngles('Body')
-JOINT_NAMES = ('HeadYaw', 'HeadPitch',
-               'LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll',
-               'LWristYaw', 'LHand',
-               'LHipYawPitch', 'LHipRoll', 'LHipPitch',
-               'LKneePitch', 'LAnklePitch', 'LAnkleRoll',
-               'RHipYawPitch', 'RHipRoll', 'RHipPitch',
-               'RKneePitch', 'RAnklePitch', 'RAnkleRoll',
-               'RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll',
-               'RWristYaw', 'RHand')
-
 JOINT_MOVE_AMOUNT = math.pi / 180.0
 
 def get_translator(name=None):
@@ -68,15 +65,29 @@ def joint_changes(oldangles, newangles, threshold=FLOAT_CMP_ACCURACY):
 
 
 class Robot(object):
-    def __init__(self, status_display=None, code_display=None):
+    def __init__(self, status_display=None, code_display=None, metadata_cache_dir=DEFAULT_CACHE_DIR):
         super(Robot, self).__init__()
         self.status_display = status_display
         self.code_display = code_display
+        # where joint metadata is saved between connections, None to not save it
+        self.metadata_cache_dir = metadata_cache_dir
         self.broker = None
         self.nao = None
         self._motors_on = False
         self.logger = logging.getLogger("recorder.core.Robot")
         self.last_keyframe_joints = None
+        self.capture = None
+        self.session_writer = None
+
+        # subscribes event handlers, the offline backend when not using a robot
+        self.events = memory
+
+        # speech & scripts running with speech recognition turned off, see pause_recognition()
+        self.recognition_lock = threading.Lock()
+        self.recognition_paused = 0
+
+        # durations of the keyframe & event handling stages, see timing_report()
+        self.timings = Timings()
 
         self.joints = { }
         for j in JOINT_NAMES:
@@ -129,11 +140,23 @@ class Robot(object):
                                "WordRecognized": self._word_recognised
                                }
 
-    def connect(self, hostname, portnumber):
-        self.broker = broker.Broker('NaoRecorder', naoIp=hostname, naoPort=portnumber)
+    def connect(self, hostname, portnumber, backend=None, recorder=None):
+        """
+        Connect to the robot at hostname:portnumber, or if backend is given
+        (see naoutil.offline & naoutil.trace) use that instead of a robot. If
+        recorder is given every proxy call is passed to it, see
+        naoutil.trace.TraceRecorder.
+        """
+        if backend:
+            self.broker = backend
+            self.events = backend
+        else:
+            self.broker = broker.Broker('NaoRecorder', naoIp=hostname, naoPort=portnumber)
+            self.events = memory
         if self.broker:
-            self.env = naoenv.make_environment(None)
-            self.nao = nao.Nao(self.env, None)
+            self.env = naoenv.make_environment(None, backend=backend, recorder=recorder)
+            self.nao = nao.Nao(self.env, None, self.metadata_cache_dir)
+            self.nao.metadata.load()
             if self.event_handlers and self.vocabulary:
                 self.env.speechRecognition.setWordListAsVocabulary(self.vocabulary.keys(), False)
             self.do_subscribe()
@@ -143,35 +166,64 @@ class Robot(object):
 
     def disconnect(self):
         if self.is_connected():
-            self.do_unsubscribe()
-            self.broker.shutdown()
+            self.stop_capture()
+            # recognition is not turned back on by speech finishing once disconnected
+            with self.recognition_lock:
+                self.do_unsubscribe()
+                self.broker.shutdown()
+                self.broker = None
+            if self.timings.names():
+                self.logger.info("Stage timings (ms):\n" + self.timing_report())
 
     def do_subscribe(self):
         if self.event_handlers:
             for (key, value) in self.event_handlers.iteritems():
-                memory.subscribeToEvent(key, value)
+                self.events.subscribeToEvent(key, self.timings.timed('event.' + key, value))
 
     def do_unsubscribe(self):
         if self.event_handlers:
             for key in self.event_handlers.keys():
-                memory.unsubscribeToEvent(key)
+                self.events.unsubscribeToEvent(key)
 
     def safe_say(self, msg):
         """
         Gets NAO to say something but disables speech recognition while he says it
         """
         if self.is_connected():
-            self.disable_speech_recognition()
-            self.nao.say(msg)
-            self.enable_speech_recognition()
+            self.pause_recognition()
+            try:
+                speech = self.nao.background.say(msg)
+            except Exception:
+                self.resume_recognition()
+                raise
+            speech.add_done_callback(self.resume_recognition)
+            return speech
+
+    def pause_recognition(self):
+        """
+        Turn speech recognition off until every pause has been followed by resume_recognition()
+        """
+        with self.recognition_lock:
+            self.recognition_paused += 1
+            if self.recognition_paused == 1:
+                self.disable_speech_recognition()
+
+    def resume_recognition(self, future=None):
+        # takes the future of the speech or script as it is used as a done callback
+        with self.recognition_lock:
+            self.recognition_paused -= 1
+            if self.recognition_paused == 0 and self.is_connected():
+                self.enable_speech_recognition()
 
     def enable_speech_recognition(self):
         if "WordRecognized" in self.event_handlers:
-            memory.subscribeToEvent("WordRecognized", self.event_handlers["WordRecognized"])
+            self.events.subscribeToEvent("WordRecognized",
+                                         self.timings.timed('event.WordRecognized',
+                                                            self.event_handlers["WordRecognized"]))
 
     def disable_speech_recognition(self):
         if "WordRecognized" in self.event_handlers:
-            memory.unsubscribeToEvent("WordRecognized")
+            self.events.unsubscribeToEvent("WordRecognized")
 
     def is_connected(self):
         return self.broker
@@ -208,27 +260,171 @@ class Robot(object):
 
     def keyframe(self):
         if self.is_connected():
-            # get angles
-            angles = self.get_joint_angles()
-            #print angles
-
-            changed_joints = joint_changes(self.last_keyframe_joints, angles, JOINT_MOVE_AMOUNT)
-            #print changed_joints
-
-            # translating
-            translator = get_translator()
-            commands = translator.detect_command(angles, changed_joints)
-            command_str = translator.commands_to_text(commands, is_blocking=True, fluentnao="nao.")
-            self.last_keyframe_joints = angles.copy()
-            return command_str
+            with self.timings.span('keyframe'):
+                # get angles
+                with self.timings.span('keyframe.get_angles'):
+                    angles = self.get_joint_angles()
+                #print angles
+
+                with self.timings.span('keyframe.joint_changes'):
+                    changed_joints = joint_changes(self.last_keyframe_joints, angles, JOINT_MOVE_AMOUNT)
+                #print changed_joints
+
+                # translating
+                with self.timings.span('keyframe.get_translator'):
+                    translator = get_translator()
+                with self.timings.span('keyframe.detect_command'):
+                    commands = translator.detect_command(angles, changed_joints)
+                with self.timings.span('keyframe.commands_to_text'):
+                    command_str = translator.commands_to_text(commands, is_blocking=True, fluentnao="nao.")
+                self.last_keyframe_joints = angles.copy()
+                return command_str
         else:
             return None
 
+    def timing_report(self):
+        """
+        Return a table of the recent durations of the keyframe & event handling stages
+        """
+        return self.timings.report()
+
+    def start_capture(self, rate=DEFAULT_CAPTURE_RATE, capacity=DEFAULT_CAPTURE_CAPACITY,
+                      session_path=None, encoding=ENCODING_FLOAT32):
+        """
+        Start continuously recording all joint angles at the given rate (Hz).
+        If session_path is given every frame is also streamed to that session
+        file, otherwise only the most recent capacity frames are kept.
+        """
+        if self.is_connected():
+            self.stop_capture()
+            if session_path:
+                self.session_writer = SessionWriter(session_path, encoding)
+            self.capture = JointCapture(self.env.motion, JOINT_NAMES, rate, capacity,
+                                        sink=self.session_writer)
+            self.capture.start()
+            self.status_display.add_status('Capturing joints at {} Hz'.format(rate))
+
+    def stop_capture(self):
+        """
+        Stop continuous recording, the captured frames remain available from
+        captured_frames() until the next capture is started
+        """
+        if self.capture and self.capture.is_running():
+            self.capture.stop()
+            self.status_display.add_status('Captured {} frames'.format(len(self.capture.buffer)))
+        if self.session_writer:
+            self.session_writer.close()
+            self.status_display.add_status('Saved {} frames to {}'.format(self.session_writer.count,
+                                                                         self.session_writer.path))
+            self.session_writer = None
+
+    def captured_frames(self):
+        """
+        Return (times, frames) for the current or most recent capture, frames is
+        an (N, len(JOINT_NAMES)) array of angles in radians
+        """
+        if self.capture:
+            return self.capture.buffer.snapshot()
+        return None
+
+    def save_capture(self, path, encoding=ENCODING_FLOAT32):
+        """
+        Save the frames held by the current or most recent capture as a session file
+        """
+        captured = self.captured_frames()
+        if captured is None:
+            return False
+        with SessionWriter(path, encoding) as writer:
+            writer.write(*captured)
+        return True
+
+    def play_capture(self):
+        """
+        Play back the captured frames on the robot exactly as recorded, returns
+        a future that completes when playback has finished
+        """
+        captured = self.captured_frames()
+        if self.is_connected() and captured is not None:
+            (times, frames) = captured
+            # chunks queue behind each other so are submitted in the background
+            return self.nao.background.run(
+                lambda cancelled: self.nao.playback.frames(JOINT_NAMES, times, frames, cancelled=cancelled))
+
+    def capture_to_code(self, tolerances=None):
+        """
+        Pick keyframes from the captured frames automatically and translate
+        them into code. tolerances maps joint groups (head, arms, legs, hands)
+        to the maximum deviation in degrees allowed when dropping frames.
+        """
+        output = StringIO()
+        if self.write_capture_code(output, tolerances) is None:
+            return None
+        return output.getvalue()
+
+    def write_capture_code(self, writer, tolerances=None, leading_separator=False):
+        """
+        As capture_to_code() but write the code to writer a line at a time,
+        returns the number of lines written or None if nothing was captured
+        """
+        captured = self.captured_frames()
+        if captured is None or len(captured[0]) == 0:
+            return None
+
+        # imported here as keyframes depends on this module
+        from keyframes import extract_keyframes, keyframes_to_commands
+        from translators.fluentnao.emitter import CodeEmitter
+        from translators.fluentnao.optimizer import ScriptOptimizer
+        (times, frames) = captured
+        indices = extract_keyframes(times, frames, tolerances)
+        translator = get_translator()
+        timeline = [(times[i], commands) for (i, commands) in keyframes_to_commands(frames, indices, translator)]
+        emitter = CodeEmitter(writer, translator, leading_separator=leading_separator)
+        lines = emitter.emit_timeline(ScriptOptimizer().optimize(timeline))
+        self.status_display.add_status('Extracted {} keyframes from {} frames'.format(lines, len(times)))
+        return lines
+
+    def capture_to_motion(self, tolerances=None):
+        """
+        Pick keyframes from the captured frames and compile them into a
+        MotionProgram that replays them without generating code
+        """
+        captured = self.captured_frames()
+        if captured is None or len(captured[0]) == 0:
+            return None
+
+        from keyframes import extract_keyframes
+        from translators.fluentnao.motion import MotionTranslator
+        (times, frames) = captured
+        indices = extract_keyframes(times, frames, tolerances)
+        timeline = get_translator().translate_timeline(times[indices], frames[indices])
+        return MotionTranslator().compile_timeline(timeline, use_times=True)
+
+    def play_keyframes(self, tolerances=None):
+        """
+        Play back the keyframes of the captured frames, returns a future that
+        completes when playback has finished
+        """
+        program = self.capture_to_motion(tolerances)
+        if self.is_connected() and program:
+            return self.nao.background.run(lambda cancelled: program.play(self.nao, cancelled))
+
     def run_script(self, code):
+        """
+        Run a script in the background, returns a future that completes when
+        the robot has finished. Cancelling the future stops the script.
+        """
         if self.is_connected():
-            self.disable_speech_recognition()
-            self.nao.naoscript.run_script(code, '\n')
-            self.enable_speech_recognition()
+            # report errors now rather than part way through the script
+            try:
+                self.nao.naoscript.check_script(code, '\n')
+            except ScriptError as e:
+                self.status_display.add_status("Error in script on line {}: {}".format(e.line, e.message))
+                return None
+
+            self.pause_recognition()
+            script = self.nao.background.run_script(code, '\n')
+            script.add_done_callback(self.resume_recognition)
+            return script
 
     def _word_recognised(self, dataName, value, message):
         print "word_recognised: {}".format(value)
@@ -238,7 +434,8 @@ class Robot(object):
         if confidence > WORD_RECOGNITION_MIN_CONFIDENCE:
             self.status_display.add_status('Recognised: {}'.format(word))
             try:
-                self.vocabulary[word]()
+                with self.timings.span('word.' + word):
+                    self.vocabulary[word]()
             except AttributeError:
                 print "Could not find word {} in vocabulary".format(word)
 
@@ -284,10 +481,14 @@ class Robot(object):
     def _add_keyframe(self):
         code = self.keyframe()
         if code:
-            self.code_display.append_code(code)
+            with self.timings.span('keyframe.append_code'):
+                self.code_display.append_code(code)
 
     def _nao_exit(self):
-        self.safe_say("bye bye")
+        # the goodbye needs the broker until it has been said
+        speech = self.safe_say("bye bye")
+        if speech:
+            speech.exception()
         self.disconnect()
 
     def _hello_nao(self):
@@ -296,25 +497,25 @@ class Robot(object):
     def _left_hand_open(self):
         msg = "left hand open"
         self.status_display.add_status(msg)
-        self.nao.hands.left_open()
+        self.nao.hands.left_open().go()
         self.safe_say(msg)
 
     def _left_hand_close(self):
         msg = "left hand close"
         self.status_display.add_status(msg)
-        self.nao.hands.left_close()
+        self.nao.hands.left_close().go()
         self.safe_say(msg)
 
     def _right_hand_open(self):
         msg = "right hand open"
         self.status_display.add_status(msg)
-        self.nao.hands.right_open()
+        self.nao.hands.right_open().go()
         self.safe_say(msg)
 
     def _right_hand_close(self):
         msg = "right hand close"
         self.status_display.add_status(msg)
-        self.nao.hands.right_close()
+        self.nao.hands.right_close().go()
         self.safe_say(msg)
 
     def _left_arm_stiff(self):
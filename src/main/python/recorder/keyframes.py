@@ -0,0 +1,122 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Automatic keyframe extraction from dense recordings. We simplify the
+trajectory with Ramer-Douglas-Peucker in joint space: a frame is kept only if
+dropping it would make linear interpolation between its neighbouring
+keyframes miss the recording by more than the tolerance for some joint.
+'''
+
+import math
+
+import numpy
+
+from recorder.core import JOINT_NAMES, JOINT_MOVE_AMOUNT, get_translator
+from recorder.pose import Pose, joint_changes_array, mask_to_names
+
+JOINT_GROUPS = {'head': ('HeadYaw', 'HeadPitch'),
+                'arms': ('LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll', 'LWristYaw',
+                         'RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll', 'RWristYaw'),
+                'legs': ('LHipYawPitch', 'LHipRoll', 'LHipPitch', 'LKneePitch', 'LAnklePitch', 'LAnkleRoll',
+                         'RHipYawPitch', 'RHipRoll', 'RHipPitch', 'RKneePitch', 'RAnklePitch', 'RAnkleRoll'),
+                'hands': ('LHand', 'RHand')}
+
+# maximum deviation in degrees allowed for each joint group. Hands are not
+# angles but the translators treat them as if they were, so the same units apply
+DEFAULT_TOLERANCES = {'head': 3.0,
+                      'arms': 3.0,
+                      'legs': 2.0,
+                      'hands': 5.0}
+
+
+def joint_tolerances(tolerances=None):
+    """
+    Expand per group tolerances in degrees to a vector of per joint tolerances
+    in radians in JOINT_NAMES order. Groups missing from tolerances use the
+    defaults.
+    """
+    merged = dict(DEFAULT_TOLERANCES)
+    if tolerances:
+        for group in tolerances.keys():
+            if not group in JOINT_GROUPS:
+                raise KeyError("Unknown joint group {}".format(group))
+        merged.update(tolerances)
+
+    result = numpy.empty(len(JOINT_NAMES), dtype=numpy.float64)
+    for group, names in JOINT_GROUPS.iteritems():
+        for n in names:
+            result[JOINT_NAMES.index(n)] = math.radians(merged[group])
+    return result
+
+
+def extract_keyframes(times, frames, tolerances=None):
+    """
+    Return the indices of the frames that must be kept so that linear
+    interpolation between them stays within tolerance of the recording. The
+    first and last frames are always kept.
+    """
+    times = numpy.asarray(times, dtype=numpy.float64)
+    frames = numpy.asarray(frames, dtype=numpy.float64)
+    count = len(frames)
+    if count < 3:
+        return numpy.arange(count)
+
+    scale = 1.0 / joint_tolerances(tolerances)
+    keep = numpy.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # iterative rather than recursive so long recordings can't exhaust the stack
+    segments = [(0, count - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+
+        span = times[last] - times[first]
+        if span > 0:
+            fraction = (times[first + 1:last] - times[first]) / span
+        else:
+            fraction = numpy.linspace(0.0, 1.0, last - first + 1)[1:-1]
+        interpolated = frames[first] + fraction[:, numpy.newaxis] * (frames[last] - frames[first])
+
+        # worst joint for each frame measured in multiples of its tolerance
+        deviation = (numpy.abs(frames[first + 1:last] - interpolated) * scale).max(axis=1)
+        worst = numpy.argmax(deviation)
+        if deviation[worst] > 1.0:
+            split = first + 1 + worst
+            keep[split] = True
+            segments.append((first, split))
+            segments.append((split, last))
+
+    return numpy.flatnonzero(keep)
+
+
+def keyframes_to_commands(frames, indices, translator=None, threshold=JOINT_MOVE_AMOUNT):
+    """
+    Run the translator over the selected keyframes. Returns a list of
+    (index, commands) tuples, keyframes that produce no commands are omitted.
+    """
+    if translator is None:
+        translator = get_translator()
+
+    indices = list(indices)
+    if hasattr(translator, 'translate_timeline'):
+        keyframes = numpy.asarray(frames)[indices]
+        return translator.translate_timeline(indices, keyframes, threshold)
+
+    # each joint is compared with its angle in the last keyframe that produced commands
+    result = []
+    emitted = None
+    for i in indices:
+        pose = Pose(frames[i])
+        changed = joint_changes_array(emitted, pose.angles, threshold)
+        commands = translator.detect_command(pose, mask_to_names(changed))
+        if commands:
+            result.append((i, commands))
+        if emitted is None:
+            emitted = pose.angles.copy()
+        elif commands:
+            emitted[changed] = pose.angles[changed]
+    return result
@@ -37,6 +37,35 @@ class Fnt_SpinnerOption(SpinnerOption):
     pass
 
 
+class CodeInputWriter(object):
+    """
+    File like sink that appends text to the end of a CodeInput. Inserting at
+    the end only lays out the new lines whereas assigning to text re-renders
+    the whole editor. Each insert moves the cursor & lays out the text again
+    so fragments are buffered and a line inserted in one go once the next
+    line separator is written or on flush().
+    """
+
+    def __init__(self, codeinput):
+        super(CodeInputWriter, self).__init__()
+        self.codeinput = codeinput
+        self.pending = []
+
+    def write(self, text):
+        # a line separator starts a new line so the one buffered so far is complete
+        if '\n' in text and self.pending:
+            self.flush()
+        self.pending.append(text)
+
+    def flush(self):
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending = []
+        self.codeinput.do_cursor_movement('cursor_end', control=True)
+        self.codeinput.insert_text(text)
+
+
 class LoadDialog(Popup):
 
     def load(self, path, selection):
@@ -109,6 +138,10 @@ class NaoRecorderApp(App):
         btn_add_keyframe = Button(text='Add Keyframe')
         btn_add_keyframe.bind(on_press=self._on_add_keyframe)
 
+        # continuous capture
+        btn_capture = Button(text='Start Capture')
+        btn_capture.bind(on_press=self._on_capture)
+
         # root actions menu
         robot_actions = Spinner(
             text='Action',
@@ -118,6 +151,7 @@ class NaoRecorderApp(App):
         # add to menu
         menu.add_widget(mnu_file)
         menu.add_widget(btn_add_keyframe)
+        menu.add_widget(btn_capture)
         menu.add_widget(btn_motors_on)
         menu.add_widget(btn_motors_off)
         menu.add_widget(btn_run_script)
@@ -133,6 +167,7 @@ class NaoRecorderApp(App):
             font_name='data/fonts/DroidSansMono.ttf', font_size=12,
             text="nao.say('hi')")
         code_status.add_widget(self.codeinput)
+        self.code_writer = CodeInputWriter(self.codeinput)
 
         # status window
         self.status = TextInput(text="", readonly=True, multiline=True, size_hint=(1.0, 0.25))
@@ -159,7 +194,9 @@ class NaoRecorderApp(App):
         self.codeinput.text = code
 
     def append_code(self, code):
-        self.set_code("{}\r\n{}".format(self.get_code(), code))
+        self.code_writer.write("\r\n")
+        self.code_writer.write(code)
+        self.code_writer.flush()
 
     def add_status(self, text):
         self.status.text = self.status.text + "\n" + text
@@ -243,10 +280,23 @@ class NaoRecorderApp(App):
             code = self.codeinput.text
             self.robot.run_script(code)
 
+    def _on_capture(self, instance):
+        if not self.robot.is_connected():
+            return
+        if self.robot.capture and self.robot.capture.is_running():
+            self.robot.stop_capture()
+            instance.text = 'Start Capture'
+            self.robot.write_capture_code(self.code_writer, leading_separator=True)
+            self.code_writer.flush()
+        else:
+            self.robot.start_capture()
+            instance.text = 'Stop Capture'
+
     def _on_add_keyframe(self, dummy1=None, dummy2=None, dummy=None):
         code = self.robot.keyframe()
         if code:
-            self.append_code(code)
+            with self.robot.timings.span('keyframe.append_code'):
+                self.append_code(code)
 
 if __name__ == '__main__':
     NaoRecorderApp().run()
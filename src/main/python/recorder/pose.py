@@ -0,0 +1,156 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Array backed joint poses and vectorised versions of the helpers in
+recorder.core. A pose is a float vector of angles in JOINT_NAMES order and a
+recording is an (N, len(JOINT_NAMES)) array, so all functions here work on a
+single frame or a whole batch of frames in one call.
+'''
+
+import numpy
+
+from mathutil import FLOAT_CMP_ACCURACY
+
+# joint names in same order as returned by ALMotion.getAngles('Body')
+JOINT_NAMES = ('HeadYaw', 'HeadPitch',
+               'LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll',
+               'LWristYaw', 'LHand',
+               'LHipYawPitch', 'LHipRoll', 'LHipPitch',
+               'LKneePitch', 'LAnklePitch', 'LAnkleRoll',
+               'RHipYawPitch', 'RHipRoll', 'RHipPitch',
+               'RKneePitch', 'RAnklePitch', 'RAnkleRoll',
+               'RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll',
+               'RWristYaw', 'RHand')
+
+NUM_JOINTS = len(JOINT_NAMES)
+
+JOINT_INDEX = dict((n, i) for i, n in enumerate(JOINT_NAMES))
+
+
+def round_half_away(values):
+    """
+    Round to the nearest integer with halves rounded away from zero. This
+    matches the builtin round() used by recorder.core.joints_to_degrees whereas
+    numpy.round() rounds halves to even.
+    """
+    return numpy.copysign(numpy.floor(numpy.abs(values) + 0.5), values)
+
+
+def joints_to_degrees_array(angles, round_values=True):
+    """
+    Convert a pose or batch of poses from radians to degrees
+    """
+    degrees = numpy.degrees(numpy.asarray(angles, dtype=numpy.float64))
+    if round_values:
+        return round_half_away(degrees)
+    return degrees
+
+
+def joint_changes_array(oldangles, newangles, threshold=FLOAT_CMP_ACCURACY):
+    """
+    Return a boolean mask which is true for each joint that has changed. Either
+    argument may be a single pose or a batch of poses, if oldangles is None all
+    joints are marked changed.
+    """
+    newangles = numpy.asarray(newangles, dtype=numpy.float64)
+    if oldangles is None:
+        return numpy.ones(newangles.shape, dtype=bool)
+    return numpy.abs(newangles - numpy.asarray(oldangles, dtype=numpy.float64)) >= threshold
+
+
+def frame_changes(frames, threshold=FLOAT_CMP_ACCURACY, previous=None):
+    """
+    Return an (N, NUM_JOINTS) mask of the joints that changed in each frame of
+    a batch compared with the frame before it. The first frame is compared with
+    previous, or marked as all changed if previous is None.
+    """
+    frames = numpy.asarray(frames, dtype=numpy.float64)
+    mask = numpy.empty(frames.shape, dtype=bool)
+    if len(frames) == 0:
+        return mask
+    mask[0] = joint_changes_array(previous, frames[0], threshold)
+    mask[1:] = numpy.abs(numpy.diff(frames, axis=0)) >= threshold
+    return mask
+
+
+def mask_to_names(mask):
+    """
+    Convert a single frame change mask to the set of joint names used by
+    recorder.core.joint_changes
+    """
+    return set(JOINT_NAMES[i] for i in numpy.flatnonzero(mask))
+
+
+class Pose(object):
+    """
+    Joint angles held as a fixed order vector indexed by JOINT_NAMES. Pose
+    supports the read-only dict operations used by the translators so it can be
+    passed anywhere a joint dict is expected.
+    """
+
+    def __init__(self, angles=None):
+        super(Pose, self).__init__()
+        if angles is None:
+            self.angles = numpy.zeros(NUM_JOINTS, dtype=numpy.float64)
+        else:
+            self.angles = numpy.array(angles, dtype=numpy.float64)
+            if self.angles.shape != (NUM_JOINTS,):
+                raise ValueError("Pose needs {} angles, got shape {}".format(NUM_JOINTS, self.angles.shape))
+
+    @classmethod
+    def from_dict(cls, joints):
+        return cls([joints[n] for n in JOINT_NAMES])
+
+    def to_dict(self):
+        return dict(zip(JOINT_NAMES, self.angles.tolist()))
+
+    def degrees(self, round_values=True):
+        return Pose(joints_to_degrees_array(self.angles, round_values))
+
+    def changes(self, other, threshold=FLOAT_CMP_ACCURACY):
+        """
+        Return the set of joint names that differ between other and this pose
+        """
+        other_angles = other.angles if isinstance(other, Pose) else other
+        return mask_to_names(joint_changes_array(other_angles, self.angles, threshold))
+
+    def copy(self):
+        return Pose(self.angles)
+
+    def __getitem__(self, name):
+        return float(self.angles[JOINT_INDEX[name]])
+
+    def __setitem__(self, name, value):
+        self.angles[JOINT_INDEX[name]] = value
+
+    def __contains__(self, name):
+        return name in JOINT_INDEX
+
+    def __iter__(self):
+        return iter(JOINT_NAMES)
+
+    def __len__(self):
+        return NUM_JOINTS
+
+    def keys(self):
+        return list(JOINT_NAMES)
+
+    def values(self):
+        return self.angles.tolist()
+
+    def iteritems(self):
+        return iter(zip(JOINT_NAMES, self.angles.tolist()))
+
+    def items(self):
+        return zip(JOINT_NAMES, self.angles.tolist())
+
+    def __eq__(self, other):
+        return isinstance(other, Pose) and numpy.array_equal(self.angles, other.angles)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "Pose({})".format(self.angles.tolist())
@@ -0,0 +1,345 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Compact binary storage for recorded sessions.
+
+A session file is a fixed header, the joint names, then the data stored
+column-wise: all timestamps (float64 seconds) followed by one contiguous
+column per joint. Joint columns are either float32 radians or int16
+centi-degrees. Files are read through numpy.memmap so opening a session is
+instant whatever its size and only the frames actually sliced are read.
+
+Each session has a sparse timestamp index stored alongside it (same name with
+.idx appended) holding every INDEX_STRIDE'th timestamp. Seeking to a time is
+a binary search of the index followed by a binary search of a single block of
+timestamps, so only a handful of pages of the session are touched.
+'''
+
+import os
+import struct
+import logging
+
+import numpy
+
+from pose import JOINT_NAMES, Pose
+
+SESSION_MAGIC = 'NAOREC\x00\x00'
+SESSION_VERSION = 1
+
+ENCODING_FLOAT32 = 'float32'
+ENCODING_CENTIDEGREES = 'int16'
+
+# encoding name -> (header code, on disk dtype)
+ENCODINGS = {ENCODING_FLOAT32: (0, numpy.dtype('<f4')),
+             ENCODING_CENTIDEGREES: (1, numpy.dtype('<i2'))}
+
+# magic, version, encoding, number of joints, number of frames, length of names, data offset
+HEADER_FORMAT = '<8sHHIQII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+TIME_DTYPE = numpy.dtype('<f8')
+
+# data starts on an aligned boundary after the header & names
+DATA_ALIGNMENT = 16
+
+# number of frames copied at a time when rewriting spooled data into columns
+COPY_CHUNK_FRAMES = 65536
+
+SPOOL_SUFFIX = '.spool'
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = 'NAOIDX\x00\x00'
+INDEX_VERSION = 1
+# magic, version, stride, number of frames in the session, number of index entries
+INDEX_HEADER_FORMAT = '<8sHIQQ'
+INDEX_HEADER_SIZE = struct.calcsize(INDEX_HEADER_FORMAT)
+INDEX_STRIDE = 1024
+
+# number of frames returned at a time when iterating over a time window
+WINDOW_CHUNK_FRAMES = 4096
+
+
+class SessionFormatError(Exception):
+    pass
+
+
+def encode_angles(frames, encoding):
+    (_, dtype) = ENCODINGS[encoding]
+    if encoding == ENCODING_CENTIDEGREES:
+        return numpy.round(numpy.degrees(frames) * 100.0).astype(dtype)
+    return frames.astype(dtype)
+
+
+def decode_angles(data, encoding):
+    if encoding == ENCODING_CENTIDEGREES:
+        return numpy.radians(data.astype(numpy.float64) / 100.0)
+    return data.astype(numpy.float64)
+
+
+def write_index(path, times, stride=INDEX_STRIDE):
+    """
+    Write the sparse timestamp index for a session with the given timestamps
+    """
+    index = numpy.array(times[::stride], dtype=TIME_DTYPE)
+    with open(path + INDEX_SUFFIX, 'wb') as f:
+        f.write(struct.pack(INDEX_HEADER_FORMAT, INDEX_MAGIC, INDEX_VERSION, stride, len(times), len(index)))
+        index.tofile(f)
+    return index
+
+
+def read_index(path, count):
+    """
+    Read the sparse timestamp index for a session, returns (stride, index) or
+    None if the index is missing or does not match a session of count frames
+    """
+    try:
+        with open(path + INDEX_SUFFIX, 'rb') as f:
+            header = f.read(INDEX_HEADER_SIZE)
+            if len(header) < INDEX_HEADER_SIZE:
+                return None
+            (magic, version, stride, frames, entries) = struct.unpack(INDEX_HEADER_FORMAT, header)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION or frames != count or stride == 0:
+                return None
+            index = numpy.fromfile(f, dtype=TIME_DTYPE, count=entries)
+            if len(index) != entries:
+                return None
+            return (stride, index)
+    except IOError:
+        return None
+
+
+def _data_offset(names_length):
+    unaligned = HEADER_SIZE + names_length
+    return unaligned + (-unaligned % DATA_ALIGNMENT)
+
+
+class SessionWriter(object):
+    """
+    Write a session incrementally. Frames are appended to a row oriented spool
+    file as they arrive and rearranged into columns a chunk at a time on
+    close(), so memory use is constant however long the session is.
+    """
+
+    def __init__(self, path, encoding=ENCODING_FLOAT32, joint_names=JOINT_NAMES):
+        super(SessionWriter, self).__init__()
+        if not encoding in ENCODINGS:
+            raise ValueError("Unknown session encoding {}".format(encoding))
+        self.path = path
+        self.encoding = encoding
+        self.joint_names = tuple(joint_names)
+        self.count = 0
+        self.spool_path = path + SPOOL_SUFFIX
+        self.spool = open(self.spool_path, 'wb')
+
+    def write(self, times, frames):
+        """
+        Append frames (an (N, number of joints) array of radians) with their timestamps
+        """
+        times = numpy.asarray(times, dtype=numpy.float64)
+        frames = numpy.asarray(frames, dtype=numpy.float64)
+        if frames.shape != (len(times), len(self.joint_names)):
+            raise ValueError("Expected {} frames of {} joints, got shape {}"
+                             .format(len(times), len(self.joint_names), frames.shape))
+        rows = numpy.empty((len(times), len(self.joint_names) + 1), dtype=numpy.float64)
+        rows[:, 0] = times
+        rows[:, 1:] = frames
+        rows.tofile(self.spool)
+        self.count += len(times)
+
+    def close(self):
+        # the spool is only removed once the columns are written, if writing
+        # them fails (e.g. the disk is full) the capture can still be recovered
+        if self.spool is None:
+            return
+        self.spool.close()
+        self.spool = None
+        self._write_columns()
+        os.remove(self.spool_path)
+
+    def _write_columns(self):
+        num_joints = len(self.joint_names)
+        (code, dtype) = ENCODINGS[self.encoding]
+        names = '\n'.join(self.joint_names)
+        offset = _data_offset(len(names))
+
+        with open(self.path, 'wb') as f:
+            f.write(struct.pack(HEADER_FORMAT, SESSION_MAGIC, SESSION_VERSION, code,
+                                num_joints, self.count, len(names), offset))
+            f.write(names)
+            f.write('\x00' * (offset - HEADER_SIZE - len(names)))
+            f.truncate(offset + self.count * (TIME_DTYPE.itemsize + num_joints * dtype.itemsize))
+
+        if self.count == 0:
+            write_index(self.path, numpy.zeros(0, dtype=TIME_DTYPE))
+            return
+
+        spool = numpy.memmap(self.spool_path, dtype=numpy.float64, mode='r',
+                             shape=(self.count, num_joints + 1))
+        times = numpy.memmap(self.path, dtype=TIME_DTYPE, mode='r+',
+                             offset=offset, shape=(self.count,))
+        columns = numpy.memmap(self.path, dtype=dtype, mode='r+',
+                               offset=offset + self.count * TIME_DTYPE.itemsize,
+                               shape=(num_joints, self.count))
+        for start in xrange(0, self.count, COPY_CHUNK_FRAMES):
+            end = min(start + COPY_CHUNK_FRAMES, self.count)
+            chunk = numpy.array(spool[start:end])
+            times[start:end] = chunk[:, 0]
+            columns[:, start:end] = encode_angles(chunk[:, 1:], self.encoding).T
+        times.flush()
+        columns.flush()
+        write_index(self.path, times)
+        del spool, times, columns
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_session(path, times, frames, encoding=ENCODING_FLOAT32, joint_names=JOINT_NAMES):
+    with SessionWriter(path, encoding, joint_names) as writer:
+        writer.write(times, frames)
+
+
+class Session(object):
+    """
+    Read-only, memory mapped view of a session file. Slicing a session returns
+    an (N, number of joints) array of angles in radians, the same frame format
+    produced by recorder.capture and consumed by recorder.pose.
+    """
+
+    def __init__(self, path):
+        super(Session, self).__init__()
+        self.path = path
+        self.logger = logging.getLogger("recorder.session.Session")
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise SessionFormatError("{} is too short to be a session file".format(path))
+            (magic, version, code, num_joints, count, names_length, offset) = struct.unpack(HEADER_FORMAT, header)
+            if magic != SESSION_MAGIC:
+                raise SessionFormatError("{} is not a session file".format(path))
+            if version != SESSION_VERSION:
+                raise SessionFormatError("Unsupported session version {} in {}".format(version, path))
+            self.joint_names = tuple(f.read(names_length).split('\n'))
+
+        encodings = [e for (e, (c, _)) in ENCODINGS.iteritems() if c == code]
+        if not encodings:
+            raise SessionFormatError("Unknown encoding {} in {}".format(code, path))
+        self.encoding = encodings[0]
+        dtype = ENCODINGS[self.encoding][1]
+
+        self.count = count
+        if count:
+            self.times = numpy.memmap(path, dtype=TIME_DTYPE, mode='r', offset=offset, shape=(count,))
+            self.columns = numpy.memmap(path, dtype=dtype, mode='r',
+                                        offset=offset + count * TIME_DTYPE.itemsize,
+                                        shape=(num_joints, count))
+        else:
+            self.times = numpy.zeros(0, dtype=TIME_DTYPE)
+            self.columns = numpy.zeros((num_joints, 0), dtype=dtype)
+
+        stride_index = read_index(path, count)
+        if stride_index is None:
+            self.logger.info("Rebuilding timestamp index for {}".format(path))
+            stride_index = (INDEX_STRIDE, self._rebuild_index())
+        (self.index_stride, self.index) = stride_index
+
+    def _rebuild_index(self):
+        try:
+            return write_index(self.path, self.times)
+        except IOError:
+            # read-only location, keep the index in memory
+            return numpy.array(self.times[::INDEX_STRIDE], dtype=TIME_DTYPE)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.frames(*key.indices(self.count))
+        if key < 0:
+            key += self.count
+        return self.frames(key, key + 1)[0]
+
+    def frames(self, start=0, stop=None, step=1):
+        """
+        Return the frames in [start, stop) as angles in radians
+        """
+        if stop is None:
+            stop = self.count
+        return decode_angles(self.columns[:, start:stop:step].T, self.encoding)
+
+    def column(self, name, start=0, stop=None):
+        """
+        Return the angles of a single joint, only that joint's column is read
+        """
+        if stop is None:
+            stop = self.count
+        return decode_angles(self.columns[self.joint_names.index(name), start:stop], self.encoding)
+
+    def pose(self, index):
+        return Pose(self[index])
+
+    def start_time(self):
+        return float(self.times[0]) if self.count else 0.0
+
+    def duration(self):
+        return float(self.times[-1] - self.times[0]) if self.count else 0.0
+
+    def seek(self, t):
+        """
+        Return the index of the first frame at or after t seconds from the start
+        of the session, or len(self) if t is beyond the end.
+        """
+        if self.count == 0:
+            return 0
+        target = self.start_time() + t
+        block = numpy.searchsorted(self.index, target, side='left')
+        # index[block - 1] < target <= index[block] so the frame lies in
+        # ((block - 1) * stride, block * stride]
+        lo = max(0, (block - 1) * self.index_stride)
+        hi = min(self.count, block * self.index_stride + 1)
+        return int(lo + numpy.searchsorted(self.times[lo:hi], target, side='left'))
+
+    def window(self, t0, t1):
+        """
+        Return (start, stop) frame indices for the frames with t0 <= t < t1,
+        times being seconds from the start of the session
+        """
+        start = self.seek(t0)
+        return (start, max(start, self.seek(t1)))
+
+    def frames_between(self, t0, t1):
+        """
+        Return (times, frames) for the frames with t0 <= t < t1
+        """
+        (start, stop) = self.window(t0, t1)
+        return (numpy.array(self.times[start:stop]), self.frames(start, stop))
+
+    def iter_window(self, t0, t1, chunk_frames=WINDOW_CHUNK_FRAMES):
+        """
+        Yield (times, frames) chunks covering t0 <= t < t1 so long windows can be
+        processed in constant memory
+        """
+        (start, stop) = self.window(t0, t1)
+        for first in xrange(start, stop, chunk_frames):
+            last = min(first + chunk_frames, stop)
+            yield (numpy.array(self.times[first:last]), self.frames(first, last))
+
+    def close(self):
+        self.times = None
+        self.columns = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_session(path):
+    return Session(path)
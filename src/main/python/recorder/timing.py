@@ -0,0 +1,117 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Timing of the stages of the recorder's hot paths. Each named span keeps the
+durations of its most recent runs so percentiles reflect current conditions
+(a busy network, a slow robot) rather than the whole session.
+'''
+
+import collections
+import contextlib
+import threading
+import time
+
+import numpy
+
+# number of durations kept per span
+DEFAULT_WINDOW = 1000
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+SpanStats = collections.namedtuple('SpanStats', ['count', 'mean', 'p50', 'p95', 'p99', 'max'])
+
+
+class Timings(object):
+    """
+    Rolling durations in seconds of named spans. Safe to use from the event
+    callback threads and the UI thread at once.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        super(Timings, self).__init__()
+        self.window = window
+        self.lock = threading.Lock()
+        # name -> recent durations & total number of runs
+        self.durations = {}
+        self.counts = collections.Counter()
+
+    def add(self, name, seconds):
+        with self.lock:
+            if not name in self.durations:
+                self.durations[name] = collections.deque(maxlen=self.window)
+            self.durations[name].append(seconds)
+            self.counts[name] += 1
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """
+        Time the body of a with statement, recorded even if it raises
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, time.time() - start)
+
+    def timed(self, name, function):
+        """
+        Return function wrapped so each call is timed as span name
+        """
+        def call(*args, **kwargs):
+            with self.span(name):
+                return function(*args, **kwargs)
+        return call
+
+    def names(self):
+        with self.lock:
+            return sorted(self.durations.keys())
+
+    def recent(self, name):
+        with self.lock:
+            return list(self.durations.get(name, []))
+
+    def percentiles(self, name, percentiles=DEFAULT_PERCENTILES):
+        """
+        Return the given percentiles of the recent durations of a span, None if
+        it has not run
+        """
+        recent = self.recent(name)
+        if not recent:
+            return None
+        return [float(p) for p in numpy.percentile(recent, percentiles)]
+
+    def stats(self, name):
+        recent = self.recent(name)
+        if not recent:
+            return None
+        (p50, p95, p99) = numpy.percentile(recent, DEFAULT_PERCENTILES)
+        with self.lock:
+            count = self.counts[name]
+        return SpanStats(count, float(numpy.mean(recent)), float(p50), float(p95), float(p99), max(recent))
+
+    def summary(self):
+        """
+        Return a dict of span name -> SpanStats
+        """
+        return dict((name, self.stats(name)) for name in self.names())
+
+    def report(self):
+        """
+        Return a table of the stats of every span, times in milliseconds
+        """
+        lines = ["{:<32} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+                 "span", "count", "mean", "p50", "p95", "p99", "max")]
+        for name in self.names():
+            s = self.stats(name)
+            if s is None:
+                continue
+            lines.append("{:<32} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                         name, s.count, s.mean * 1000, s.p50 * 1000, s.p95 * 1000, s.p99 * 1000, s.max * 1000))
+        return "\n".join(lines)
+
+    def clear(self):
+        with self.lock:
+            self.durations.clear()
+            self.counts.clear()
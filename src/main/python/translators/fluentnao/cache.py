@@ -0,0 +1,79 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Bounded least recently used cache for translator results. Recorded poses
+keep coming back to a small set of configurations so remembering the
+commands generated for a rounded pose saves evaluating the rules again.
+'''
+
+import threading
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+class LRUCache(object):
+    """
+    Mapping holding at most size entries, the least recently used entries are
+    dropped when the cache overflows. Hits and misses are counted so the
+    cache can be tuned.
+
+    Each entry remembers when it was last used, eviction sorts the entries by
+    that and drops the oldest quarter at once so that lookups stay a plain
+    dict access.
+    """
+
+    def __init__(self, size=DEFAULT_CACHE_SIZE):
+        super(LRUCache, self).__init__()
+        if size < 1:
+            raise ValueError("Cache size must be at least 1, got {}".format(size))
+        self.size = size
+
+        # key -> [value, time last used]
+        self.entries = {}
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.clock += 1
+            entry[1] = self.clock
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self.lock:
+            self.clock += 1
+            self.entries[key] = [value, self.clock]
+            if len(self.entries) > self.size:
+                self._evict()
+
+    def _evict(self):
+        # keep the most recently used three quarters of the cache
+        keep = self.size - self.size // 4
+        by_age = sorted(self.entries.iteritems(), key=lambda item: item[1][1])
+        for key, _ in by_age[:len(by_age) - keep]:
+            del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
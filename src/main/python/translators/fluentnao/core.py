@@ -4,331 +4,309 @@ Created on 6 Jul 2013
 @author: davesnowdon
 '''
 
-import collections
+from cStringIO import StringIO
 
-from recorder.core import joints_to_degrees
+import numpy
+
+from recorder.core import joints_to_degrees, JOINT_MOVE_AMOUNT
+from recorder.pose import JOINT_INDEX, NUM_JOINTS, joints_to_degrees_array, joint_changes_array
+from translators.fluentnao.cache import LRUCache
+from translators.fluentnao.rules import Constraint, Transform, CommandSpec, SymmetricSpec, RuleSet, \
+    linear, in_range, less_than, greater_than, max_difference, \
+    left_command, right_command, combined_command
 
 DEFAULT_FRAME_TIME = 0
 
-Constraint = collections.namedtuple('Constraint',
-                                    ['predicate', 'parameters'])
-
-Transform = collections.namedtuple('Transform',
-                                   ['operator', 'inval', 'outval', 'parameters'])
-
-CommandSpec = collections.namedtuple('CommandSpec',
-                                     ['command', 'prefix', 'joints', 'transforms',
-                                      'constraints', 'parameters'])
-
-
-def linear(value, params):
-    return value * params[0] + params[1]
-
-
-def in_range(joints, params):
-    minval = params[0]
-    maxval = params[1]
-    names = params[2:]
-    for n in names:
-        v = joints[n]
-        if (v < minval) or (v > maxval):
-            return False
-    return True
-
-def less_than(joints, params):
-    maxval = params[0]
-    names = params[1:]
-    for n in names:
-        if joints[n] > maxval:
-            return False
-    return True
-
-def greater_than(joints, params):
-    minval = params[0]
-    names = params[1:]
-    for n in names:
-        if joints[n] <= minval:
-            return False
-    return True
-
-def max_difference(joints, params):
-    max_diff = params[0]
-    first = joints[params[1]]
-    names = params[2:]
-    for n in names:
-        if abs(joints[n] - first) > max_diff:
-            return False
-    return True
-
-
-COMMANDS = [CommandSpec('forward', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
-                         Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [-45, 45, 'LShoulderPitch']),
-                          Constraint(less_than, [46, 'LShoulderRoll']),
-                         Constraint(max_difference, [10, 'lpitch', 'rpitch']),
-                         Constraint(max_difference, [10, 'lroll', 'rroll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('out', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, -90]),
-                         Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, -90])],
-                        [Constraint(greater_than, [44, 'LShoulderRoll']),
-                         Constraint(max_difference, [10, 'lroll', 'rroll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('up', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, -90]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
-                         Transform(linear, 'RShoulderPitch', 'rpitch', [-1, -90]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [-110, -45, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll']),
-                         Constraint(max_difference, [10, 'lpitch', 'rpitch']),
-                         Constraint(max_difference, [10, 'lroll', 'rroll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('down', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 90]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
-                         Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 90]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [46, 95, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll']),
-                         Constraint(max_difference, [10, 'lpitch', 'rpitch']),
-                         Constraint(max_difference, [10, 'lroll', 'rroll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('back', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 119.5]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
-                         Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 119.5]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [96, 119.5, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll']),
-                         Constraint(max_difference, [10, 'lpitch', 'rpitch']),
-                         Constraint(max_difference, [10, 'lroll', 'rroll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('bent', 'elbows',
-                        set(['LElbowRoll', 'RElbowRoll']),
-                        [Transform(linear, 'LElbowRoll', 'lroll', [1, 89]),
-                         Transform(linear, 'RElbowRoll', 'rroll', [1, -89])],
-                        [Constraint(less_than, [-43, 'LElbowRoll']),
-                          Constraint(greater_than, [43, 'RElbowRoll'])],
-                        ['rroll']
-                        ),
-            CommandSpec('straight', 'elbows',
-                        set(['LElbowRoll', 'RElbowRoll']),
-                        [Transform(linear, 'LElbowRoll', 'lroll', [1, -0.5]),
-                         Transform(linear, 'RElbowRoll', 'rroll', [1, 0.5])],
-                        [Constraint(less_than, [43, 'LElbowRoll']),
-                          Constraint(less_than, [43, 'RElbowRoll'])],
-                        ['rroll']
-                        ),
-            CommandSpec('turn_up', 'elbows',
-                        set(['LElbowYaw', 'RElbowYaw']),
-                        [Transform(linear, 'LElbowYaw', 'lyaw', [-1, -90]),
-                         Transform(linear, 'RElbowYaw', 'ryaw', [1, -90])],
-                        [Constraint(greater_than, [45, 'RElbowYaw']),
-                          Constraint(less_than, [-45, 'LElbowYaw'])],
-                        ['ryaw']
-                        ),
-            CommandSpec('turn_in', 'elbows',
-                        set(['LElbowYaw', 'RElbowYaw']),
-                        [Transform(linear, 'LElbowYaw', 'lyaw', [-1, 0]),
-                         Transform(linear, 'RElbowYaw', 'ryaw', [1, 0])],
-                        [Constraint(in_range, [-44, 44, 'RElbowYaw']),
-                          Constraint(in_range, [-44, 44, 'LElbowYaw'])],
-                        ['ryaw']
-                        ),
-            CommandSpec('turn_down', 'elbows',
-                        set(['LElbowYaw', 'RElbowYaw']),
-                        [Transform(linear, 'LElbowYaw', 'lyaw', [1, -90]),
-                         Transform(linear, 'RElbowYaw', 'ryaw', [-1, -90])],
-                        [Constraint(less_than, [-45, 'RElbowYaw']),
-                          Constraint(greater_than, [45, 'LElbowYaw'])],
-                        ['ryaw']
-                        ),
-            CommandSpec('open', 'hands',
-                        set(['LHand', 'RHand']),
-                        [],
-                        [Constraint(greater_than, [17, 'LHand']),
-                          Constraint(greater_than, [17, 'RHand'])],
-                        []
-                        ),
-            CommandSpec('close', 'hands',
-                        set(['LHand', 'RHand']),
-                        [],
-                        [Constraint(less_than, [17, 'LHand']),
-                          Constraint(less_than, [17, 'RHand'])],
-                        []
-                        ),
-
-            # right
-            CommandSpec('right_forward', 'arms',
-                        set(['RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [-45, 45, 'RShoulderPitch']),
-                          Constraint(greater_than, [-45, 'RShoulderRoll'])],
-                        ['rpitch', 'rroll']
-                        ),
-            CommandSpec('right_out', 'arms',
-                        set(['RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, -90])],
-                        [Constraint(less_than, [-45, 'RShoulderRoll'])],
-                        ['rpitch', 'rroll']
-                        ),
-            CommandSpec('right_up', 'arms',
-                        set(['RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, -90]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [-110, -45, 'RShoulderPitch']),
-                          Constraint(less_than, [45, 'RShoulderRoll'])],
-                        ['rpitch', 'rroll']
-                        ),
-            CommandSpec('right_down', 'arms',
-                        set(['RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 90]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [46, 95, 'RShoulderPitch']),
-                          Constraint(less_than, [45, 'RShoulderRoll'])],
-                        ['rpitch', 'rroll']
-                        ),
-            CommandSpec('right_back', 'arms',
-                        set(['RShoulderPitch', 'RShoulderRoll']),
-                        [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 119.5]),
-                         Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
-                        [Constraint(in_range, [96, 119.5, 'RShoulderPitch']),
-                          Constraint(less_than, [45, 'RShoulderRoll'])],
-                        ['rpitch', 'rroll']
-                        ),
-             CommandSpec('right_open', 'hands',
-                        set(['RHand']),
-                        [],
-                        [Constraint(greater_than, [17, 'RHand'])],
-                        []
-                        ),
-
-            CommandSpec('right_close', 'hands',
-                        set(['RHand']),
-                        [],
-                        [Constraint(less_than, [17, 'RHand'])],
-                        []
-                        ),
-
-            # left
-            CommandSpec('left_forward', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
-                        [Constraint(in_range, [-45, 45, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('left_out', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, -90])],
-                        [Constraint(greater_than, [45, 'LShoulderRoll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('left_up', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, -90]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
-                        [Constraint(in_range, [-110, -45, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('left_down', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 90]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
-                        [Constraint(in_range, [46, 95, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('left_back', 'arms',
-                        set(['LShoulderPitch', 'LShoulderRoll']),
-                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 119.5]),
-                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
-                        [Constraint(in_range, [96, 119.5, 'LShoulderPitch']),
-                          Constraint(less_than, [45, 'LShoulderRoll'])],
-                        ['lpitch', 'lroll']
-                        ),
-            CommandSpec('left_open', 'hands',
-                        set(['LHand']),
-                        [],
-                        [Constraint(greater_than, [17, 'LHand'])],
-                        []
-                        ),
-
-            CommandSpec('left_close', 'hands',
-                        set(['LHand']),
-                        [],
-                        [Constraint(less_than, [17, 'LHand'])],
-                        []
-                        )
-           ]
+# number of frames evaluated at a time by translate_timeline() & the
+# number first searched for the next frame giving commands
+TIMELINE_CHUNK_FRAMES = 16384
+TIMELINE_FIRST_WINDOW = 16
+
+
+# arm & hand commands written for the left side, the right side & combined
+# commands are generated by mirroring them. The arm commands carry the
+# thresholds of the original hand-written rules: the right up, down & back
+# commands only check the pitch range & the combined commands check the
+# left arm with the two sides agreeing
+SYMMETRIC_ARM_COMMANDS = [SymmetricSpec('forward', 'arms',
+                                        set(['LShoulderPitch', 'LShoulderRoll']),
+                                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                        [Constraint(in_range, [-45, 45, 'LShoulderPitch']),
+                                         Constraint(less_than, [45, 'LShoulderRoll'])],
+                                        ['lpitch', 'lroll'],
+                                        10,
+                                        combined_constraints=[Constraint(in_range, [-45, 45, 'LShoulderPitch']),
+                                                              Constraint(less_than, [46, 'LShoulderRoll'])]
+                                        ),
+                          SymmetricSpec('out', 'arms',
+                                        set(['LShoulderPitch', 'LShoulderRoll']),
+                                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                         Transform(linear, 'LShoulderRoll', 'lroll', [1, -90])],
+                                        [Constraint(greater_than, [45, 'LShoulderRoll'])],
+                                        ['lpitch', 'lroll'],
+                                        10,
+                                        combined_constraints=[Constraint(greater_than, [44, 'LShoulderRoll'])],
+                                        compared=['lroll']
+                                        ),
+                          SymmetricSpec('up', 'arms',
+                                        set(['LShoulderPitch', 'LShoulderRoll']),
+                                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, -90]),
+                                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                        [Constraint(in_range, [-110, -45, 'LShoulderPitch']),
+                                         Constraint(less_than, [45, 'LShoulderRoll'])],
+                                        ['lpitch', 'lroll'],
+                                        10,
+                                        right_constraints=[Constraint(in_range, [-110, -45, 'RShoulderPitch']),
+                                                           Constraint(less_than, [45, 'RShoulderRoll'])],
+                                        combined_constraints=[Constraint(in_range, [-110, -45, 'LShoulderPitch']),
+                                                              Constraint(less_than, [45, 'LShoulderRoll'])]
+                                        ),
+                          SymmetricSpec('down', 'arms',
+                                        set(['LShoulderPitch', 'LShoulderRoll']),
+                                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 90]),
+                                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                        [Constraint(in_range, [46, 95, 'LShoulderPitch']),
+                                         Constraint(less_than, [45, 'LShoulderRoll'])],
+                                        ['lpitch', 'lroll'],
+                                        10,
+                                        right_constraints=[Constraint(in_range, [46, 95, 'RShoulderPitch']),
+                                                           Constraint(less_than, [45, 'RShoulderRoll'])],
+                                        combined_constraints=[Constraint(in_range, [46, 95, 'LShoulderPitch']),
+                                                              Constraint(less_than, [45, 'LShoulderRoll'])]
+                                        ),
+                          SymmetricSpec('back', 'arms',
+                                        set(['LShoulderPitch', 'LShoulderRoll']),
+                                        [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 119.5]),
+                                         Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                        [Constraint(in_range, [96, 119.5, 'LShoulderPitch']),
+                                         Constraint(less_than, [45, 'LShoulderRoll'])],
+                                        ['lpitch', 'lroll'],
+                                        10,
+                                        right_constraints=[Constraint(in_range, [96, 119.5, 'RShoulderPitch']),
+                                                           Constraint(less_than, [45, 'RShoulderRoll'])],
+                                        combined_constraints=[Constraint(in_range, [96, 119.5, 'LShoulderPitch']),
+                                                              Constraint(less_than, [45, 'LShoulderRoll'])]
+                                        )
+                          ]
+
+SYMMETRIC_HAND_COMMANDS = [SymmetricSpec('open', 'hands',
+                                         set(['LHand']),
+                                         [],
+                                         [Constraint(greater_than, [17, 'LHand'])],
+                                         [],
+                                         0
+                                         ),
+                           SymmetricSpec('close', 'hands',
+                                         set(['LHand']),
+                                         [],
+                                         [Constraint(less_than, [17, 'LHand'])],
+                                         [],
+                                         0
+                                         )
+                           ]
+
+ELBOW_COMMANDS = [CommandSpec('bent', 'elbows',
+                              set(['LElbowRoll', 'RElbowRoll']),
+                              [Transform(linear, 'LElbowRoll', 'lroll', [1, 89]),
+                               Transform(linear, 'RElbowRoll', 'rroll', [1, -89])],
+                              [Constraint(less_than, [-43, 'LElbowRoll']),
+                                Constraint(greater_than, [43, 'RElbowRoll'])],
+                              ['rroll']
+                              ),
+                  CommandSpec('straight', 'elbows',
+                              set(['LElbowRoll', 'RElbowRoll']),
+                              [Transform(linear, 'LElbowRoll', 'lroll', [1, -0.5]),
+                               Transform(linear, 'RElbowRoll', 'rroll', [1, 0.5])],
+                              [Constraint(less_than, [43, 'LElbowRoll']),
+                                Constraint(less_than, [43, 'RElbowRoll'])],
+                              ['rroll']
+                              ),
+                  CommandSpec('turn_up', 'elbows',
+                              set(['LElbowYaw', 'RElbowYaw']),
+                              [Transform(linear, 'LElbowYaw', 'lyaw', [-1, -90]),
+                               Transform(linear, 'RElbowYaw', 'ryaw', [1, -90])],
+                              [Constraint(greater_than, [45, 'RElbowYaw']),
+                                Constraint(less_than, [-45, 'LElbowYaw'])],
+                              ['ryaw']
+                              ),
+                  CommandSpec('turn_in', 'elbows',
+                              set(['LElbowYaw', 'RElbowYaw']),
+                              [Transform(linear, 'LElbowYaw', 'lyaw', [-1, 0]),
+                               Transform(linear, 'RElbowYaw', 'ryaw', [1, 0])],
+                              [Constraint(in_range, [-44, 44, 'RElbowYaw']),
+                                Constraint(in_range, [-44, 44, 'LElbowYaw'])],
+                              ['ryaw']
+                              ),
+                  CommandSpec('turn_down', 'elbows',
+                              set(['LElbowYaw', 'RElbowYaw']),
+                              [Transform(linear, 'LElbowYaw', 'lyaw', [1, -90]),
+                               Transform(linear, 'RElbowYaw', 'ryaw', [-1, -90])],
+                              [Constraint(less_than, [-45, 'RElbowYaw']),
+                                Constraint(greater_than, [45, 'LElbowYaw'])],
+                              ['ryaw']
+                              )
+                  ]
+
+SYMMETRIC_COMMANDS = SYMMETRIC_ARM_COMMANDS + SYMMETRIC_HAND_COMMANDS
+
+# combined commands first so they are preferred to one side at a time
+COMMANDS = ([combined_command(s) for s in SYMMETRIC_ARM_COMMANDS]
+            + ELBOW_COMMANDS
+            + [combined_command(s) for s in SYMMETRIC_HAND_COMMANDS]
+            + [right_command(s) for s in SYMMETRIC_COMMANDS]
+            + [left_command(s) for s in SYMMETRIC_COMMANDS])
+
+# COMMANDS compiled for vectorised evaluation
+RULES = RuleSet(COMMANDS)
+
+# commands generated for each rounded pose & changed joint mask, shared by all
+# translator instances as get_translator() creates a new one on each call
+DETECT_CACHE = LRUCache()
 
 
 class FluentNaoTranslator(object):
 
+    # set to None to always evaluate the rules
+    cache = DETECT_CACHE
+
     def commands_to_text(self, commands, is_blocking=False, fluentnao=None):
         """
         Takes a list of commands and converts them to text
         """
-        output = ""
-        for command_tuple in commands:
-            # the command
-            if not output == "":
-                output = output + "."
+        output = StringIO()
+        self.write_commands(output, commands, is_blocking, fluentnao)
+        return output.getvalue()
 
-            args = [str(p) for p in command_tuple[1]]
-            command_str = "{cmd}({params})".format(cmd=command_tuple[0], params=",".join(args))
-            output = output + command_str
+    def write_commands(self, writer, commands, is_blocking=False, fluentnao=None):
+        """
+        Write the text for a list of commands to writer, any object with a
+        write() method, without building the whole string first
+        """
+        if not commands:
+            return
 
-        if commands:
-            if fluentnao:
-                output = fluentnao + output
+        if fluentnao:
+            writer.write(fluentnao)
+
+        for i, command_tuple in enumerate(commands):
+            # the command
+            if i:
+                writer.write(".")
 
-            if is_blocking:
-                output = output + ".go()"
+            args = [str(p) for p in command_tuple[1]]
+            writer.write("{cmd}({params})".format(cmd=command_tuple[0], params=",".join(args)))
 
-        return output
+        if is_blocking:
+            writer.write(".go()")
 
     def detect_command(self, joint_dict, changed_joint_names):
         joints_degrees = joints_to_degrees(joint_dict, True)
 
-        commands = []
-        joints_done = set()
-        cur_prefix = None
-
-        for cs in COMMANDS:
-            # check whether any of the joints used by this command have changed
-            # we take the intersection of the command joints and the changed joints
-            if changed_joint_names & cs.joints:
-                # ignore all other commands using joints marked as done
-                if not cs.joints.issubset(joints_done):
-                    cdata = joints_degrees.copy()
-                    self.do_transforms(cs, cdata)
-                    if self.constraints_pass(cs, cdata):
-                        joints_done = joints_done.union(cs.joints)
-                        commands.append(self.generate_command(cs, cur_prefix, cdata))
-                        cur_prefix = cs.prefix
-        return commands
+        degrees = numpy.empty(NUM_JOINTS)
+        degrees.fill(numpy.nan)
+        for n, v in joints_degrees.iteritems():
+            if n in JOINT_INDEX:
+                degrees[JOINT_INDEX[n]] = v
+
+        changed = numpy.zeros(NUM_JOINTS, dtype=bool)
+        for n in changed_joint_names:
+            if n in JOINT_INDEX:
+                changed[JOINT_INDEX[n]] = True
+
+        commands = self.detect_frames(degrees[numpy.newaxis], changed[numpy.newaxis])[0]
+        # callers are free to modify the commands they get back
+        return [(name, list(params)) for (name, params) in commands]
+
+    def detect_frames(self, degrees, changed):
+        """
+        Return the list of commands for each frame given its rounded angles in
+        degrees and mask of changed joints, using cached results where possible.
+        Frames with the same pose share the same (cached) command list.
+        """
+        if self.cache is None:
+            return RULES.detect(degrees, changed, DEFAULT_FRAME_TIME)
+
+        # one key per frame cut from the bytes of all frames at once
+        rows = numpy.hstack([degrees, changed]).astype(numpy.float64)
+        width = rows.shape[1] * rows.itemsize
+        data = rows.tobytes()
+        keys = [data[i:i + width] for i in xrange(0, len(data), width)]
+        result = [self.cache.get(k) for k in keys]
+
+        # evaluate each distinct missing pose once
+        misses = {}
+        for i, commands in enumerate(result):
+            if commands is None and not keys[i] in misses:
+                misses[keys[i]] = i
+        if misses:
+            missing = sorted(misses.values())
+            detected = dict(zip([keys[i] for i in missing],
+                                RULES.detect(degrees[missing], changed[missing], DEFAULT_FRAME_TIME)))
+            for key, commands in detected.iteritems():
+                self.cache.put(key, commands)
+            result = [detected[k] if commands is None else commands for (k, commands) in zip(keys, result)]
+        return result
+
+    def translate_timeline(self, times, frames, threshold=JOINT_MOVE_AMOUNT, previous=None,
+                           chunk_frames=TIMELINE_CHUNK_FRAMES):
+        """
+        Translate a whole recording in one call. frames is an (N, NUM_JOINTS)
+        array of angles in radians in JOINT_NAMES order and times the matching
+        timestamps. Each joint is compared with its angle in the last frame
+        that produced commands (the first frame with previous, or treated as
+        all changed) so slow moves are found once they add up to more than
+        threshold. Returns a list of (time, commands) tuples, frames that
+        produce no commands are omitted. Frames with the same pose share their
+        list of commands so copy it before modifying it.
+        """
+        frames = numpy.asarray(frames, dtype=numpy.float64)
+        if frames.ndim != 2 or frames.shape[1] != NUM_JOINTS or len(frames) != len(times):
+            raise ValueError("Expected {} frames of {} joints, got shape {}"
+                             .format(len(times), NUM_JOINTS, frames.shape))
+
+        result = []
+        emitted = None if previous is None else numpy.array(previous, dtype=numpy.float64)
+        for start in xrange(0, len(frames), chunk_frames):
+            chunk = frames[start:start + chunk_frames]
+            degrees = joints_to_degrees_array(chunk, True)
+            # the constraints only depend on the pose so are evaluated for the
+            # whole chunk at once, a frame gives commands when an active joint
+            # has changed since the last frame that gave commands
+            active = RULES.active_joints(degrees)
+            rows = []
+            masks = []
+
+            pos = 0
+            if emitted is None:
+                # nothing to compare the first frame with
+                if active[0].any():
+                    rows.append(0)
+                    masks.append(numpy.ones(NUM_JOINTS, dtype=bool))
+                emitted = chunk[0].copy()
+                pos = 1
+
+            # the search window grows while no frame gives commands & shrinks
+            # again when one does
+            window = TIMELINE_FIRST_WINDOW
+            while pos < len(chunk):
+                changed = joint_changes_array(emitted, chunk[pos:pos + window], threshold)
+                hits = numpy.flatnonzero((changed & active[pos:pos + window]).any(axis=1))
+                if len(hits) == 0:
+                    pos += window
+                    window *= 2
+                    continue
+                i = hits[0]
+                rows.append(pos + i)
+                masks.append(changed[i])
+                emitted[changed[i]] = chunk[pos + i][changed[i]]
+                pos += i + 1
+                window = TIMELINE_FIRST_WINDOW
+
+            if rows:
+                for i, commands in zip(rows, self.detect_frames(degrees[rows], numpy.array(masks))):
+                    result.append((times[start + i], commands))
+        return result
 
     def do_transforms(self, cs, cdata):
         for t in cs.transforms:
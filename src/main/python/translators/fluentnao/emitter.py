@@ -0,0 +1,64 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Streaming output of generated FluentNao code. Commands are written to any
+object with a write() method (file, StringIO, UI widget) one fragment at a
+time as they are generated, so the cost of producing code is linear in its
+length however long the session.
+'''
+
+from translators.fluentnao.core import FluentNaoTranslator
+
+LINE_SEPARATOR = "\r\n"
+
+
+class CodeEmitter(object):
+    """
+    Write one line of code for each non-empty list of commands. If
+    leading_separator is true a line separator is also written before the
+    first line, for appending to existing code.
+    """
+
+    def __init__(self, writer, translator=None, is_blocking=True, fluentnao="nao.",
+                 line_separator=LINE_SEPARATOR, leading_separator=False):
+        super(CodeEmitter, self).__init__()
+        self.writer = writer
+        self.translator = translator or FluentNaoTranslator()
+        self.is_blocking = is_blocking
+        self.fluentnao = fluentnao
+        self.line_separator = line_separator
+        self.leading_separator = leading_separator
+        self.lines = 0
+
+    def emit(self, commands):
+        """
+        Write the line for a list of commands, returns False if there were none
+        """
+        if not commands:
+            return False
+        self.separate()
+        self.translator.write_commands(self.writer, commands, self.is_blocking, self.fluentnao)
+        return True
+
+    def emit_text(self, text):
+        """
+        Write a line of text as is
+        """
+        self.separate()
+        self.writer.write(text)
+
+    def emit_timeline(self, timeline):
+        """
+        Write the lines for a list of (time, commands) tuples as returned by
+        FluentNaoTranslator.translate_timeline()
+        """
+        for (_, commands) in timeline:
+            self.emit(commands)
+        return self.lines
+
+    def separate(self):
+        if self.lines or self.leading_separator:
+            self.writer.write(self.line_separator)
+        self.lines += 1
@@ -0,0 +1,162 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Translator backend producing motion programs instead of FluentNao source.
+Commands from FluentNaoTranslator are applied directly to the fluent API of
+an offline fluentnao.nao.Nao which only collects joint targets in its
+MotionPlan, so the angles are exactly those the generated code would send.
+The resulting program is replayed with a single interpolation call, with no
+text to parse or eval.
+'''
+
+import collections
+
+import fluentnao.nao
+
+# joint targets of one keyframe in the form used by MotionPlan.compile() and
+# Playback.trajectory(): angles in radians and times in seconds from the
+# start of the step
+MotionStep = collections.namedtuple('MotionStep', ['names', 'angle_lists', 'time_lists'])
+
+
+class MotionProgram(object):
+    """
+    A sequence of steps played back to back. Each step starts once every
+    joint in the previous step has reached its target, as with go() after
+    each line of a FluentNao script.
+    """
+
+    def __init__(self, steps=None):
+        super(MotionProgram, self).__init__()
+        self.steps = list(steps or [])
+
+    def add(self, step):
+        self.steps.append(step)
+        return self
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def step_duration(self, step):
+        return max([times[-1] for times in step.time_lists if times] or [0.0])
+
+    def duration(self):
+        return sum(self.step_duration(step) for step in self.steps)
+
+    def to_trajectory(self, current=None):
+        """
+        Return (names, angle lists, time lists) for the whole program with
+        times measured from its start, ready for ALMotion.angleInterpolation.
+        Each step starts with a key holding its joints where the previous
+        step left them so nothing moves before its own step. current maps
+        joint names to their angles now, used to hold joints until the
+        first step that moves them (they start moving straight away if not
+        given).
+        """
+        names = []
+        angle_lists = {}
+        time_lists = {}
+        start = 0.0
+        for step in self.steps:
+            for name, angles, times in zip(step.names, step.angle_lists, step.time_lists):
+                if not name in angle_lists:
+                    names.append(name)
+                    angle_lists[name] = []
+                    time_lists[name] = []
+                    if start > 0 and current is not None and name in current:
+                        angle_lists[name].append(current[name])
+                        time_lists[name].append(start)
+                elif time_lists[name][-1] < start:
+                    angle_lists[name].append(angle_lists[name][-1])
+                    time_lists[name].append(start)
+                angle_lists[name].extend(angles)
+                time_lists[name].extend(start + t for t in times)
+            start += self.step_duration(step)
+        return (names, [angle_lists[n] for n in names], [time_lists[n] for n in names])
+
+    def play(self, nao, cancelled=None):
+        """
+        Start the program on a fluentnao.nao.Nao, call go() on the result to
+        wait for it. Long programs block until their last chunk has started,
+        no more chunks are started once cancelled, if given, returns True.
+        """
+        names = self.joint_names()
+        if names:
+            current = dict(zip(names, nao.env.motion.getAngles(names, True)))
+            (names, angle_lists, time_lists) = self.to_trajectory(current)
+            nao.playback.trajectory(names, angle_lists, time_lists, cancelled=cancelled)
+        return nao
+
+    def joint_names(self):
+        # every joint moved by the program in the order first used
+        names = []
+        for step in self.steps:
+            names.extend(n for n in step.names if not n in names)
+        return names
+
+
+class MotionTranslator(object):
+    """
+    Compile lists of (command, parameters) tuples as generated by
+    FluentNaoTranslator.detect_command() into MotionSteps
+    """
+
+    def __init__(self, duration=1.5):
+        super(MotionTranslator, self).__init__()
+        # offline robot, motion commands only add to its plan
+        self.planner = fluentnao.nao.Nao(None)
+        self.planner.set_duration(duration)
+        self.duration = duration
+
+    def resolve(self, command, target):
+        # commands are "prefix.method" or just "method" using the previous prefix
+        if '.' in command:
+            (prefix, method) = command.split('.', 1)
+            target = getattr(self.planner, prefix, None)
+        else:
+            method = command
+        function = getattr(target, method, None) if target is not None else None
+        if function is None or method.startswith('_') or method in ('go', 'send'):
+            raise ValueError("Cannot compile command {}".format(command))
+        return (target, function)
+
+    def compile_commands(self, commands, duration=None):
+        """
+        Return the MotionStep for a list of commands, commands with a duration
+        of 0 take duration seconds (the translator's default if None)
+        """
+        self.planner.plan.clear()
+        self.planner.set_duration(duration or self.duration)
+        target = None
+        for (command, params) in commands:
+            (target, function) = self.resolve(command, target)
+            try:
+                function(*params)
+            except AttributeError:
+                # the offline robot has no proxies, e.g. stiffness commands
+                raise ValueError("Cannot compile command {}, it does not only move joints".format(command))
+        (names, angle_lists, time_lists) = self.planner.plan.compile()
+        self.planner.plan.clear()
+        return MotionStep(names, angle_lists, time_lists)
+
+    def compile_timeline(self, timeline, use_times=False):
+        """
+        Compile a list of (time, commands) tuples as returned by
+        FluentNaoTranslator.translate_timeline() into a MotionProgram. If
+        use_times is true each step takes as long as the gap since the one
+        before it, otherwise the default duration.
+        """
+        program = MotionProgram()
+        last_time = None
+        for (t, commands) in timeline:
+            duration = None
+            if use_times and last_time is not None and t > last_time:
+                duration = t - last_time
+            program.add(self.compile_commands(commands, duration))
+            last_time = t
+        return program
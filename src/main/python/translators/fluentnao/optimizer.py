@@ -0,0 +1,171 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Optimisation pass over FluentNaoTranslator output. Matching left & right
+commands in a keyframe are merged into the combined command, commands that
+would move joints to where the previous keyframes already left them are
+dropped and runs of keyframes that then have nothing left to do become a
+single wait, so the generated script makes fewer calls on the robot.
+'''
+
+from translators.fluentnao.core import COMMANDS
+
+# largest difference in degrees between parameters treated as the same
+DEFAULT_TOLERANCE = 5
+
+WAIT_COMMAND = "wait"
+
+SIDES = (("left_", "right_"), ("right_", "left_"))
+
+
+class ScriptOptimizer(object):
+    """
+    Optimise lists of (command, parameters) tuples as generated by
+    FluentNaoTranslator.detect_command() and timelines of (time, commands)
+    tuples as returned by translate_timeline(). Parameters after the first
+    (the duration) may differ by up to tolerance degrees and still count as
+    the same. If fold_waits is false repeated keyframes are dropped without
+    a wait taking their place.
+    """
+
+    def __init__(self, commands=COMMANDS, tolerance=DEFAULT_TOLERANCE, fold_waits=True):
+        super(ScriptOptimizer, self).__init__()
+        self.tolerance = tolerance
+        self.fold_waits = fold_waits
+
+        names = set("{}.{}".format(cs.prefix, cs.command) for cs in commands)
+
+        # command -> joints it moves
+        self.joints = {}
+        # one side command -> (other side command, combined command)
+        self.pairs = {}
+        for cs in commands:
+            name = "{}.{}".format(cs.prefix, cs.command)
+            self.joints[name] = frozenset(cs.joints)
+            for (side, other_side) in SIDES:
+                if cs.command.startswith(side):
+                    base = cs.command[len(side):]
+                    other = "{}.{}{}".format(cs.prefix, other_side, base)
+                    combined = "{}.{}".format(cs.prefix, base)
+                    if other in names and combined in names:
+                        self.pairs[name] = (other, combined)
+
+    def same_parameters(self, params, other_params):
+        if len(params) != len(other_params) or params[:1] != other_params[:1]:
+            return False
+        for (p, q) in zip(params[1:], other_params[1:]):
+            if abs(p - q) > self.tolerance:
+                return False
+        return True
+
+    def expand(self, commands):
+        """
+        Return the commands with the prefix on every command name
+        """
+        expanded = []
+        cur_prefix = None
+        for (name, params) in commands:
+            if '.' in name:
+                cur_prefix = name.split('.', 1)[0]
+            elif cur_prefix and name != WAIT_COMMAND:
+                name = "{}.{}".format(cur_prefix, name)
+            expanded.append((name, params))
+        return expanded
+
+    def compress(self, commands):
+        """
+        Inverse of expand(), leave out prefixes repeating the one before
+        """
+        compressed = []
+        cur_prefix = None
+        for (name, params) in commands:
+            if not '.' in name:
+                cur_prefix = None
+                compressed.append((name, params))
+                continue
+            (prefix, method) = name.split('.', 1)
+            compressed.append((method if prefix == cur_prefix else name, params))
+            cur_prefix = prefix
+        return compressed
+
+    def merge(self, commands):
+        """
+        Replace left & right commands with the same parameters by the combined
+        command, which takes the parameters of the left one
+        """
+        merged = []
+        used = set()
+        for (i, (name, params)) in enumerate(commands):
+            if i in used:
+                continue
+            if name in self.pairs:
+                (other, combined) = self.pairs[name]
+                for j in xrange(i + 1, len(commands)):
+                    (other_name, other_params) = commands[j]
+                    if not j in used and other_name == other and self.same_parameters(params, other_params):
+                        used.add(j)
+                        left_params = params if name.split('.', 1)[1].startswith("left_") else other_params
+                        (name, params) = (combined, left_params)
+                        break
+            merged.append((name, params))
+        return merged
+
+    def remove_unchanged(self, commands, state):
+        """
+        Drop commands moving their joints the way they were last moved,
+        state maps joint names to the last (command, parameters) to move them
+        and is updated with the commands kept
+        """
+        kept = []
+        for (name, params) in commands:
+            joints = self.joints.get(name)
+            if joints:
+                unchanged = True
+                for j in joints:
+                    last = state.get(j)
+                    if last is None or last[0] != name or not self.same_parameters(last[1], params):
+                        unchanged = False
+                        break
+                if unchanged:
+                    continue
+                for j in joints:
+                    state[j] = (name, params)
+            kept.append((name, params))
+        return kept
+
+    def optimize_commands(self, commands, state=None):
+        """
+        Return the optimised list of commands for one keyframe, state as for
+        remove_unchanged() or None to keep every command
+        """
+        commands = self.merge(self.expand(commands))
+        if state is not None:
+            commands = self.remove_unchanged(commands, state)
+        return self.compress(commands)
+
+    def optimize(self, timeline):
+        """
+        Return the optimised version of a list of (time, commands) tuples,
+        times being in seconds. Keyframes left with no commands are dropped
+        and a run of them between two keyframes is replaced by a wait for
+        the time they covered.
+        """
+        result = []
+        state = {}
+        last_time = None
+        hold = None
+        for (t, commands) in timeline:
+            commands = self.optimize_commands(commands, state)
+            if not commands:
+                if last_time is not None:
+                    hold = (hold[0] if hold else t, t)
+                continue
+
+            if hold and self.fold_waits and hold[1] > last_time:
+                result.append((hold[0], [(WAIT_COMMAND, [round(hold[1] - last_time, 2)])]))
+            hold = None
+            result.append((t, commands))
+            last_time = t
+        return result
@@ -0,0 +1,418 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+
+Command specifications for the FluentNao translator and the rule engine that
+evaluates them.
+
+A table of CommandSpecs is compiled once into flat arrays: every distinct
+linear transform becomes a value column computed alongside the joint angles,
+every constraint becomes a set of threshold checks on those columns and each
+command is a row of an incidence matrix over the checks. Evaluating the rules
+for one frame or many is then a handful of numpy operations, followed by a
+greedy pass over the commands that passed to pick those using joints not
+already claimed by an earlier command.
+'''
+
+import collections
+
+import numpy
+
+from recorder.pose import JOINT_NAMES, JOINT_INDEX, NUM_JOINTS, round_half_away
+
+Constraint = collections.namedtuple('Constraint',
+                                    ['predicate', 'parameters'])
+
+Transform = collections.namedtuple('Transform',
+                                   ['operator', 'inval', 'outval', 'parameters'])
+
+CommandSpec = collections.namedtuple('CommandSpec',
+                                     ['command', 'prefix', 'joints', 'transforms',
+                                      'constraints', 'parameters'])
+
+# a command for the left side written once, mirrored to give the right side &
+# combined commands, tolerance being the largest difference between the left
+# & right parameters for the combined command to apply. right_constraints &
+# combined_constraints replace the mirrored constraints & those of both sides
+# where a command needs other thresholds, compared lists the parameters that
+# must agree, all of them if None
+SymmetricSpec = collections.namedtuple('SymmetricSpec',
+                                       ['command', 'prefix', 'joints', 'transforms',
+                                        'constraints', 'parameters', 'tolerance',
+                                        'right_constraints', 'combined_constraints', 'compared'])
+SymmetricSpec.__new__.__defaults__ = (None, None, None)
+
+
+def linear(value, params):
+    return value * params[0] + params[1]
+
+
+def in_range(joints, params):
+    minval = params[0]
+    maxval = params[1]
+    names = params[2:]
+    for n in names:
+        v = joints[n]
+        if (v < minval) or (v > maxval):
+            return False
+    return True
+
+def less_than(joints, params):
+    maxval = params[0]
+    names = params[1:]
+    for n in names:
+        if joints[n] > maxval:
+            return False
+    return True
+
+def greater_than(joints, params):
+    minval = params[0]
+    names = params[1:]
+    for n in names:
+        if joints[n] <= minval:
+            return False
+    return True
+
+def at_least(joints, params):
+    minval = params[0]
+    names = params[1:]
+    for n in names:
+        if joints[n] < minval:
+            return False
+    return True
+
+def below(joints, params):
+    maxval = params[0]
+    names = params[1:]
+    for n in names:
+        if joints[n] >= maxval:
+            return False
+    return True
+
+def max_difference(joints, params):
+    max_diff = params[0]
+    first = joints[params[1]]
+    names = params[2:]
+    for n in names:
+        if abs(joints[n] - first) > max_diff:
+            return False
+    return True
+
+
+###################################
+# mirroring
+###################################
+
+# sign of a joint angle on the other side of the body, roll & yaw joints turn
+# the opposite way
+MIRROR_SIGNS = dict((n, -1 if n.endswith('Roll') or n.endswith('Yaw') else 1) for n in JOINT_NAMES)
+
+# predicate applying to the negated values, as in the hand-written rules a
+# bound the left side includes is excluded on the right & vice versa so a
+# value exactly on a threshold goes to the other command of the pair
+MIRROR_PREDICATES = {less_than: greater_than, greater_than: less_than,
+                     at_least: below, below: at_least}
+
+
+def mirror_name(name):
+    """
+    Name of a joint or transformed value on the other side, joints start
+    with L or R & values with l or r
+    """
+    swap = {'L': 'R', 'R': 'L', 'l': 'r', 'r': 'l'}
+    if not name[:1] in swap:
+        raise ValueError("Cannot mirror {}".format(name))
+    return swap[name[0]] + name[1:]
+
+
+def mirror_transform(t):
+    # a transform of a negated joint angle has its scale negated
+    sign = MIRROR_SIGNS[t.inval]
+    return Transform(t.operator, mirror_name(t.inval), mirror_name(t.outval),
+                     [t.parameters[0] * sign] + list(t.parameters[1:]))
+
+
+def mirror_constraint(c):
+    """
+    Return the constraints on the other side equivalent to c, one for each
+    group of names with the same sign
+    """
+    if c.predicate is max_difference:
+        return [Constraint(max_difference, [c.parameters[0]] + [mirror_name(n) for n in c.parameters[1:]])]
+
+    bounds = 2 if c.predicate is in_range else 1
+    names = c.parameters[bounds:]
+    mirrored = []
+    for sign in (1, -1):
+        group = [mirror_name(n) for n in names if MIRROR_SIGNS.get(n, 1) == sign]
+        if not group:
+            continue
+        if sign == 1:
+            mirrored.append(Constraint(c.predicate, list(c.parameters[:bounds]) + group))
+        elif c.predicate is in_range:
+            mirrored.append(Constraint(in_range, [-c.parameters[1], -c.parameters[0]] + group))
+        elif c.predicate in MIRROR_PREDICATES:
+            mirrored.append(Constraint(MIRROR_PREDICATES[c.predicate], [-c.parameters[0]] + group))
+        else:
+            raise ValueError("Cannot mirror constraint {}".format(c))
+    return mirrored
+
+
+def left_command(spec):
+    return CommandSpec('left_' + spec.command, spec.prefix, set(spec.joints), list(spec.transforms),
+                       list(spec.constraints), list(spec.parameters))
+
+
+def right_command(spec):
+    if spec.right_constraints is not None:
+        constraints = list(spec.right_constraints)
+    else:
+        constraints = []
+        for c in spec.constraints:
+            constraints.extend(mirror_constraint(c))
+    return CommandSpec('right_' + spec.command, spec.prefix,
+                       set(mirror_name(n) for n in spec.joints),
+                       [mirror_transform(t) for t in spec.transforms],
+                       constraints,
+                       [mirror_name(p) for p in spec.parameters])
+
+
+def combined_command(spec):
+    """
+    Command for both sides: the constraints of each side, or the spec's
+    combined_constraints, plus the compared left & right parameters agreeing
+    within the tolerance. Takes the parameters of the left side.
+    """
+    left = left_command(spec)
+    right = right_command(spec)
+    if spec.combined_constraints is not None:
+        constraints = list(spec.combined_constraints)
+    else:
+        constraints = left.constraints + right.constraints
+    compared = spec.parameters if spec.compared is None else spec.compared
+    constraints.extend(Constraint(max_difference, [spec.tolerance, p, mirror_name(p)]) for p in compared)
+    return CommandSpec(spec.command, spec.prefix, left.joints | right.joints,
+                       left.transforms + right.transforms, constraints, left.parameters)
+
+
+# kinds of threshold check, value >= threshold, value > threshold, value <= threshold
+# & value < threshold
+CHECK_AT_LEAST = 0
+CHECK_ABOVE = 1
+CHECK_AT_MOST = 2
+CHECK_BELOW = 3
+CHECK_KINDS = (CHECK_AT_LEAST, CHECK_ABOVE, CHECK_AT_MOST, CHECK_BELOW)
+
+
+class RuleSet(object):
+    """
+    A table of CommandSpecs compiled for vectorised evaluation. Only linear
+    transforms of joint angles and the in_range, less_than, greater_than,
+    at_least, below and max_difference predicates can be compiled, anything
+    else raises ValueError.
+    """
+
+    def __init__(self, commands):
+        super(RuleSet, self).__init__()
+        self.commands = list(commands)
+
+        # value columns after the joint angles: (joint index, scale, offset)
+        transform_columns = {}
+        self.transform_joints = []
+        self.transform_scales = []
+        self.transform_offsets = []
+
+        # (kind, column, threshold) and (column, column, max difference) -> check number
+        bound_checks = {}
+        difference_checks = {}
+
+        command_checks = []
+        self.parameter_columns = []
+        self.joint_masks = []
+
+        def add_check(checks, key):
+            if not key in checks:
+                checks[key] = len(bound_checks) + len(difference_checks)
+            return checks[key]
+
+        for cs in self.commands:
+            outvals = {}
+            for t in cs.transforms:
+                if t.operator is not linear or not t.inval in JOINT_INDEX:
+                    raise ValueError("Cannot compile transform {} of command {}".format(t, cs.command))
+                key = (JOINT_INDEX[t.inval], float(t.parameters[0]), float(t.parameters[1]))
+                if not key in transform_columns:
+                    transform_columns[key] = NUM_JOINTS + len(self.transform_joints)
+                    self.transform_joints.append(key[0])
+                    self.transform_scales.append(key[1])
+                    self.transform_offsets.append(key[2])
+                outvals[t.outval] = transform_columns[key]
+
+            def column(name):
+                if name in outvals:
+                    return outvals[name]
+                return JOINT_INDEX[name]
+
+            checks = set()
+            for c in cs.constraints:
+                params = c.parameters
+                if c.predicate is in_range:
+                    for n in params[2:]:
+                        checks.add(add_check(bound_checks, (CHECK_AT_LEAST, column(n), float(params[0]))))
+                        checks.add(add_check(bound_checks, (CHECK_AT_MOST, column(n), float(params[1]))))
+                elif c.predicate is less_than:
+                    for n in params[1:]:
+                        checks.add(add_check(bound_checks, (CHECK_AT_MOST, column(n), float(params[0]))))
+                elif c.predicate is greater_than:
+                    for n in params[1:]:
+                        checks.add(add_check(bound_checks, (CHECK_ABOVE, column(n), float(params[0]))))
+                elif c.predicate is at_least:
+                    for n in params[1:]:
+                        checks.add(add_check(bound_checks, (CHECK_AT_LEAST, column(n), float(params[0]))))
+                elif c.predicate is below:
+                    for n in params[1:]:
+                        checks.add(add_check(bound_checks, (CHECK_BELOW, column(n), float(params[0]))))
+                elif c.predicate is max_difference:
+                    for n in params[2:]:
+                        checks.add(add_check(difference_checks, (column(params[1]), column(n), float(params[0]))))
+                else:
+                    raise ValueError("Cannot compile constraint {} of command {}".format(c, cs.command))
+            command_checks.append(checks)
+            self.parameter_columns.append([column(p) for p in cs.parameters])
+
+            # joints used by the command as a bit mask for the greedy selection
+            mask = 0
+            for n in cs.joints:
+                mask |= 1 << JOINT_INDEX[n]
+            self.joint_masks.append(mask)
+
+        self.transform_joints = numpy.array(self.transform_joints, dtype=int)
+        self.transform_scales = numpy.array(self.transform_scales)
+        self.transform_offsets = numpy.array(self.transform_offsets)
+
+        # threshold checks grouped by kind: (check numbers, columns, thresholds)
+        self.bound_checks = []
+        for kind in CHECK_KINDS:
+            keys = [k for k in bound_checks if k[0] == kind]
+            self.bound_checks.append((numpy.array([bound_checks[k] for k in keys], dtype=int),
+                                      numpy.array([k[1] for k in keys], dtype=int),
+                                      numpy.array([k[2] for k in keys])))
+
+        keys = difference_checks.keys()
+        self.difference_checks = (numpy.array([difference_checks[k] for k in keys], dtype=int),
+                                  numpy.array([k[0] for k in keys], dtype=int),
+                                  numpy.array([k[1] for k in keys], dtype=int),
+                                  numpy.array([k[2] for k in keys]))
+
+        self.num_checks = len(bound_checks) + len(difference_checks)
+
+        # command x check incidence matrix
+        self.incidence = numpy.zeros((len(self.commands), self.num_checks), dtype=numpy.int32)
+        for i, checks in enumerate(command_checks):
+            self.incidence[i, list(checks)] = 1
+
+        # joint -> commands using it, as a dict and as a joint x command matrix
+        self.joint_commands = dict((n, []) for n in JOINT_NAMES)
+        self.joint_incidence = numpy.zeros((NUM_JOINTS, len(self.commands)), dtype=numpy.int32)
+        for i, cs in enumerate(self.commands):
+            for n in cs.joints:
+                self.joint_commands[n].append(i)
+                self.joint_incidence[JOINT_INDEX[n], i] = 1
+
+    def values(self, degrees):
+        """
+        Return an (N, number of value columns) array holding the joint angles in
+        degrees followed by the transformed values for each frame
+        """
+        degrees = numpy.atleast_2d(numpy.asarray(degrees, dtype=numpy.float64))
+        transformed = round_half_away(degrees[:, self.transform_joints] * self.transform_scales
+                                      + self.transform_offsets)
+        return numpy.hstack([degrees, transformed])
+
+    def checks(self, values):
+        """
+        Return an (N, number of checks) boolean array of the results of every
+        threshold check for each frame
+        """
+        result = numpy.zeros((len(values), self.num_checks), dtype=bool)
+        (numbers, columns, thresholds) = self.bound_checks[CHECK_AT_LEAST]
+        result[:, numbers] = values[:, columns] >= thresholds
+        (numbers, columns, thresholds) = self.bound_checks[CHECK_ABOVE]
+        result[:, numbers] = values[:, columns] > thresholds
+        (numbers, columns, thresholds) = self.bound_checks[CHECK_AT_MOST]
+        result[:, numbers] = values[:, columns] <= thresholds
+        (numbers, columns, thresholds) = self.bound_checks[CHECK_BELOW]
+        result[:, numbers] = values[:, columns] < thresholds
+        (numbers, first, second, max_diffs) = self.difference_checks
+        result[:, numbers] = numpy.abs(values[:, second] - values[:, first]) <= max_diffs
+        return result
+
+    def passes(self, values):
+        """
+        Return an (N, number of commands) boolean array of the commands whose
+        constraints all hold for each frame
+        """
+        failed = (~self.checks(values)).astype(numpy.int32)
+        return numpy.dot(failed, self.incidence.T) == 0
+
+    def candidates(self, changed):
+        """
+        Return an (N, number of commands) boolean array of the commands using
+        at least one changed joint, changed being an (N, NUM_JOINTS) mask
+        """
+        changed = numpy.atleast_2d(numpy.asarray(changed, dtype=numpy.int32))
+        return numpy.dot(changed, self.joint_incidence) > 0
+
+    def active_joints(self, degrees):
+        """
+        Return an (N, NUM_JOINTS) mask of the joints used by a command whose
+        constraints hold for each frame. detect() returns commands for a frame
+        exactly when one of its changed joints is active.
+        """
+        passed = self.passes(self.values(degrees)).astype(numpy.int32)
+        return numpy.dot(passed, self.joint_incidence.T) > 0
+
+    def select(self, matches):
+        """
+        Given the indices of the matching commands in table order return those
+        to emit, skipping commands whose joints are all used by an earlier one
+        """
+        selected = []
+        joints_done = 0
+        for i in matches:
+            mask = self.joint_masks[i]
+            if mask & ~joints_done:
+                joints_done |= mask
+                selected.append(i)
+        return selected
+
+    def detect(self, degrees, changed, frame_time=0):
+        """
+        Return the list of commands for each frame, degrees being an
+        (N, NUM_JOINTS) array of rounded joint angles in degrees and changed
+        the matching mask of changed joints
+        """
+        values = self.values(degrees)
+        matches = self.passes(values) & self.candidates(changed)
+
+        # matching commands of every frame as one flat list plus where each frame starts
+        (frames, commands) = numpy.nonzero(matches)
+        starts = numpy.searchsorted(frames, numpy.arange(len(values) + 1)).tolist()
+        commands = commands.tolist()
+        return [self.generate(self.select(commands[starts[i]:starts[i + 1]]), frame_values, frame_time)
+                for (i, frame_values) in enumerate(values.tolist())]
+
+    def generate(self, selected, frame_values, frame_time=0):
+        commands = []
+        cur_prefix = None
+        for i in selected:
+            cs = self.commands[i]
+            command_parameters = [frame_time]
+            command_parameters.extend(float(frame_values[c]) for c in self.parameter_columns[i])
+            if cur_prefix == cs.prefix:
+                commands.append((cs.command, command_parameters))
+            else:
+                commands.append(("{}.{}".format(cs.prefix, cs.command), command_parameters))
+            cur_prefix = cs.prefix
+        return commands
@@ -0,0 +1,57 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+from recorder.capture import FrameBuffer
+
+
+def fill(buf, count, start=0):
+    for i in range(start, start + count):
+        buf.append(float(i), [float(i)] * buf.width)
+
+
+class TestFrameBuffer(unittest.TestCase):
+
+    def test_empty_snapshot(self):
+        buf = FrameBuffer(10, 3)
+        times, frames = buf.snapshot()
+        self.assertEqual(len(buf), 0, "New buffer should be empty")
+        self.assertEqual(len(times), 0, "Snapshot of empty buffer should have no times")
+        self.assertEqual(frames.shape, (0, 3), "Snapshot of empty buffer should have no frames")
+
+    def test_partial_fill(self):
+        buf = FrameBuffer(10, 3)
+        fill(buf, 4)
+        times, frames = buf.snapshot()
+        self.assertEqual(list(times), [0.0, 1.0, 2.0, 3.0], "Frames should be in order written")
+        self.assertEqual(frames.shape, (4, 3), "Should get one row per frame")
+
+    def test_wrap_around_keeps_newest(self):
+        buf = FrameBuffer(5, 2)
+        fill(buf, 12)
+        times, frames = buf.snapshot()
+        self.assertEqual(len(buf), 5, "Buffer should never hold more than its capacity")
+        self.assertEqual(list(times), [7.0, 8.0, 9.0, 10.0, 11.0],
+                         "Snapshot should hold newest frames in chronological order")
+        self.assertEqual(list(frames[:, 0]), list(times), "Frames should match their timestamps")
+        self.assertEqual(buf.overwritten(), 7, "Undrained frames should be reported as overwritten")
+
+    def test_drain_returns_only_new_frames(self):
+        buf = FrameBuffer(5, 2)
+        fill(buf, 3)
+        times, _ = buf.drain()
+        self.assertEqual(list(times), [0.0, 1.0, 2.0], "First drain should return everything")
+        fill(buf, 4, 3)
+        times, _ = buf.drain()
+        self.assertEqual(list(times), [3.0, 4.0, 5.0, 6.0], "Second drain should return only new frames")
+        self.assertEqual(buf.overwritten(), 0, "Regular draining should not lose frames")
+        times, _ = buf.drain()
+        self.assertEqual(len(times), 0, "Drain with no new frames should be empty")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+from fluentnao.core.compiler import ScriptCache, ScriptError, compile_script
+
+
+class FakeLimb(object):
+
+    def __init__(self, nao, name):
+        self.nao = nao
+        self.name = name
+
+    def __getattr__(self, method):
+        def call(*args):
+            self.nao.calls.append((self.name + "." + method, args))
+            return self
+        return call
+
+
+class FakeNao(object):
+    # records the fluent calls made by a script
+
+    def __init__(self):
+        self.calls = []
+        self.arms = FakeLimb(self, "arms")
+        self.hands = FakeLimb(self, "hands")
+
+    def go(self):
+        self.calls.append(("go", ()))
+        return self
+
+
+class TestCompileScript(unittest.TestCase):
+
+    def test_runs_lines_with_and_without_prefix(self):
+        nao = FakeNao()
+        compile_script("nao.arms.up(1, -2.5).go()\n# comment\n\nhands.open()", "\n").run(nao)
+        self.assertEqual([("arms.up", (1, -2.5)), ("arms.go", ()), ("hands.open", ())], nao.calls,
+                         "Script lines should call the fluent API in order")
+
+    def test_syntax_error_line(self):
+        try:
+            compile_script("nao.arms.up()\nnao.arms.up(\nnao.go()", "\n")
+            self.fail("Syntax error should raise ScriptError")
+        except ScriptError as e:
+            self.assertEqual(2, e.line, "Error should report the bad line")
+
+    def test_rejects_other_code(self):
+        for line in ["arms.up(open('x'))", "arms.__class__", "arms.up(*args)",
+                     "arms.up(lambda: 1)", "arms.up([x for x in y])", "arms.up(x=1 if y else 2)"]:
+            self.assertRaises(ScriptError, compile_script, line, "\n")
+
+    def test_checks_surface(self):
+        nao = FakeNao()
+        compile_script("arms.up().go()\ngo()", "\n", nao)
+        for line in ["os.system('ls')", "legs.up()", "calls()"]:
+            self.assertRaises(ScriptError, compile_script, line, "\n", nao)
+
+    def test_runtime_error_line(self):
+        nao = FakeNao()
+        script = compile_script("nao.go()\nnao.missing()", "\n")
+        try:
+            script.run(nao)
+            self.fail("Calling a missing method should raise ScriptError")
+        except ScriptError as e:
+            self.assertEqual(2, e.line, "Error should report the line that failed")
+        self.assertEqual([("go", ())], nao.calls, "Lines before the error should have run")
+
+
+class TestScriptCache(unittest.TestCase):
+
+    def test_same_script_compiled_once(self):
+        cache = ScriptCache(2)
+        first = cache.get("nao.go()", ";")
+        self.assertTrue(first is cache.get("nao.go()", ";"), "Same text should reuse the compiled script")
+        self.assertFalse(first is cache.get("nao.go()", "\n"), "Different separator is a different script")
+        self.assertFalse(first is cache.get("nao.go()", ";", FakeNao()), "Different robot is a different script")
+
+    def test_bounded(self):
+        cache = ScriptCache(2)
+        for i in range(5):
+            cache.get("nao.arms.up(%s)" % i)
+        self.assertEqual(2, len(cache.scripts), "Cache should keep at most size scripts")
+
+    def test_errors_not_cached(self):
+        cache = ScriptCache(2)
+        self.assertRaises(ScriptError, cache.get, "nao.(")
+        self.assertEqual(0, len(cache.scripts), "Scripts with errors should not be cached")
+
+
+if __name__ == '__main__':
+    unittest.main()
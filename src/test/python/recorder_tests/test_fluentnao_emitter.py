@@ -0,0 +1,69 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+from StringIO import StringIO
+
+from translators.fluentnao.core import FluentNaoTranslator
+from translators.fluentnao.emitter import CodeEmitter
+
+
+class RecordingWriter(object):
+    # keeps each fragment written so tests can check nothing is rebuilt
+    def __init__(self):
+        self.fragments = []
+
+    def write(self, text):
+        self.fragments.append(text)
+
+
+class TestWriteCommands(unittest.TestCase):
+
+    def test_matches_commands_to_text(self):
+        translator = FluentNaoTranslator()
+        commands = [("arms.left_forward", [0, 0, 0]), ("right_forward", [0, 1.0, -2.0])]
+        output = StringIO()
+        translator.write_commands(output, commands, is_blocking=True, fluentnao="nao.")
+        self.assertEqual("nao.arms.left_forward(0,0,0).right_forward(0,1.0,-2.0).go()", output.getvalue(),
+                         "Streamed text should match the joined text")
+        self.assertEqual(output.getvalue(), translator.commands_to_text(commands, True, "nao."),
+                         "commands_to_text should produce the same text")
+
+    def test_no_commands_writes_nothing(self):
+        writer = RecordingWriter()
+        FluentNaoTranslator().write_commands(writer, [], is_blocking=True, fluentnao="nao.")
+        self.assertEqual([], writer.fragments, "Nothing should be written for no commands")
+
+
+class TestCodeEmitter(unittest.TestCase):
+
+    def test_lines_are_separated(self):
+        output = StringIO()
+        emitter = CodeEmitter(output)
+        emitter.emit([("hands.open", [0])])
+        emitter.emit([])
+        emitter.emit([("hands.close", [0])])
+        self.assertEqual("nao.hands.open(0).go()\r\nnao.hands.close(0).go()", output.getvalue(),
+                         "Each non-empty command list should be written on its own line")
+        self.assertEqual(2, emitter.lines, "Empty command lists should not count as lines")
+
+    def test_leading_separator(self):
+        output = StringIO()
+        emitter = CodeEmitter(output, leading_separator=True)
+        emitter.emit_text("nao.go()")
+        self.assertEqual("\r\nnao.go()", output.getvalue(), "Should separate from existing code")
+
+    def test_emit_timeline(self):
+        writer = RecordingWriter()
+        emitter = CodeEmitter(writer, is_blocking=False, fluentnao=None)
+        timeline = [(0.0, [("hands.open", [0])]) for _ in range(1000)]
+        self.assertEqual(1000, emitter.emit_timeline(timeline), "Should write a line per timeline entry")
+        self.assertEqual("hands.open(0)", writer.fragments[0], "Fragments should be written as generated")
+        self.assertEqual(1999, len(writer.fragments), "Should write one fragment per line plus separators")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import math
+import threading
+import time
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend
+from fluentnao.core.futures import TaskFuture, TaskTimeout, TaskCancelled, gather
+from fluentnao.nao import Nao
+from recorder.core import Robot, JOINT_NAMES
+from recorder.capture import JointCapture
+
+# the offline robot runs this many times faster than a real one
+SPEED = 10.0
+
+
+def blocked_until_cancelled(release):
+    # a call that returns once cancelled and then release is set
+    def run(future):
+        cancelled = threading.Event()
+        future.on_cancel(cancelled.set)
+        cancelled.wait(5)
+        release.wait(5)
+        return "returned"
+    return run
+
+
+class TestTaskFuture(unittest.TestCase):
+
+    def test_result(self):
+        self.assertEqual(3, TaskFuture(lambda f: 1 + 2).result(1), "Result should be the value returned")
+
+        def fail(future):
+            raise ValueError("bad")
+        future = TaskFuture(fail)
+        self.assertRaises(ValueError, future.result, 1)
+        self.assertTrue(isinstance(future.exception(1), ValueError), "Exception should be returned")
+
+    def test_timeout(self):
+        release = threading.Event()
+        future = TaskFuture(lambda f: release.wait(5))
+        self.assertRaises(TaskTimeout, future.result, 0.05)
+        self.assertFalse(future.done(), "Future should still be running")
+        release.set()
+        future.result(1)
+        self.assertTrue(future.done(), "Future should have finished")
+
+    def test_callbacks(self):
+        release = threading.Event()
+        called = []
+        dispatched = []
+
+        def dispatch(function):
+            dispatched.append(True)
+            function()
+        future = TaskFuture(lambda f: release.wait(5), dispatch)
+        future.add_done_callback(lambda f: called.append("before"))
+        self.assertEqual([], called, "Callback should wait for the future")
+        release.set()
+        future.result(1)
+        future.add_done_callback(lambda f: called.append("after"))
+        self.assertEqual(["before", "after"], called, "Callbacks should run on finishing or straight away")
+        self.assertEqual(2, len(dispatched), "Callbacks should be run through dispatch")
+
+    def test_cancel_waits_for_call(self):
+        release = threading.Event()
+        called = []
+        future = TaskFuture(blocked_until_cancelled(release))
+        future.add_done_callback(lambda f: called.append(True))
+
+        self.assertTrue(future.cancel(), "Running future should be cancelled")
+        self.assertTrue(future.cancelled(), "Future should be marked cancelled")
+        time.sleep(0.05)
+        self.assertFalse(future.done(), "Future should not finish before the call returns")
+        self.assertEqual([], called, "Callbacks should not run before the call returns")
+
+        release.set()
+        self.assertRaises(TaskCancelled, future.result, 1)
+        self.assertEqual([True], called, "Callbacks should run once the call returns")
+        self.assertFalse(future.cancel(), "Finished future cannot be cancelled")
+
+    def test_cancel_stops_tasks(self):
+        backend = OfflineBackend(speed=SPEED)
+        try:
+            motion = make_environment(None, backend=backend).motion
+            started = threading.Event()
+
+            def run(future):
+                future.task(motion, motion.post.angleInterpolation("HeadYaw", 1.0, 5.0, True))
+                started.set()
+                # tasks started after cancel() are stopped straight away
+                taskId = future.task(motion, motion.post.angleInterpolation("HeadPitch", 0.4, 5.0, True))
+                motion.wait(taskId, 0)
+            future = TaskFuture(run)
+            started.wait(1)
+            future.cancel()
+            self.assertRaises(TaskCancelled, future.result, 1)
+            self.assertTrue(motion.getAngles("HeadYaw", True)[0] < 0.5, "Head should stop part way")
+        finally:
+            backend.shutdown()
+
+
+class TestGather(unittest.TestCase):
+
+    def test_results_in_order(self):
+        futures = [TaskFuture(lambda f, d=d: time.sleep(d) or d) for d in (0.05, 0.0, 0.02)]
+        self.assertEqual([0.05, 0.0, 0.02], gather(futures, 1), "Results should be in the order given")
+
+    def test_timeout_cancels(self):
+        release = threading.Event()
+        slow = TaskFuture(blocked_until_cancelled(release))
+        fast = TaskFuture(lambda f: "fast")
+        self.assertRaises(TaskTimeout, gather, [fast, slow], 0.05, True)
+        self.assertTrue(slow.cancelled(), "Futures still running should be cancelled")
+        self.assertFalse(fast.cancelled(), "Finished futures should not be cancelled")
+        release.set()
+        self.assertRaises(TaskCancelled, slow.result, 1)
+
+
+class TestAsyncNao(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=SPEED)
+        self.nao = Nao(make_environment(None, backend=self.backend), metadata_cache_dir=None)
+        self.background = self.nao.background
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def shoulder(self):
+        return math.degrees(self.nao.env.motion.getAngles("LShoulderPitch", True)[0])
+
+    def test_say(self):
+        speech = self.background.say("hello there")
+        speech.result(5)
+        self.assertEqual(["hello there"], self.backend.modules['ALTextToSpeech'].spoken, "Text should be spoken")
+
+    def test_go(self):
+        self.nao.arms.up(2)
+        moving = self.background.go()
+        self.assertFalse(moving.done(), "go() should not block")
+        moving.result(5)
+        self.assertAlmostEqual(-90, self.shoulder(), 3, "Arms should be up once the future completes")
+        self.assertEqual([], self.nao.scheduler.running(), "Finished tasks should be forgotten")
+
+    def test_cancel_go(self):
+        start = self.shoulder()
+        self.nao.arms.up(5)
+        moving = self.background.go()
+        time.sleep(0.1)
+        moving.cancel()
+        self.assertRaises(TaskCancelled, moving.result, 1)
+        self.assertTrue(-90 < self.shoulder() < start, "Arms should stop part way")
+
+    def test_cancel_sleep(self):
+        start = time.time()
+        sleeping = self.background.sleep(5)
+        sleeping.cancel()
+        self.assertRaises(TaskCancelled, sleeping.result, 1)
+        self.assertTrue(time.time() - start < 1, "Cancelled sleep should end early")
+
+    def test_cancel_script(self):
+        start = self.shoulder()
+        script = self.background.run_script("arms.up(5);go();arms.down(5);go()")
+        time.sleep(0.1)
+        script.cancel()
+        self.assertRaises(TaskCancelled, script.result, 1)
+        angle = self.shoulder()
+        time.sleep(0.2)
+        self.assertEqual(angle, self.shoulder(), "Script should not move the robot once cancelled")
+        self.assertTrue(-90 < angle < start, "First move should stop part way")
+        self.assertTrue(self.nao.plan.is_empty(), "Nothing should be left in the plan")
+
+
+class StatusDisplay(object):
+    def add_status(self, message):
+        pass
+
+
+class TestRobotRecognition(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=SPEED)
+        self.robot = Robot(StatusDisplay(), metadata_cache_dir=None)
+        self.robot.connect(None, None, backend=self.backend)
+
+    def tearDown(self):
+        self.robot.disconnect()
+
+    def listening(self):
+        return "WordRecognized" in self.backend.callbacks
+
+    def test_overlapping_speech(self):
+        first = self.robot.safe_say("one")
+        second = self.robot.safe_say("two three four five six seven")
+        self.assertFalse(self.listening(), "Recognition should be off while speaking")
+        first.result(5)
+        self.assertFalse(self.listening(), "Recognition should stay off until all speech has finished")
+        second.result(5)
+        time.sleep(0.05)
+        self.assertTrue(self.listening(), "Recognition should be back on after the speech")
+
+    def test_cancelled_script(self):
+        script = self.robot.run_script("arms.up(5)\ngo()")
+        time.sleep(0.1)
+        script.cancel()
+        self.assertRaises(TaskCancelled, script.result, 1)
+        time.sleep(0.05)
+        self.assertTrue(self.listening(), "Recognition should be back on once the script has stopped")
+
+    def test_exit_says_goodbye_first(self):
+        self.robot._nao_exit()
+        self.assertEqual(["bye bye"], self.backend.modules['ALTextToSpeech'].spoken, "Goodbye should be said")
+        self.assertFalse(self.robot.is_connected(), "Robot should be disconnected")
+        self.assertFalse(self.listening(), "Recognition should not be turned back on after disconnecting")
+
+
+class TestRobotPlayback(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=SPEED)
+        self.robot = Robot(StatusDisplay(), metadata_cache_dir=None)
+        self.robot.connect(None, None, backend=self.backend)
+        self.motion = self.robot.nao.env.motion
+
+    def tearDown(self):
+        self.robot.disconnect()
+
+    def capture(self, count):
+        # the left shoulder moving to -1 over count frames, enough frames to need several chunks
+        motion = self.robot.nao.env.motion
+        capture = JointCapture(motion, JOINT_NAMES, capacity=count)
+        start = motion.getAngles(JOINT_NAMES, True)
+        shoulder = JOINT_NAMES.index("LShoulderPitch")
+        for i in range(count):
+            angles = list(start)
+            angles[shoulder] += (-1.0 - start[shoulder]) * (i + 1) / float(count)
+            capture.buffer.append(i * 0.02, angles)
+        self.robot.capture = capture
+
+    def shoulder(self):
+        return self.motion.getAngles("LShoulderPitch", True)[0]
+
+    def test_play_capture_does_not_block(self):
+        self.capture(200)
+        start = time.time()
+        playing = self.robot.play_capture()
+        elapsed = time.time() - start
+        self.assertTrue(elapsed < 0.1, "Playback should be queued in the background, blocked for {}s".format(elapsed))
+        self.assertFalse(playing.done(), "Playback should still be running")
+        playing.result(5)
+        self.assertAlmostEqual(-1.0, self.shoulder(), 3, "Every chunk should be played")
+
+    def test_cancel_capture(self):
+        self.capture(200)
+        start = self.shoulder()
+        playing = self.robot.play_capture()
+        time.sleep(0.1)
+        playing.cancel()
+        self.assertRaises(TaskCancelled, playing.result, 1)
+        angle = self.shoulder()
+        time.sleep(0.3)
+        self.assertEqual(angle, self.shoulder(), "Later chunks should not be played once cancelled")
+        self.assertTrue(-1.0 < angle <= start, "Playback should stop part way")
+
+
+if __name__ == "__main__":
+    unittest.main()
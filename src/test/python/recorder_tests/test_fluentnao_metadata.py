@@ -0,0 +1,99 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend, BODY_JOINTS, JOINT_LIMITS
+from naoutil.metrics import RpcCounter, rpc_budget
+from fluentnao.core.metadata import BODY_ID_KEY, CACHE_VERSION
+from fluentnao.nao import Nao
+from recorder.core import Robot
+
+
+class StatusDisplay(object):
+    def add_status(self, message):
+        pass
+
+
+class TestJointMetadata(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.backend = OfflineBackend(speed=50)
+        self.counter = RpcCounter()
+
+    def tearDown(self):
+        self.backend.shutdown()
+        shutil.rmtree(self.dir)
+
+    def make_nao(self):
+        env = make_environment(None, backend=self.backend, recorder=self.counter)
+        return Nao(env, metadata_cache_dir=self.dir)
+
+    def cache_files(self):
+        return os.listdir(self.dir)
+
+    def test_fetched_once_then_cached(self):
+        metadata = self.make_nao().metadata.load()
+        self.assertEqual(BODY_JOINTS, metadata.joint_names("Body"), "Body joint names should be fetched")
+        self.assertEqual(JOINT_LIMITS['HeadYaw'], metadata.joint_limits("HeadYaw"), "Limits should be fetched")
+        self.assertEqual(1, len(self.cache_files()), "Metadata should be saved for the robot")
+
+        with rpc_budget(self.counter, 0, methods=["ALMotion.getJointNames", "ALMotion.getLimits"]):
+            cached = self.make_nao().metadata.load()
+            self.assertEqual(BODY_JOINTS, cached.joint_names("Body"), "Names should be read from disk")
+            self.assertEqual(JOINT_LIMITS['LElbowRoll'], cached.joint_limits("LElbowRoll"),
+                             "Limits should be read from disk")
+
+    def test_old_cache_is_refetched(self):
+        self.make_nao().metadata.load()
+        path = os.path.join(self.dir, self.cache_files()[0])
+        with open(path, "w") as f:
+            json.dump({"version": CACHE_VERSION - 1, "chains": {}, "limits": {}}, f)
+
+        metadata = self.make_nao().metadata.load()
+        self.assertEqual(BODY_JOINTS, metadata.joint_names("Body"), "Old cache version should be ignored")
+
+    def test_no_robot_id_is_not_cached(self):
+        del self.backend.modules['ALMemory'].data[BODY_ID_KEY]
+        metadata = self.make_nao().metadata.load()
+        self.assertEqual(None, metadata.cache_path(), "Unidentified robot should have no cache file")
+        self.assertEqual([], self.cache_files(), "Nothing should be saved for an unidentified robot")
+        self.assertEqual(BODY_JOINTS, metadata.joint_names("Body"), "Metadata should still be fetched")
+
+    def test_caching_disabled(self):
+        env = make_environment(None, backend=self.backend)
+        metadata = Nao(env, metadata_cache_dir=None).metadata.load()
+        self.assertEqual(None, metadata.cache_path(), "No cache directory should mean no cache file")
+        self.assertEqual(BODY_JOINTS, metadata.joint_names("Body"), "Metadata should still be fetched")
+
+    def test_fraction_max_speed(self):
+        nao = self.make_nao()
+        current = math.degrees(nao.env.motion.getAngles("HeadYaw", False)[0])
+        max_speed = math.degrees(JOINT_LIMITS['HeadYaw'][2])
+        self.assertAlmostEqual(max_speed, nao.get_max_degrees_per_second("HeadYaw"), 6,
+                               "Max speed should come from the joint limits")
+        expected = abs(current - 30) / (max_speed * 2.0)
+        self.assertAlmostEqual(expected, nao.get_fraction_max_speed("HeadYaw", 30, 2.0), 6,
+                               "Fraction should cover the distance in the time given")
+
+    def test_robot_uses_given_directory(self):
+        robot = Robot(StatusDisplay(), metadata_cache_dir=self.dir)
+        robot.connect(None, None, backend=self.backend)
+        try:
+            self.assertEqual(1, len(self.cache_files()), "Robot should save metadata in the given directory")
+        finally:
+            robot.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
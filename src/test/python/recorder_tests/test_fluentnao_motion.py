@@ -0,0 +1,104 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import math
+import time
+import unittest
+
+import numpy
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend
+from fluentnao.nao import Nao
+from recorder.core import JOINT_NAMES
+from translators.fluentnao.core import FluentNaoTranslator
+from translators.fluentnao.motion import MotionTranslator, MotionProgram, MotionStep
+from testutil import POSITION_ZERO, POSITION_ARMS_UP, POSITION_HANDS_OPEN, make_joint_dict
+
+
+class TestMotionTranslator(unittest.TestCase):
+
+    def test_compile_commands(self):
+        step = MotionTranslator().compile_commands([("arms.forward", [0, 0.0, 0.0]), ("hands.open", [0])])
+        targets = dict(zip(step.names, step.angle_lists))
+        self.assertEqual(set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll', 'LHand', 'RHand']),
+                         set(step.names), "Step should move every joint used by the commands")
+        self.assertAlmostEqual(1.0, targets['LHand'][0], 6, "Hands open should target 1.0")
+        self.assertEqual([[1.5]] * len(step.names), step.time_lists, "Commands should take the default duration")
+
+    def test_prefix_carries_over(self):
+        step = MotionTranslator().compile_commands([("arms.left_up", [0, 0.0, 0.0]), ("right_up", [2, 0.0, 0.0])])
+        times = dict(zip(step.names, step.time_lists))
+        self.assertEqual([2], times['RShoulderPitch'], "Unprefixed command should use the previous prefix")
+        self.assertAlmostEqual(-math.pi / 2, step.angle_lists[step.names.index('LShoulderPitch')][0], 6,
+                               "Arms up should target -90 degrees")
+
+    def test_unknown_command(self):
+        translator = MotionTranslator()
+        self.assertRaises(ValueError, translator.compile_commands, [("arms.wave", [0])])
+        self.assertRaises(ValueError, translator.compile_commands, [("arms.left_stiff", [])])
+        self.assertRaises(ValueError, translator.compile_commands, [("go", [])])
+
+    def test_matches_generated_code(self):
+        # translate poses, then compile the detected commands
+        translator = FluentNaoTranslator()
+        frames = numpy.array([POSITION_ZERO, POSITION_ARMS_UP, POSITION_HANDS_OPEN])
+        timeline = translator.translate_timeline([0.0, 2.0, 3.0], frames)
+        program = MotionTranslator().compile_timeline(timeline, use_times=True)
+        self.assertEqual(len(timeline), len(program), "Should get a step per keyframe")
+        self.assertEqual([1.5, 2.0, 1.0], [program.step_duration(s) for s in program],
+                         "Steps should take as long as the gap between keyframes")
+
+
+class TestMotionProgram(unittest.TestCase):
+
+    def test_to_trajectory(self):
+        program = MotionProgram([MotionStep(['HeadYaw', 'LHand'], [[0.5], [1.0]], [[1.0], [2.0]]),
+                                 MotionStep(['HeadYaw'], [[0.0]], [[1.5]])])
+        (names, angle_lists, time_lists) = program.to_trajectory()
+        self.assertEqual(['HeadYaw', 'LHand'], names, "Joints should be listed in order first used")
+        self.assertEqual([[0.5, 0.5, 0.0], [1.0]], angle_lists,
+                         "Angles should be concatenated per joint, held at the start of each step")
+        self.assertEqual([[1.0, 2.0, 3.5], [2.0]], time_lists,
+                         "Each step should start after the slowest joint of the previous step")
+        self.assertEqual(3.5, program.duration(), "Duration should be the sum of the step durations")
+
+    def test_idle_joints_are_held(self):
+        # arms up, head left, head right, arms down
+        program = MotionProgram([MotionStep(['LShoulderPitch'], [[-1.5]], [[1.5]]),
+                                 MotionStep(['HeadYaw'], [[0.5]], [[1.5]]),
+                                 MotionStep(['HeadYaw'], [[-0.5]], [[1.5]]),
+                                 MotionStep(['LShoulderPitch'], [[1.5]], [[1.5]])])
+        (names, angle_lists, time_lists) = program.to_trajectory({'LShoulderPitch': 0.2, 'HeadYaw': 0.1})
+        keys = dict((n, zip(t, a)) for (n, a, t) in zip(names, angle_lists, time_lists))
+        self.assertEqual([(1.5, -1.5), (4.5, -1.5), (6.0, 1.5)], keys['LShoulderPitch'],
+                         "Arms should stay up while the head moves")
+        self.assertEqual([(1.5, 0.1), (3.0, 0.5), (4.5, -0.5)], keys['HeadYaw'],
+                         "Head should stay where it is until its own step")
+
+    def test_play_holds_current_angles(self):
+        backend = OfflineBackend(speed=50)
+        try:
+            nao = Nao(make_environment(None, backend=backend), metadata_cache_dir=None)
+            motion = nao.env.motion
+            yaw = motion.getAngles('HeadYaw', True)[0]
+            program = MotionProgram([MotionStep(['LShoulderPitch'], [[-1.0]], [[1.5]]),
+                                     MotionStep(['HeadYaw'], [[0.5]], [[1.5]])])
+            program.play(nao)
+            time.sleep(1.0 / 50)
+            self.assertAlmostEqual(yaw, motion.getAngles('HeadYaw', True)[0], 6,
+                                   "Head should not move during the first step")
+            nao.go()
+            self.assertAlmostEqual(0.5, motion.getAngles('HeadYaw', True)[0], 6, "Head should reach its target")
+        finally:
+            backend.shutdown()
+
+    def test_empty_program(self):
+        self.assertEqual(([], [], []), MotionProgram().to_trajectory(), "Empty program has no joints")
+
+
+if __name__ == '__main__':
+    unittest.main()
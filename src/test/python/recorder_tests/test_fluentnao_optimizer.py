@@ -0,0 +1,79 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+from translators.fluentnao.core import FluentNaoTranslator
+from translators.fluentnao.optimizer import ScriptOptimizer
+
+
+class TestMergeCommands(unittest.TestCase):
+
+    def setUp(self):
+        self.optimizer = ScriptOptimizer()
+
+    def test_merges_matching_sides(self):
+        commands = [("arms.right_forward", [0, 10.0, 5.0]), ("left_forward", [0, 12.0, 4.0])]
+        self.assertEqual([("arms.forward", [0, 12.0, 4.0])], self.optimizer.optimize_commands(commands),
+                         "left & right within tolerance should merge, keeping the left parameters")
+
+    def test_keeps_sides_outside_tolerance(self):
+        commands = [("arms.right_forward", [0, 10.0, 5.0]), ("left_forward", [0, 30.0, 5.0])]
+        self.assertEqual(commands, self.optimizer.optimize_commands(commands),
+                         "sides differing by more than the tolerance should not merge")
+
+    def test_merge_keeps_prefixes_correct(self):
+        commands = [("arms.right_up", [0, 0.0, 0.0]), ("left_up", [0, 1.0, 0.0]),
+                    ("hands.right_open", [0]), ("left_close", [0])]
+        self.assertEqual([("arms.up", [0, 1.0, 0.0]), ("hands.right_open", [0]), ("left_close", [0])],
+                         self.optimizer.optimize_commands(commands),
+                         "unmerged commands should keep a valid prefix")
+
+    def test_merged_text(self):
+        commands = self.optimizer.optimize_commands([("hands.right_close", [0]), ("left_close", [0])])
+        self.assertEqual("nao.hands.close(0).go()",
+                         FluentNaoTranslator().commands_to_text(commands, True, "nao."),
+                         "merged command should generate the combined call")
+
+
+class TestOptimizeTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.optimizer = ScriptOptimizer()
+
+    def test_drops_unchanged_commands(self):
+        timeline = [(0.0, [("arms.left_up", [0, 0.0, 0.0]), ("hands.left_open", [0])]),
+                    (1.0, [("arms.left_up", [0, 2.0, 0.0]), ("hands.left_close", [0])])]
+        self.assertEqual([(0.0, [("arms.left_up", [0, 0.0, 0.0]), ("hands.left_open", [0])]),
+                          (1.0, [("hands.left_close", [0])])],
+                         self.optimizer.optimize(timeline),
+                         "commands repeating the last move of their joints should be dropped")
+
+    def test_folds_repeated_frames_into_wait(self):
+        frame = [("arms.left_up", [0, 0.0, 0.0])]
+        timeline = [(0.0, frame), (0.5, frame), (1.5, frame), (2.0, [("arms.left_down", [0, 0.0, 0.0])])]
+        self.assertEqual([(0.0, frame), (0.5, [("wait", [1.5])]), (2.0, [("arms.left_down", [0, 0.0, 0.0])])],
+                         self.optimizer.optimize(timeline),
+                         "repeated frames should become one wait for the time they covered")
+
+    def test_trailing_repeats_dropped(self):
+        frame = [("arms.left_up", [0, 0.0, 0.0])]
+        self.assertEqual([(0.0, frame)], self.optimizer.optimize([(0.0, frame), (1.0, frame)]),
+                         "repeats at the end need no wait")
+
+    def test_without_waits(self):
+        frame = [("arms.left_up", [0, 0.0, 0.0])]
+        optimizer = ScriptOptimizer(fold_waits=False)
+        timeline = [(0.0, frame), (1.0, frame), (2.0, [("arms.left_down", [0, 0.0, 0.0])])]
+        self.assertEqual(2, len(optimizer.optimize(timeline)), "repeats should be dropped without a wait")
+
+    def test_wait_text(self):
+        text = FluentNaoTranslator().commands_to_text([("wait", [1.5])], True, "nao.")
+        self.assertEqual("nao.wait(1.5).go()", text, "wait should be called on the robot")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend
+from fluentnao.core.playback import split_trajectory, chunk_boundaries, bezier_control_points, BEZIER_HANDLE
+from fluentnao.nao import Nao
+
+
+def make_trajectory(joints=3, keys=100, step=0.02):
+    # every joint keyed at the same times, apart from the last which is keyed half as often
+    names = ["J%s" % i for i in range(joints)]
+    times = [step * (k + 1) for k in range(keys)]
+    time_lists = [list(times) for _ in range(joints - 1)] + [times[1::2]]
+    angle_lists = [[0.01 * k for k in range(len(t))] for t in time_lists]
+    return (names, angle_lists, time_lists)
+
+
+class TestSplitTrajectory(unittest.TestCase):
+
+    def test_chunks_within_max_keys(self):
+        (names, angle_lists, time_lists) = make_trajectory()
+        for max_keys in (6, 10, 37, 100, 1000):
+            for (chunk_names, chunk_angles, chunk_times) in split_trajectory(names, angle_lists, time_lists,
+                                                                            max_keys):
+                keys = sum(len(a) for a in chunk_angles)
+                self.assertTrue(keys <= max_keys, "Chunk has {} keys, max is {}".format(keys, max_keys))
+                self.assertEqual([len(a) for a in chunk_angles], [len(t) for t in chunk_times],
+                                 "Each key should have a time")
+
+    def test_single_chunk(self):
+        (names, angle_lists, time_lists) = make_trajectory(keys=10)
+        chunks = split_trajectory(names, angle_lists, time_lists, 1000)
+        self.assertEqual([(names, angle_lists, time_lists)], chunks, "Short trajectory should not be split")
+
+    def test_boundaries_line_up(self):
+        (names, angle_lists, time_lists) = make_trajectory()
+        boundaries = chunk_boundaries(time_lists, 20)
+        chunks = split_trajectory(names, angle_lists, time_lists, 20)
+        self.assertEqual(len(boundaries), len(chunks), "Each boundary should end a chunk")
+        start = 0.0
+        for ((chunk_names, chunk_angles, chunk_times), end) in zip(chunks, boundaries):
+            for times in chunk_times:
+                self.assertAlmostEqual(end - start, times[-1], 9, "Every joint should reach the boundary")
+            start = end
+
+    def test_times_rebased(self):
+        (names, angle_lists, time_lists) = make_trajectory()
+        chunks = split_trajectory(names, angle_lists, time_lists, 20)
+        self.assertTrue(len(chunks) > 2, "Trajectory should be split")
+        for (chunk_names, chunk_angles, chunk_times) in chunks:
+            for times in chunk_times:
+                self.assertTrue(times[0] > 0 and times == sorted(times),
+                                "Times should be increasing from the start of the chunk")
+            self.assertTrue(max(t[-1] for t in chunk_times) <= 20 * 0.02,
+                            "Times should be relative to the chunk")
+
+    def test_boundary_key_interpolated(self):
+        names = ["A", "B"]
+        angle_lists = [[0.1, 0.2, 0.3, 0.4], [0.0, 1.0]]
+        time_lists = [[1.0, 2.0, 3.0, 4.0], [1.0, 4.0]]
+        chunks = split_trajectory(names, angle_lists, time_lists, 5)
+        (chunk_names, chunk_angles, chunk_times) = chunks[0]
+        self.assertEqual([[1.0, 2.0], [1.0, 2.0]], chunk_times, "B should get a key at the boundary")
+        self.assertAlmostEqual(1.0 / 3.0, chunk_angles[1][1], 9, "Boundary key should be interpolated")
+
+    def test_max_keys_too_small(self):
+        (names, angle_lists, time_lists) = make_trajectory()
+        self.assertRaises(ValueError, split_trajectory, names, angle_lists, time_lists, 5)
+
+
+class TestBezier(unittest.TestCase):
+
+    def test_control_points(self):
+        points = bezier_control_points([0.0, 0.5, 1.0], [0.3, 0.9, 1.2])
+        self.assertEqual(3, len(points), "Each key should have a control point")
+        self.assertEqual(0.5, points[1][0], "Control point should start with the angle")
+        self.assertEqual([BEZIER_HANDLE, -0.2, 0.0], [round(v, 9) for v in points[1][1]],
+                         "Left handle should reach a third of the way back")
+        self.assertEqual([BEZIER_HANDLE, 0.1, 0.0], [round(v, 9) for v in points[1][2]],
+                         "Right handle should reach a third of the way forward")
+        self.assertAlmostEqual(-0.1, points[0][1][1], 9, "First key should reach back to the start")
+
+    def test_bezier_playback(self):
+        backend = OfflineBackend(speed=50)
+        try:
+            nao = Nao(make_environment(None, backend=backend), metadata_cache_dir=None)
+            nao.playback.trajectory(["HeadYaw"], [[0.2, 0.5]], [[0.5, 1.0]], bezier=True)
+            nao.go()
+            self.assertAlmostEqual(0.5, nao.env.motion.getAngles("HeadYaw", True)[0], 6,
+                                   "Joint should reach the last key")
+        finally:
+            backend.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
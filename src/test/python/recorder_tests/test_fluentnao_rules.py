@@ -0,0 +1,579 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import random
+import time
+import unittest
+
+import numpy
+
+from recorder.core import JOINT_NAMES, JOINT_MOVE_AMOUNT, joints_to_degrees
+from recorder.pose import Pose
+from translators.fluentnao.core import FluentNaoTranslator, COMMANDS, DEFAULT_FRAME_TIME
+from translators.fluentnao.cache import LRUCache
+from translators.fluentnao.rules import RuleSet, CommandSpec, SymmetricSpec, Constraint, Transform, linear, \
+    greater_than, less_than, in_range, max_difference, \
+    left_command, right_command, combined_command
+from testutil import POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT, POSITION_HANDS_RIGHT_OPEN_LEFT_CLOSE, \
+    POSITION_ELBOWS_BENT_TURN_UP, make_joint_dict
+
+
+# the COMMANDS table as it was written out by hand before the arm & hand
+# commands were generated from SymmetricSpecs
+HAND_WRITTEN_COMMANDS = [CommandSpec('forward', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
+                                     Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [-45, 45, 'LShoulderPitch']),
+                                      Constraint(less_than, [46, 'LShoulderRoll']),
+                                     Constraint(max_difference, [10, 'lpitch', 'rpitch']),
+                                     Constraint(max_difference, [10, 'lroll', 'rroll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('out', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, -90]),
+                                     Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, -90])],
+                                    [Constraint(greater_than, [44, 'LShoulderRoll']),
+                                     Constraint(max_difference, [10, 'lroll', 'rroll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('up', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, -90]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
+                                     Transform(linear, 'RShoulderPitch', 'rpitch', [-1, -90]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [-110, -45, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll']),
+                                     Constraint(max_difference, [10, 'lpitch', 'rpitch']),
+                                     Constraint(max_difference, [10, 'lroll', 'rroll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('down', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 90]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
+                                     Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 90]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [46, 95, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll']),
+                                     Constraint(max_difference, [10, 'lpitch', 'rpitch']),
+                                     Constraint(max_difference, [10, 'lroll', 'rroll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('back', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 119.5]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0]),
+                                     Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 119.5]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [96, 119.5, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll']),
+                                     Constraint(max_difference, [10, 'lpitch', 'rpitch']),
+                                     Constraint(max_difference, [10, 'lroll', 'rroll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('bent', 'elbows',
+                                    set(['LElbowRoll', 'RElbowRoll']),
+                                    [Transform(linear, 'LElbowRoll', 'lroll', [1, 89]),
+                                     Transform(linear, 'RElbowRoll', 'rroll', [1, -89])],
+                                    [Constraint(less_than, [-43, 'LElbowRoll']),
+                                      Constraint(greater_than, [43, 'RElbowRoll'])],
+                                    ['rroll']
+                                    ),
+                        CommandSpec('straight', 'elbows',
+                                    set(['LElbowRoll', 'RElbowRoll']),
+                                    [Transform(linear, 'LElbowRoll', 'lroll', [1, -0.5]),
+                                     Transform(linear, 'RElbowRoll', 'rroll', [1, 0.5])],
+                                    [Constraint(less_than, [43, 'LElbowRoll']),
+                                      Constraint(less_than, [43, 'RElbowRoll'])],
+                                    ['rroll']
+                                    ),
+                        CommandSpec('turn_up', 'elbows',
+                                    set(['LElbowYaw', 'RElbowYaw']),
+                                    [Transform(linear, 'LElbowYaw', 'lyaw', [-1, -90]),
+                                     Transform(linear, 'RElbowYaw', 'ryaw', [1, -90])],
+                                    [Constraint(greater_than, [45, 'RElbowYaw']),
+                                      Constraint(less_than, [-45, 'LElbowYaw'])],
+                                    ['ryaw']
+                                    ),
+                        CommandSpec('turn_in', 'elbows',
+                                    set(['LElbowYaw', 'RElbowYaw']),
+                                    [Transform(linear, 'LElbowYaw', 'lyaw', [-1, 0]),
+                                     Transform(linear, 'RElbowYaw', 'ryaw', [1, 0])],
+                                    [Constraint(in_range, [-44, 44, 'RElbowYaw']),
+                                      Constraint(in_range, [-44, 44, 'LElbowYaw'])],
+                                    ['ryaw']
+                                    ),
+                        CommandSpec('turn_down', 'elbows',
+                                    set(['LElbowYaw', 'RElbowYaw']),
+                                    [Transform(linear, 'LElbowYaw', 'lyaw', [1, -90]),
+                                     Transform(linear, 'RElbowYaw', 'ryaw', [-1, -90])],
+                                    [Constraint(less_than, [-45, 'RElbowYaw']),
+                                      Constraint(greater_than, [45, 'LElbowYaw'])],
+                                    ['ryaw']
+                                    ),
+                        CommandSpec('open', 'hands',
+                                    set(['LHand', 'RHand']),
+                                    [],
+                                    [Constraint(greater_than, [17, 'LHand']),
+                                      Constraint(greater_than, [17, 'RHand'])],
+                                    []
+                                    ),
+                        CommandSpec('close', 'hands',
+                                    set(['LHand', 'RHand']),
+                                    [],
+                                    [Constraint(less_than, [17, 'LHand']),
+                                      Constraint(less_than, [17, 'RHand'])],
+                                    []
+                                    ),
+
+                        # right
+                        CommandSpec('right_forward', 'arms',
+                                    set(['RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [-45, 45, 'RShoulderPitch']),
+                                      Constraint(greater_than, [-45, 'RShoulderRoll'])],
+                                    ['rpitch', 'rroll']
+                                    ),
+                        CommandSpec('right_out', 'arms',
+                                    set(['RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, -90])],
+                                    [Constraint(less_than, [-45, 'RShoulderRoll'])],
+                                    ['rpitch', 'rroll']
+                                    ),
+                        CommandSpec('right_up', 'arms',
+                                    set(['RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, -90]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [-110, -45, 'RShoulderPitch']),
+                                      Constraint(less_than, [45, 'RShoulderRoll'])],
+                                    ['rpitch', 'rroll']
+                                    ),
+                        CommandSpec('right_down', 'arms',
+                                    set(['RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 90]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [46, 95, 'RShoulderPitch']),
+                                      Constraint(less_than, [45, 'RShoulderRoll'])],
+                                    ['rpitch', 'rroll']
+                                    ),
+                        CommandSpec('right_back', 'arms',
+                                    set(['RShoulderPitch', 'RShoulderRoll']),
+                                    [Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 119.5]),
+                                     Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])],
+                                    [Constraint(in_range, [96, 119.5, 'RShoulderPitch']),
+                                      Constraint(less_than, [45, 'RShoulderRoll'])],
+                                    ['rpitch', 'rroll']
+                                    ),
+                         CommandSpec('right_open', 'hands',
+                                    set(['RHand']),
+                                    [],
+                                    [Constraint(greater_than, [17, 'RHand'])],
+                                    []
+                                    ),
+
+                        CommandSpec('right_close', 'hands',
+                                    set(['RHand']),
+                                    [],
+                                    [Constraint(less_than, [17, 'RHand'])],
+                                    []
+                                    ),
+
+                        # left
+                        CommandSpec('left_forward', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                    [Constraint(in_range, [-45, 45, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('left_out', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, -90])],
+                                    [Constraint(greater_than, [45, 'LShoulderRoll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('left_up', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, -90]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                    [Constraint(in_range, [-110, -45, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('left_down', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 90]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                    [Constraint(in_range, [46, 95, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('left_back', 'arms',
+                                    set(['LShoulderPitch', 'LShoulderRoll']),
+                                    [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 119.5]),
+                                     Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                    [Constraint(in_range, [96, 119.5, 'LShoulderPitch']),
+                                      Constraint(less_than, [45, 'LShoulderRoll'])],
+                                    ['lpitch', 'lroll']
+                                    ),
+                        CommandSpec('left_open', 'hands',
+                                    set(['LHand']),
+                                    [],
+                                    [Constraint(greater_than, [17, 'LHand'])],
+                                    []
+                                    ),
+
+                        CommandSpec('left_close', 'hands',
+                                    set(['LHand']),
+                                    [],
+                                    [Constraint(less_than, [17, 'LHand'])],
+                                    []
+                                    )
+                       ]
+
+
+def reference_detect_command(translator, joint_dict, changed_joint_names):
+    # the original uncompiled evaluation of COMMANDS
+    joints_degrees = joints_to_degrees(joint_dict, True)
+    commands = []
+    joints_done = set()
+    cur_prefix = None
+    for cs in COMMANDS:
+        if changed_joint_names & cs.joints:
+            if not cs.joints.issubset(joints_done):
+                cdata = joints_degrees.copy()
+                translator.do_transforms(cs, cdata)
+                if translator.constraints_pass(cs, cdata):
+                    joints_done = joints_done.union(cs.joints)
+                    commands.append(translator.generate_command(cs, cur_prefix, cdata))
+                    cur_prefix = cs.prefix
+    return commands
+
+
+def make_random_pose():
+    # angles in radians covering the ranges the rules test
+    result = {}
+    for n in JOINT_NAMES:
+        result[n] = random.uniform(-2.2, 2.2)
+    return result
+
+
+class TestRuleSet(unittest.TestCase):
+
+    def test_matches_reference_for_fixtures(self):
+        translator = FluentNaoTranslator()
+        for position in [POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT,
+                         POSITION_HANDS_RIGHT_OPEN_LEFT_CLOSE, POSITION_ELBOWS_BENT_TURN_UP]:
+            joint_dict = make_joint_dict(position)
+            changed = set(JOINT_NAMES)
+            self.assertEqual(reference_detect_command(translator, joint_dict, changed),
+                             translator.detect_command(joint_dict, changed),
+                             "Compiled rules should give the same commands as the original evaluation")
+
+    def test_matches_reference_for_random_poses(self):
+        random.seed(42)
+        translator = FluentNaoTranslator()
+        for _ in range(500):
+            joint_dict = make_random_pose()
+            changed = set(random.sample(JOINT_NAMES, random.randint(1, len(JOINT_NAMES))))
+            self.assertEqual(reference_detect_command(translator, joint_dict, changed),
+                             translator.detect_command(joint_dict, changed),
+                             "Compiled rules should give the same commands for {} changing {}".format(joint_dict, changed))
+
+    def test_unchanged_joints_give_no_commands(self):
+        translator = FluentNaoTranslator()
+        self.assertEqual([], translator.detect_command(make_joint_dict(POSITION_ZERO), set()),
+                         "No commands should be generated when no joints changed")
+
+    def test_checks_are_shared(self):
+        rules = RuleSet(COMMANDS)
+        total = sum(len(cs.constraints) for cs in COMMANDS)
+        self.assertTrue(rules.num_checks < total * 2,
+                        "Identical thresholds used by several commands should be compiled once")
+
+    def test_joint_index(self):
+        rules = RuleSet(COMMANDS)
+        names = [COMMANDS[i].command for i in rules.joint_commands['LHand']]
+        self.assertEqual(['open', 'close', 'left_open', 'left_close'], names,
+                         "Joint index should list the commands using a joint in table order")
+        self.assertEqual([], rules.joint_commands['HeadYaw'], "No commands use the head")
+
+    def test_batch_detect(self):
+        rules = RuleSet(COMMANDS)
+        frames = []
+        for position in [POSITION_ZERO, POSITION_ARMS_UP]:
+            degrees = joints_to_degrees(make_joint_dict(position), True)
+            frames.append([degrees[n] for n in JOINT_NAMES])
+        changed = [[True] * len(JOINT_NAMES)] * 2
+        result = rules.detect(frames, changed, DEFAULT_FRAME_TIME)
+        self.assertEqual(2, len(result), "Should get a command list per frame")
+        self.assertEqual("arms.forward", result[0][0][0], "First frame should be arms forward")
+        self.assertEqual("arms.up", result[1][0][0], "Second frame should be arms up")
+
+    def test_uncompilable_rules(self):
+        spec = CommandSpec('odd', 'arms', set(['LShoulderPitch']),
+                           [Transform(lambda v, p: v, 'LShoulderPitch', 'lpitch', [])],
+                           [Constraint(greater_than, [0, 'lpitch'])], ['lpitch'])
+        self.assertRaises(ValueError, RuleSet, [spec])
+        spec = CommandSpec('odd', 'arms', set(['LShoulderPitch']),
+                           [Transform(linear, 'LShoulderPitch', 'lpitch', [1, 0])],
+                           [Constraint(lambda j, p: True, [])], ['lpitch'])
+        self.assertRaises(ValueError, RuleSet, [spec])
+
+
+class TestCommandTable(unittest.TestCase):
+
+    def test_matches_hand_written_table(self):
+        self.assertEqual([cs.command for cs in HAND_WRITTEN_COMMANDS], [cs.command for cs in COMMANDS],
+                         "Generated commands should be in the hand-written order")
+        for (expected, actual) in zip(HAND_WRITTEN_COMMANDS, COMMANDS):
+            for field in CommandSpec._fields:
+                self.assertEqual(getattr(expected, field), getattr(actual, field),
+                                 "{} of {} should match the hand-written table".format(field, expected.command))
+
+
+class TestMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.spec = SymmetricSpec('forward', 'arms',
+                                  set(['LShoulderPitch', 'LShoulderRoll']),
+                                  [Transform(linear, 'LShoulderPitch', 'lpitch', [-1, 0]),
+                                   Transform(linear, 'LShoulderRoll', 'lroll', [1, 0])],
+                                  [Constraint(in_range, [-45, 45, 'LShoulderPitch']),
+                                   Constraint(less_than, [45, 'LShoulderRoll']),
+                                   Constraint(greater_than, [-20, 'LShoulderRoll'])],
+                                  ['lpitch', 'lroll'],
+                                  10)
+
+    def test_left_command(self):
+        cs = left_command(self.spec)
+        self.assertEqual('left_forward', cs.command, "Left command should be prefixed")
+        self.assertEqual(self.spec.constraints, cs.constraints, "Left command should use the spec as is")
+
+    def test_right_command_mirrors_roll(self):
+        cs = right_command(self.spec)
+        self.assertEqual('right_forward', cs.command, "Right command should be prefixed")
+        self.assertEqual(set(['RShoulderPitch', 'RShoulderRoll']), cs.joints, "Joints should be swapped")
+        self.assertEqual([Transform(linear, 'RShoulderPitch', 'rpitch', [-1, 0]),
+                          Transform(linear, 'RShoulderRoll', 'rroll', [-1, 0])], cs.transforms,
+                         "Roll transforms should be negated")
+        self.assertEqual([Constraint(in_range, [-45, 45, 'RShoulderPitch']),
+                          Constraint(greater_than, [-45, 'RShoulderRoll']),
+                          Constraint(less_than, [20, 'RShoulderRoll'])], cs.constraints,
+                         "Roll bounds should be negated and reversed")
+        self.assertEqual(['rpitch', 'rroll'], cs.parameters, "Parameters should be swapped")
+
+    def test_right_command_is_symmetric(self):
+        rules = RuleSet([left_command(self.spec), right_command(self.spec)])
+        for (pitch, roll) in [(0, 44), (0, 46), (10, -21), (10, -19), (50, 0)]:
+            degrees = dict((n, 0.0) for n in JOINT_NAMES)
+            degrees.update(LShoulderPitch=pitch, LShoulderRoll=roll, RShoulderPitch=pitch, RShoulderRoll=-roll)
+            passes = rules.passes(rules.values([[degrees[n] for n in JOINT_NAMES]]))[0]
+            self.assertEqual(passes[0], passes[1], "Mirrored poses should match both sides alike")
+
+    def test_combined_command(self):
+        cs = combined_command(self.spec)
+        self.assertEqual('forward', cs.command, "Combined command should have the plain name")
+        self.assertEqual(4, len(cs.joints), "Combined command should use both sides")
+        self.assertTrue(Constraint(max_difference, [10, 'lpitch', 'rpitch']) in cs.constraints,
+                        "Combined command should require the sides to agree")
+        self.assertEqual(['lpitch', 'lroll'], cs.parameters, "Combined command takes the left parameters")
+
+    def test_combined_shares_side_checks(self):
+        sides = RuleSet([left_command(self.spec), right_command(self.spec)])
+        rules = RuleSet([combined_command(self.spec), left_command(self.spec), right_command(self.spec)])
+        self.assertEqual(sides.num_checks + 2, rules.num_checks,
+                         "Combined command should only add the difference checks")
+
+    def test_mirrored_bounds_go_to_other_command(self):
+        rules = RuleSet([left_command(self.spec), right_command(self.spec)])
+        degrees = dict((n, 0.0) for n in JOINT_NAMES)
+        degrees.update(LShoulderRoll=45, RShoulderRoll=-45)
+        passes = rules.passes(rules.values([[degrees[n] for n in JOINT_NAMES]]))[0]
+        self.assertTrue(passes[0], "Left bound should be included")
+        self.assertFalse(passes[1], "Mirrored bound should be excluded as in the hand-written rules")
+
+    def test_overrides(self):
+        right = [Constraint(in_range, [-45, 45, 'RShoulderPitch'])]
+        combined = [Constraint(less_than, [46, 'LShoulderRoll'])]
+        spec = self.spec._replace(right_constraints=right, combined_constraints=combined, compared=['lroll'])
+        self.assertEqual(right, right_command(spec).constraints, "Right constraints should replace the mirrored ones")
+        self.assertEqual(combined + [Constraint(max_difference, [10, 'lroll', 'rroll'])],
+                         combined_command(spec).constraints,
+                         "Combined constraints should replace both sides and only compared parameters should agree")
+
+    def test_cannot_mirror_unsided_name(self):
+        spec = self.spec._replace(parameters=['pitch'])
+        self.assertRaises(ValueError, right_command, spec)
+
+
+class TestTranslateTimeline(unittest.TestCase):
+
+    def make_timeline(self):
+        positions = [POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_UP, POSITION_ARMS_OUT,
+                     POSITION_HANDS_RIGHT_OPEN_LEFT_CLOSE, POSITION_ELBOWS_BENT_TURN_UP]
+        frames = numpy.array(positions * 3)
+        times = numpy.arange(len(frames)) * 0.02
+        return (times, frames)
+
+    def frame_by_frame(self, translator, times, frames):
+        # each joint compared with its angle in the last frame giving commands
+        expected = []
+        emitted = None
+        for t, frame in zip(times, frames):
+            pose = Pose(frame)
+            changed = set(JOINT_NAMES) if emitted is None else pose.changes(emitted, JOINT_MOVE_AMOUNT)
+            commands = translator.detect_command(pose, changed)
+            if commands:
+                expected.append((t, commands))
+            if emitted is None:
+                emitted = pose.copy()
+            elif commands:
+                for n in changed:
+                    emitted[n] = pose[n]
+        return expected
+
+    def noisy_moves(self, count, noise):
+        # moves between poses every 10s sampled at 50Hz with noise on every joint
+        rng = numpy.random.RandomState(1)
+        poses = numpy.array([POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT] * (count // 1500 + 1))
+        position = numpy.arange(count) / 500.0
+        index = position.astype(int)
+        fraction = (position - index)[:, numpy.newaxis]
+        frames = (1 - fraction) * poses[index] + fraction * poses[index + 1]
+        return (numpy.arange(count) * 0.02, frames + rng.normal(0.0, noise, frames.shape))
+
+    def test_matches_detect_command(self):
+        translator = FluentNaoTranslator()
+        for (times, frames) in (self.make_timeline(), self.noisy_moves(600, 0.01)):
+            self.assertEqual(self.frame_by_frame(translator, times, frames),
+                             translator.translate_timeline(times, frames),
+                             "Timeline translation should match translating frame by frame")
+
+    def test_repeated_frame_gives_no_commands(self):
+        (times, frames) = self.make_timeline()
+        result = FluentNaoTranslator().translate_timeline(times, frames)
+        self.assertFalse(times[2] in [t for (t, _) in result],
+                         "A frame identical to the one before should produce no commands")
+
+    def test_chunks_give_same_result(self):
+        translator = FluentNaoTranslator()
+        (times, frames) = self.make_timeline()
+        self.assertEqual(translator.translate_timeline(times, frames),
+                         translator.translate_timeline(times, frames, chunk_frames=4),
+                         "Splitting the timeline into chunks should not change the result")
+
+    def slow_move(self, count):
+        # linear move from zero to arms up sampled at 50Hz
+        fraction = numpy.linspace(0.0, 1.0, count)[:, numpy.newaxis]
+        frames = (1 - fraction) * POSITION_ZERO + fraction * POSITION_ARMS_UP
+        return (numpy.arange(count) * 0.02, frames)
+
+    def test_slow_dense_move(self):
+        # over 200 frames each frame moves less than the threshold from the one before it
+        translator = FluentNaoTranslator()
+        for count in (20, 200):
+            (times, frames) = self.slow_move(count)
+            result = translator.translate_timeline(times, frames)
+            self.assertTrue(len(result) > 1, "Moves should add up over {} frames".format(count))
+            self.assertTrue('arms.up' in [name for (name, _) in result[-1][1]],
+                            "Arms should end up in {} frames, got {}".format(count, result[-1]))
+            self.assertEqual(result, translator.translate_timeline(times, frames, chunk_frames=7),
+                             "Splitting the timeline into chunks should not change the result")
+
+    def test_large_timeline(self):
+        # nearly every frame gives commands with this much noise, a frame by frame loop takes several seconds
+        (times, frames) = self.noisy_moves(20000, 0.01)
+        start = time.time()
+        result = FluentNaoTranslator().translate_timeline(times, frames)
+        elapsed = time.time() - start
+        self.assertTrue(len(result) > 10000, "Noisy timeline should give commands in most frames")
+        self.assertTrue(elapsed < 3.0, "Translating 20000 frames took {}s".format(elapsed))
+
+    def test_empty_timeline(self):
+        result = FluentNaoTranslator().translate_timeline([], numpy.zeros((0, len(JOINT_NAMES))))
+        self.assertEqual([], result, "Empty timeline should give no commands")
+
+    def test_bad_shape(self):
+        self.assertRaises(ValueError, FluentNaoTranslator().translate_timeline, [0.0], [[0.0, 0.0]])
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertTrue('a' in cache, "Recently used entry should be kept")
+        self.assertFalse('b' in cache, "Least recently used entry should be dropped")
+        self.assertEqual(2, len(cache), "Cache should not grow beyond its size")
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        self.assertEqual(1, cache.get('a'), "Should get cached value")
+        self.assertIsNone(cache.get('b'), "Missing key should give default")
+        self.assertEqual((1, 1), (cache.hits, cache.misses), "Should count one hit and one miss")
+        self.assertEqual(0.5, cache.hit_rate(), "Hit rate should be hits over lookups")
+
+    def test_bad_size(self):
+        self.assertRaises(ValueError, LRUCache, 0)
+
+
+class TestDetectCache(unittest.TestCase):
+
+    def setUp(self):
+        self.translator = FluentNaoTranslator()
+        self.translator.cache = LRUCache(16)
+
+    def test_repeated_pose_is_cached(self):
+        joint_dict = make_joint_dict(POSITION_ARMS_UP)
+        first = self.translator.detect_command(joint_dict, set(JOINT_NAMES))
+        second = self.translator.detect_command(joint_dict, set(JOINT_NAMES))
+        self.assertEqual(first, second, "Cached result should match the first result")
+        self.assertEqual((1, 1), (self.translator.cache.hits, self.translator.cache.misses),
+                         "Second lookup of the same pose should hit the cache")
+
+    def test_changed_joints_are_part_of_key(self):
+        joint_dict = make_joint_dict(POSITION_ARMS_UP)
+        self.translator.detect_command(joint_dict, set(JOINT_NAMES))
+        result = self.translator.detect_command(joint_dict, set(['LHand']))
+        self.assertEqual(2, self.translator.cache.misses, "Different changed joints should not share an entry")
+        self.assertEqual(['hands.left_close'], [c[0] for c in result], "Only hand commands should be generated")
+
+    def test_results_can_be_modified(self):
+        joint_dict = make_joint_dict(POSITION_ARMS_UP)
+        self.translator.detect_command(joint_dict, set(JOINT_NAMES))[0][1].append(99)
+        result = self.translator.detect_command(joint_dict, set(JOINT_NAMES))
+        self.assertFalse(99 in result[0][1], "Modifying a result should not modify the cache")
+
+    def test_timeline_matches_uncached(self):
+        (times, frames) = TestTranslateTimeline('test_empty_timeline').make_timeline()
+        cached = self.translator.translate_timeline(times, frames)
+        self.assertTrue(self.translator.cache.hits == 0 and len(self.translator.cache) < len(frames),
+                        "Repeated poses in one timeline should be evaluated once")
+        self.assertEqual(cached, self.translator.translate_timeline(times, frames),
+                         "Cached timeline should match the first translation")
+        self.translator.cache = None
+        self.assertEqual(cached, self.translator.translate_timeline(times, frames),
+                         "Cached timeline should match uncached translation")
+
+
+if __name__ == '__main__':
+    unittest.main()
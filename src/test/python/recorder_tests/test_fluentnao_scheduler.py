@@ -0,0 +1,97 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import time
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend
+from fluentnao.core.scheduler import POLICY_QUEUE, POLICY_PREEMPT
+from fluentnao.nao import Nao
+
+# the offline robot runs this many times faster than a real one
+SPEED = 10.0
+
+# robot seconds taken by each move, MOVE_TIME / SPEED seconds of wall time
+MOVE_TIME = 4.0
+
+
+class TestMotionScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=SPEED)
+        self.nao = Nao(make_environment(None, backend=self.backend), metadata_cache_dir=None)
+        self.motion = self.nao.env.motion
+        self.scheduler = self.nao.scheduler
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def submit(self, joint, angle, seconds, policy=None):
+        return self.scheduler.submit(self.scheduler.chains_for(joint),
+                                     lambda: self.motion.post.angleInterpolation(joint, angle, seconds, True),
+                                     policy)
+
+    def angle(self, joint):
+        return self.motion.getAngles(joint, True)[0]
+
+    def test_chains_for(self):
+        self.assertEqual(["Head"], self.scheduler.chains_for("HeadYaw"), "Joint should map to its chain")
+        self.assertEqual(["LArm", "RArm"], self.scheduler.chains_for(["RHand", "LArm"]),
+                         "Chains should be in a fixed order")
+        self.assertEqual(self.scheduler.all_chains(), self.scheduler.chains_for("Body"),
+                         "Body should use every chain")
+
+    def test_queue_waits_for_same_chain(self):
+        first = self.submit("HeadYaw", 1.0, MOVE_TIME)
+        start = time.time()
+        self.submit("HeadYaw", -1.0, 0.1, POLICY_QUEUE)
+        waited = time.time() - start
+        self.assertFalse(self.motion.isRunning(first), "First move should have finished before the second")
+        self.assertTrue(waited >= 0.8 * MOVE_TIME / SPEED, "Second move should wait, waited {}".format(waited))
+        self.scheduler.wait()
+        self.assertAlmostEqual(-1.0, self.angle("HeadYaw"), 6, "Second move should run after the first")
+
+    def test_preempt_stops_same_chain(self):
+        first = self.submit("HeadYaw", 1.0, MOVE_TIME)
+        time.sleep(0.1 * MOVE_TIME / SPEED)
+        start = time.time()
+        self.submit("HeadPitch", 0.3, 0.1, POLICY_PREEMPT)
+        waited = time.time() - start
+        # stopping is asynchronous, the first move should end well before it would have finished
+        self.assertTrue(self.motion.wait(first, int(250 * MOVE_TIME / SPEED)),
+                        "First move should have been stopped")
+        self.assertTrue(waited < 0.5 * MOVE_TIME / SPEED, "Preempting should not wait, waited {}".format(waited))
+        self.scheduler.wait()
+        yaw = self.angle("HeadYaw")
+        self.assertTrue(0.0 < yaw < 0.9, "First move should stop part way, got {}".format(yaw))
+        self.assertAlmostEqual(0.3, self.angle("HeadPitch"), 6, "Second move should run")
+
+    def test_other_chains_run_concurrently(self):
+        start = time.time()
+        self.submit("HeadYaw", 1.0, MOVE_TIME)
+        self.submit("LShoulderPitch", -1.0, MOVE_TIME)
+        self.submit("RShoulderPitch", -1.0, MOVE_TIME)
+        self.assertEqual(3, len(self.scheduler.running()), "Each chain should have its own task")
+        self.scheduler.wait()
+        elapsed = time.time() - start
+        one_move = MOVE_TIME / SPEED
+        self.assertTrue(one_move * 0.9 <= elapsed < one_move * 2,
+                        "Moves should overlap, took {} for three moves of {}".format(elapsed, one_move))
+        self.assertEqual([], self.scheduler.running(), "Finished tasks should be forgotten")
+        self.assertAlmostEqual(-1.0, self.angle("RShoulderPitch"), 6, "Every move should complete")
+
+    def test_stop(self):
+        self.submit("HeadYaw", 1.0, MOVE_TIME)
+        self.submit("LShoulderPitch", -1.0, MOVE_TIME)
+        self.scheduler.stop(["Head"])
+        self.assertFalse(self.scheduler.is_busy("Head"), "Stopped chain should not be busy")
+        self.assertTrue(self.scheduler.is_busy("LArm"), "Other chains should keep moving")
+        self.scheduler.wait()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import BaseHTTPServer
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from fluentnao.core.scriptstore import ScriptStore, ScriptStoreError
+
+
+class ScriptHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # stand in for the NaoScript server, scripts and request log are on the server object
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.getheader("if-none-match")))
+        scriptId = self.path[len("/behaviors/"):-len(".json")]
+        if scriptId in self.server.drop:
+            # hang up without answering, once
+            self.server.drop.remove(scriptId)
+            self.close_connection = 1
+            return
+        if not scriptId in self.server.scripts:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        script = self.server.scripts[scriptId]
+        etag = '"%s"' % abs(hash(script))
+        if self.headers.getheader("if-none-match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"script": script})
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestScriptStore(unittest.TestCase):
+
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), ScriptHandler)
+        self.server.scripts = {"1": "arms.up()\r\ngo()", "2": "hands.open()"}
+        self.server.requests = []
+        self.server.drop = set()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.cache_dir = tempfile.mkdtemp()
+        self.host = "127.0.0.1:%s" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def store(self, **kwargs):
+        return ScriptStore(host=self.host, cache_dir=self.cache_dir, timeout=2.0, **kwargs)
+
+    def test_downloads_and_caches_script(self):
+        store = self.store()
+        self.assertEqual("arms.up()\r\ngo()", store.get("1"), "script text should be returned")
+        self.assertEqual("arms.up()\r\ngo()", store.get("1"), "cached script should be returned")
+        self.assertEqual(1, len(self.server.requests), "fresh cached script should not be fetched again")
+        self.assertTrue(os.path.exists(store.path("1")), "script should be saved on disk")
+
+    def test_revalidates_stale_script_with_etag(self):
+        store = self.store(max_age=0)
+        store.get("1")
+        self.assertEqual("arms.up()\r\ngo()", store.get("1"), "unchanged script should be returned")
+        self.assertEqual(2, len(self.server.requests), "stale script should be revalidated")
+        self.assertTrue(self.server.requests[1][1], "revalidation should send the etag")
+
+        self.server.scripts["1"] = "arms.down()"
+        self.assertEqual("arms.down()", store.get("1"), "changed script should be downloaded")
+
+    def test_falls_back_to_cache_when_offline(self):
+        self.store().get("2")
+        offline = ScriptStore(host="127.0.0.1:1", cache_dir=self.cache_dir, timeout=0.5, max_age=0)
+        self.assertEqual("hands.open()", offline.get("2"), "cached script should be used offline")
+        self.assertRaises(ScriptStoreError, offline.get, "3")
+
+    def test_unknown_script_raises(self):
+        self.assertRaises(ScriptStoreError, self.store().get, "404")
+
+    def test_prefetch_loads_show_up_front(self):
+        store = self.store()
+        errors = store.prefetch(["1", "2", "404"])
+        self.assertEqual(["404"], errors.keys(), "only the missing script should fail")
+        self.assertEqual(3, len(self.server.requests), "each script should be requested once")
+        store.get("1")
+        store.get("2")
+        self.assertEqual(3, len(self.server.requests), "prefetched scripts should not be fetched again")
+
+    def test_prefetch_reconnects_after_dropped_request(self):
+        self.server.scripts["3"] = "head.left()"
+        store = self.store(max_age=0)
+        store.prefetch(["1", "2", "3"])
+        del self.server.requests[:]
+
+        self.server.drop.add("2")
+        errors = store.prefetch(["1", "2", "3"])
+        self.assertEqual({}, errors, "cached copy should be used for the dropped request")
+        self.assertEqual(["/behaviors/1.json", "/behaviors/2.json", "/behaviors/3.json"],
+                         [path for (path, etag) in self.server.requests],
+                         "scripts after the dropped request should still be revalidated")
+
+    def test_evicts_least_recently_used(self):
+        store = self.store(max_entries=1)
+        store.get("1")
+        store.get("2")
+        self.assertIsNone(store.cached("1"), "oldest script should be dropped")
+        self.assertEqual("hands.open()", store.cached("2"), "newest script should be kept")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+import numpy
+
+from recorder.core import JOINT_NAMES
+from recorder.keyframes import extract_keyframes, keyframes_to_commands, joint_tolerances
+from testutil import POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT
+
+
+def linear_recording(start, end, count, t0=0.0):
+    fraction = numpy.linspace(0.0, 1.0, count)[:, numpy.newaxis]
+    start = numpy.array(start)
+    end = numpy.array(end)
+    frames = start + fraction * (end - start)
+    times = t0 + numpy.arange(count) * 0.02
+    return (times, frames)
+
+
+class TestExtractKeyframes(unittest.TestCase):
+
+    def test_short_recording(self):
+        indices = extract_keyframes([0.0, 0.1], [POSITION_ZERO, POSITION_ARMS_UP])
+        self.assertEqual(list(indices), [0, 1], "Short recordings should be kept whole")
+
+    def test_straight_line_keeps_end_points(self):
+        (times, frames) = linear_recording(POSITION_ZERO, POSITION_ARMS_UP, 100)
+        indices = extract_keyframes(times, frames)
+        self.assertEqual(list(indices), [0, 99], "Linear motion should reduce to its end points")
+
+    def test_keeps_turning_points(self):
+        (t1, f1) = linear_recording(POSITION_ZERO, POSITION_ARMS_UP, 50)
+        (t2, f2) = linear_recording(POSITION_ARMS_UP, POSITION_ARMS_OUT, 50, t1[-1] + 0.02)
+        times = numpy.concatenate((t1, t2))
+        frames = numpy.concatenate((f1, f2))
+        indices = extract_keyframes(times, frames)
+        self.assertEqual(list(indices), [0, 49, 99], "Should keep the pose where the motion changes direction")
+
+    def test_group_tolerance(self):
+        (times, frames) = linear_recording(POSITION_ZERO, POSITION_ZERO, 11)
+        frames[5, JOINT_NAMES.index('HeadYaw')] += numpy.radians(5)
+        self.assertEqual(list(extract_keyframes(times, frames, {'head': 10})), [0, 10],
+                         "Deviation within the head tolerance should be dropped")
+        self.assertIn(5, extract_keyframes(times, frames, {'head': 1}),
+                      "Deviation beyond the head tolerance should be kept")
+
+    def test_unknown_group(self):
+        self.assertRaises(KeyError, joint_tolerances, {'tail': 1})
+
+
+class TestKeyframesToCommands(unittest.TestCase):
+
+    def test_translates_keyframes(self):
+        frames = numpy.array([POSITION_ZERO, POSITION_ARMS_UP])
+        result = keyframes_to_commands(frames, [0, 1])
+        self.assertEqual(len(result), 2, "Should get commands for both keyframes")
+        self.assertEqual(result[1][0], 1, "Should report the keyframe index")
+        self.assertEqual(result[1][1][0][0], "arms.up", "Should detect arms up in second keyframe")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend
+from naoutil.metrics import RpcCounter, RpcBudgetExceeded, CallCounts, rpc_budget
+from naoutil.trace import TraceRecorder, read_trace
+from fluentnao.nao import Nao
+from recorder.core import Robot
+
+
+class TestRpcCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50)
+        self.counter = RpcCounter()
+        self.env = make_environment(None, backend=self.backend, recorder=self.counter)
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def test_counts_by_method(self):
+        self.env.motion.getAngles("Head", True)
+        self.env.motion.getAngles("LArm", True)
+        self.env.tts.wait(self.env.tts.post.say("hello"), 0)
+        self.assertEqual(CallCounts({'ALMotion.getAngles': 2, 'ALTextToSpeech.post.say': 1,
+                                     'ALTextToSpeech.wait': 1}), self.counter.totals,
+                         "Calls should be counted by proxy & method")
+        self.assertEqual(2, self.counter.totals.total("ALTextToSpeech"), "Proxy should count all its methods")
+        self.assertEqual(2, self.counter.totals.total(["ALMotion.getAngles"]), "Method should count its calls")
+
+    def test_nested_measurements(self):
+        with self.counter.measure("outer") as outer:
+            self.env.motion.getAngles("Head", True)
+            with self.counter.measure("inner") as inner:
+                self.env.motion.getLimits("Head")
+        with self.counter.measure("inner"):
+            self.env.motion.getLimits("Head")
+
+        self.assertEqual(2, outer.total(), "Outer measurement should include the inner calls")
+        self.assertEqual(CallCounts({'ALMotion.getLimits': 1}), inner, "Inner measurement should only see its call")
+        stats = self.counter.scope("inner")
+        self.assertEqual(2, stats.runs, "Runs of a name should add up")
+        self.assertEqual(2, stats.calls.total(), "Calls of a name should add up")
+        self.assertEqual(None, self.counter.scope("missing"), "Unknown name should have no stats")
+        self.assertTrue("inner" in self.counter.report(), "Report should list each name")
+
+    def test_calls_are_passed_on(self):
+        path = tempfile.mkdtemp()
+        try:
+            with RpcCounter(TraceRecorder(os.path.join(path, "t.gz"))) as counter:
+                make_environment(None, backend=self.backend, recorder=counter).motion.getAngles("Head", True)
+            self.assertEqual(1, len(read_trace(os.path.join(path, "t.gz"))), "Wrapped recorder should see the call")
+        finally:
+            shutil.rmtree(path)
+
+
+class TestRpcBudgets(unittest.TestCase):
+    # round trips fluent commands may make, only raise a budget if the extra calls are really needed
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50)
+        self.counter = RpcCounter()
+        self.nao = Nao(make_environment(None, backend=self.backend, recorder=self.counter),
+                       metadata_cache_dir=None)
+        # anything read once per session is read before the budgets are measured
+        self.nao.arms.up().go()
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def test_planning_makes_no_calls(self):
+        with rpc_budget(self.nao, 0, name="planning"):
+            self.nao.arms.up().hands.open()
+            self.nao.head.left()
+            self.nao.elbows.bent()
+            self.nao.wrists.turn_in()
+        self.nao.plan.clear()
+
+    def test_go_makes_one_move(self):
+        with rpc_budget(self.counter, 2, name="arms.up().go()") as calls:
+            self.nao.arms.up().go()
+        self.assertEqual(1, calls.total("ALMotion.post.angleInterpolation"), "go() should post a single move")
+
+        with rpc_budget(self.counter, 2, name="several limbs"):
+            self.nao.arms.out().hands.close()
+            self.nao.head.center().go()
+
+    def test_no_reads_when_moving(self):
+        with rpc_budget(self.counter, 0, methods=["ALMotion.getAngles", "ALMotion.getLimits", "ALMemory"]):
+            self.nao.arms.forward().elbows.straight().go()
+
+    def test_budget_exceeded(self):
+        try:
+            with rpc_budget(self.counter, 1, name="reads"):
+                self.nao.env.motion.getAngles("Head", True)
+                self.nao.env.motion.getAngles("Head", True)
+        except RpcBudgetExceeded as e:
+            self.assertTrue("ALMotion.getAngles x2" in str(e), "Message should list the calls")
+        else:
+            self.fail("Budget should be exceeded")
+        self.assertTrue(issubclass(RpcBudgetExceeded, AssertionError), "Should fail tests rather than error")
+
+    def test_scripts_are_measured(self):
+        self.nao.naoscript.run_script("arms.up();hands.open();go()")
+        self.assertEqual(1, self.counter.scope("run_script").runs, "Script run should be measured")
+        self.assertTrue(self.counter.scope("run_script").calls.total() <= 2, "Script should make one move")
+        self.assertEqual(0, self.counter.scope("nao.arms.up()").calls.total(), "Fluent command should be measured")
+        self.assertEqual(1, self.counter.scope("nao.go()").calls.total("ALMotion.post"), "go() line should move")
+
+    def test_fluent_commands_are_measured(self):
+        self.counter.clear()
+        self.nao.arms.up()
+        self.nao.hands.open()
+        self.nao.go()
+        for name in ("arms.up", "hands.open"):
+            stats = self.counter.scope(name)
+            self.assertEqual(1, stats.runs, "{} should be measured once".format(name))
+            self.assertEqual(1, stats.calls.total("ALMotion.post.angleInterpolation"),
+                             "{} should count the move started by go()".format(name))
+            self.assertTrue(stats.calls.total() <= 2, "{} made {}".format(name, stats.calls.describe()))
+
+        self.nao.arms.forward()
+        self.nao.plan.clear()
+        self.assertEqual(1, self.counter.scope("arms.forward").runs, "Outer command should be measured")
+        self.assertEqual(None, self.counter.scope("arms.left_forward"), "Inner commands should count as the outer one")
+
+        self.nao.arms.left_relax()
+        self.assertEqual(1, self.counter.scope("arms.left_relax").calls.total("ALMotion.stiffnessInterpolation"),
+                         "Calls made by the command itself should be counted")
+
+    def test_budget_needs_counter(self):
+        nao = Nao(make_environment(None, backend=self.backend), metadata_cache_dir=None)
+        try:
+            with rpc_budget(nao, 2):
+                nao.arms.up()
+        except ValueError:
+            pass
+        else:
+            self.fail("Budget without a counter should raise ValueError")
+        nao.plan.clear()
+
+
+class StatusDisplay(object):
+    def add_status(self, message):
+        pass
+
+
+class TestStiffness(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50)
+        self.counter = RpcCounter()
+        self.nao = Nao(make_environment(None, backend=self.backend, recorder=self.counter),
+                       metadata_cache_dir=None)
+        self.nao.metadata.load()
+        self.motion = self.backend.modules['ALMotion']
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def test_unchanged_chains_are_skipped(self):
+        with rpc_budget(self.counter, 1, methods="ALMotion.stiffnessInterpolation", name="left arm stiff twice"):
+            self.nao.arms.left_stiff()
+            self.nao.arms.left_stiff()
+        self.assertEqual([1.0] * 6, self.motion.getStiffnesses("LArm"), "Left arm should be stiff")
+
+        with rpc_budget(self.counter, 2, name="arms stiff") as calls:
+            self.nao.arms.stiff()
+        self.assertEqual(1, calls.total("ALMotion.stiffnessInterpolation"), "Right arm should change in one call")
+        self.assertEqual([1.0] * 6, self.motion.getStiffnesses("RArm"), "Right arm should be stiff")
+        self.assertEqual(1.0, self.nao.stiffness.stiffness("RHand"), "Right arm stiffness should be known")
+
+        with rpc_budget(self.counter, 1, name="arms stiff again") as calls:
+            self.nao.arms.stiff()
+        self.assertEqual(1, calls.total("ALMotion.getStiffnesses"), "Known stiffness should be read back once")
+
+    def test_body_is_one_call(self):
+        with rpc_budget(self.counter, 3, name="stiff") as calls:
+            self.nao.stiff()
+            self.nao.head.stiff()
+            self.nao.legs.stiff()
+        self.assertEqual(1, calls.total("ALMotion.stiffnessInterpolation"), "Body should change in one call")
+        self.assertEqual(2, calls.total("ALMotion.getStiffnesses"), "Known chains should only be read back")
+        self.assertEqual([1.0] * len(self.motion.getStiffnesses("Body")), self.motion.getStiffnesses("Body"),
+                         "Every joint should be stiff")
+
+        with rpc_budget(self.counter, 1, methods="ALMotion.stiffnessInterpolation", name="relax"):
+            self.nao.legs.relax()
+            self.nao.legs.left_relax()
+        self.assertEqual([0.0] * 12, self.motion.getStiffnesses("LLeg") + self.motion.getStiffnesses("RLeg"),
+                         "Legs should be relaxed")
+
+    def test_robot_changes_are_sent_again(self):
+        self.nao.head.stiff()
+        self.nao.rest()
+        with rpc_budget(self.counter, 1, name="after rest") as calls:
+            self.nao.head.stiff()
+        self.assertEqual(1, calls.total("ALMotion.stiffnessInterpolation"), "Head should be sent without reading")
+        self.assertEqual([1.0, 1.0], self.motion.getStiffnesses("Head"), "Head should be stiff again")
+
+    def test_changes_outside_set(self):
+        robot = Robot(StatusDisplay(), metadata_cache_dir=None)
+        robot.connect(None, None, backend=self.backend, recorder=self.counter)
+        try:
+            robot.nao.head.stiff()
+            robot.nao.arms.left_stiff()
+            self.assertEqual(1.0, robot.nao.stiffness.stiffness("LShoulderPitch"),
+                             "Stiffness set by the robot's own calls should be kept")
+            # e.g. the robot relaxing a hot joint, the head stays stiff so the body is still "some stiff"
+            self.motion.setStiffnesses("LArm", 0.0)
+            with rpc_budget(self.counter, 1, methods="ALMotion.stiffnessInterpolation", name="left arm again"):
+                robot.nao.arms.left_stiff()
+            self.assertEqual([1.0] * 6, self.motion.getStiffnesses("LArm"), "Left arm should be stiff again")
+
+            # one joint changed on its own is sent without the rest of the chain
+            self.motion.setStiffnesses("LElbowRoll", 0.5)
+            with rpc_budget(self.counter, 2, name="whole body") as calls:
+                robot.nao.stiff()
+            self.assertEqual([1.0] * len(self.motion.getStiffnesses("Body")), self.motion.getStiffnesses("Body"),
+                             "Every joint should be stiff")
+            self.assertEqual(1, calls.total("ALMotion.getStiffnesses"), "Known joints should be read in one call")
+        finally:
+            robot.disconnect()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import math
+import sys
+import threading
+import time
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend, BODY_JOINTS, JOINT_LIMITS, POSTURES
+from fluentnao.nao import Nao
+from recorder.core import Robot
+
+
+class TestOfflineMotion(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50, posture="StandZero")
+        self.env = make_environment(None, backend=self.backend)
+        self.motion = self.env.motion
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def test_body_names_and_limits(self):
+        self.assertEqual(BODY_JOINTS, self.motion.getJointNames("Body"), "Body should list every joint")
+        self.assertEqual(['LHipYawPitch', 'LHipRoll', 'LHipPitch', 'LKneePitch', 'LAnklePitch', 'LAnkleRoll'],
+                         self.motion.getJointNames("LLeg"), "Chain should list its joints")
+        self.assertEqual(4, len(self.motion.getLimits("HeadYaw")[0]), "Limits should have four values")
+
+    def test_interpolation_is_integrated(self):
+        self.motion.angleInterpolation("HeadYaw", 1.0, 2.0, True)
+        self.assertAlmostEqual(1.0, self.motion.getAngles("HeadYaw", True)[0], 6,
+                               "Joint should reach its target once the call returns")
+
+        task = self.motion.post.angleInterpolation("HeadYaw", 0.0, 50.0, True)
+        time.sleep(0.5)
+        angle = self.motion.getAngles("HeadYaw", True)[0]
+        self.assertTrue(0.0 < angle < 1.0, "Joint should be part way to its target, got {}".format(angle))
+        self.assertTrue(self.motion.isRunning(task), "Task should run until the move completes")
+        self.motion.stop(task)
+        self.assertTrue(self.motion.wait(task, 1000), "Stopped task should finish")
+        held = self.motion.getAngles("HeadYaw", True)[0]
+        time.sleep(0.1)
+        self.assertEqual(held, self.motion.getAngles("HeadYaw", True)[0], "Stopped joint should hold its angle")
+
+    def test_targets_are_clamped_to_limits(self):
+        self.motion.angleInterpolationWithSpeed("LElbowRoll", 1.0, 1.0)
+        self.assertEqual(JOINT_LIMITS['LElbowRoll'][1], self.motion.getAngles("LElbowRoll", True)[0],
+                         "Target outside the joint limits should be clamped")
+
+    def test_relative_interpolation(self):
+        self.motion.angleInterpolation(["HeadYaw", "HeadPitch"], [0.2, 0.1], [0.1, 0.1], False)
+        self.motion.angleInterpolation(["HeadYaw", "HeadPitch"], [0.2, 0.1], [0.1, 0.1], False)
+        angles = self.motion.getAngles("Head", True)
+        self.assertAlmostEqual(0.4, angles[0], 6, "Relative moves should add up")
+        self.assertAlmostEqual(0.2, angles[1], 6, "Relative moves should add up")
+
+    def test_posture(self):
+        self.assertTrue(self.env.robotPosture.goToPosture("Crouch", 1.0), "Known posture should be reached")
+        self.assertAlmostEqual(POSTURES['Crouch']['LKneePitch'], self.motion.getAngles("LKneePitch", True)[0], 6,
+                               "Joints should be at the posture angles")
+        self.assertEqual("Crouch", self.env.robotPosture.getPosture(), "Posture should be recorded")
+        self.assertFalse(self.env.robotPosture.goToPosture("Handstand", 1.0), "Unknown posture should fail")
+
+    def test_memory_reads_sensors(self):
+        self.motion.angleInterpolation("HeadPitch", 0.3, 0.1, True)
+        value = self.env.memory.getData("Device/SubDeviceList/HeadPitch/Position/Sensor/Value")
+        self.assertAlmostEqual(0.3, value, 6, "Sensor key should give the joint angle")
+        self.assertRaises(RuntimeError, self.env.memory.getData, "NoSuchKey")
+
+    def test_unknown_module_and_method(self):
+        self.assertRaises(RuntimeError, self.backend.create_proxy, "ALNavigation")
+        self.assertRaises(AttributeError, getattr, self.motion, "fly")
+        self.assertRaises(RuntimeError, self.motion.getAngles, "Tail", True)
+
+    def test_latency(self):
+        backend = OfflineBackend(latency=0.02)
+        motion = make_environment(None, backend=backend).motion
+        start = time.time()
+        for _ in range(5):
+            motion.getAngles("Body", True)
+        self.assertTrue(time.time() - start >= 0.1, "Each call should take at least the latency")
+
+
+class TestOfflineFluentNao(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50)
+        self.nao = Nao(make_environment(None, backend=self.backend), metadata_cache_dir=None)
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def test_fluent_moves(self):
+        self.nao.arms.up().go()
+        angles = [math.degrees(a) for a in self.nao.env.motion.getAngles("LArm", True)[0:2]]
+        self.assertAlmostEqual(-90, angles[0], 3, "Arm should be raised")
+        self.assertAlmostEqual(0, angles[1], 3, "Arm should not be out")
+
+    def test_concurrent_plans_keep_every_target(self):
+        sent = []
+        self.nao.playback.trajectory = lambda names, angleLists, timeLists: sent.extend(angleLists[0])
+
+        def plan_and_send(first):
+            for i in range(first, first + 500):
+                self.nao.plan.add("HeadYaw", i, 0.01)
+                self.nao.send()
+
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            threads = [threading.Thread(target=plan_and_send, args=(n * 500,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setcheckinterval(interval)
+        self.assertEqual(range(2000), sorted(sent), "Every target should be sent exactly once")
+        self.assertTrue(self.nao.plan.is_empty(), "Nothing should be left in the plan")
+
+    def test_background_say(self):
+        self.nao.background.say("hello there").result(5)
+        self.assertEqual(["hello there"], self.backend.modules['ALTextToSpeech'].spoken, "Text should be spoken")
+
+
+class StatusDisplay(object):
+    def __init__(self):
+        self.messages = []
+
+    def add_status(self, message):
+        self.messages.append(message)
+
+
+class TestOfflineRobot(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50)
+        self.robot = Robot(StatusDisplay(), metadata_cache_dir=None)
+        self.assertTrue(self.robot.connect(None, None, backend=self.backend), "Should connect to the backend")
+
+    def tearDown(self):
+        self.robot.disconnect()
+
+    def test_keyframe(self):
+        self.robot.nao.arms.forward().go()
+        self.assertEqual("nao.arms.forward(0,0.0,0.0)", self.robot.keyframe().split(".elbows")[0],
+                         "Keyframe should translate the offline pose")
+
+    def test_hand_commands_move(self):
+        self.backend.recognise('left hand open')
+        self.assertAlmostEqual(1.0, self.backend.modules['ALMotion'].getAngles("LHand", True)[0], 3,
+                               "Left hand should open")
+        self.assertTrue(self.robot.nao.plan.is_empty(), "Nothing should be left in the plan")
+
+        self.robot._right_hand_open()
+        self.assertAlmostEqual(1.0, self.backend.modules['ALMotion'].getAngles("RHand", True)[0], 3,
+                               "Right hand should open")
+        self.robot._right_hand_close()
+        self.assertAlmostEqual(0.0, self.backend.modules['ALMotion'].getAngles("RHand", True)[0], 3,
+                               "Right hand should close")
+        self.assertTrue(self.robot.nao.plan.is_empty(), "Nothing should be left in the plan")
+
+    def test_word_recognised(self):
+        heard = []
+        self.robot.vocabulary['now key frame'] = lambda: heard.append(True)
+        self.backend.recognise('now key frame')
+        self.assertEqual([True], heard, "Recognised word should run its command")
+
+
+if __name__ == "__main__":
+    unittest.main()
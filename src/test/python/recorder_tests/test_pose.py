@@ -0,0 +1,78 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+import numpy
+
+from recorder.core import JOINT_NAMES, JOINT_MOVE_AMOUNT, joint_changes, joints_to_degrees
+from recorder.pose import Pose, joint_changes_array, joints_to_degrees_array, frame_changes, mask_to_names
+from testutil import POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT, make_joint_dict, make_random_joints
+
+
+class TestJointsToDegreesArray(unittest.TestCase):
+
+    def test_matches_dict_version(self):
+        for position in [POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT]:
+            expected = joints_to_degrees(make_joint_dict(position), True)
+            result = joints_to_degrees_array(position, True)
+            for i, n in enumerate(JOINT_NAMES):
+                self.assertEqual(expected[n], result[i], "Rounded degrees should match for {}".format(n))
+
+    def test_rounds_halves_away_from_zero(self):
+        result = joints_to_degrees_array(numpy.radians([0.5, -0.5, 1.5, -2.5]), True)
+        self.assertEqual(list(result), [1.0, -1.0, 2.0, -3.0],
+                         "Halves should round away from zero like the builtin round()")
+
+    def test_batch(self):
+        batch = numpy.array([POSITION_ZERO, POSITION_ARMS_UP])
+        result = joints_to_degrees_array(batch, False)
+        self.assertEqual(result.shape, (2, len(JOINT_NAMES)), "Batch conversion should keep shape")
+
+
+class TestJointChangesArray(unittest.TestCase):
+
+    def test_no_old_angles(self):
+        mask = joint_changes_array(None, POSITION_ZERO)
+        self.assertTrue(mask.all(), "All joints should be marked changed")
+
+    def test_matches_dict_version(self):
+        j1 = make_random_joints()
+        j2 = make_joint_dict(POSITION_ZERO)
+        expected = joint_changes(j1, j2, JOINT_MOVE_AMOUNT)
+        mask = joint_changes_array(Pose.from_dict(j1).angles, Pose.from_dict(j2).angles, JOINT_MOVE_AMOUNT)
+        self.assertEqual(mask_to_names(mask), expected, "Vectorised and dict change detection should agree")
+
+    def test_frame_changes(self):
+        frames = numpy.array([POSITION_ZERO, POSITION_ZERO, POSITION_ARMS_UP])
+        mask = frame_changes(frames, JOINT_MOVE_AMOUNT)
+        self.assertTrue(mask[0].all(), "First frame should be all changed")
+        self.assertFalse(mask[1].any(), "Repeated frame should have no changes")
+        self.assertTrue(mask[2][JOINT_NAMES.index('LShoulderPitch')], "Arms up should change LShoulderPitch")
+
+
+class TestPose(unittest.TestCase):
+
+    def test_dict_round_trip(self):
+        joints = make_joint_dict(POSITION_ARMS_UP)
+        pose = Pose.from_dict(joints)
+        self.assertEqual(pose.to_dict(), joints, "Pose should round trip through a dict")
+        self.assertEqual(pose['LShoulderPitch'], joints['LShoulderPitch'], "Pose should be indexable by name")
+
+    def test_usable_as_joint_dict(self):
+        pose = Pose(POSITION_ARMS_OUT)
+        self.assertEqual(joints_to_degrees(pose), joints_to_degrees(pose.to_dict()),
+                         "Pose should be accepted where a joint dict is expected")
+
+    def test_changes(self):
+        p1 = Pose(POSITION_ZERO)
+        p2 = p1.copy()
+        p2['HeadYaw'] = p2['HeadYaw'] + 1.0
+        self.assertEqual(p2.changes(p1, JOINT_MOVE_AMOUNT), set(['HeadYaw']), "Only HeadYaw should have changed")
+
+
+if __name__ == "__main__":
+    unittest.main()
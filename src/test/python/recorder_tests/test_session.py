@@ -0,0 +1,153 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from recorder.core import JOINT_NAMES
+from recorder.session import SessionWriter, Session, SessionFormatError, write_session, write_index, \
+    ENCODING_FLOAT32, ENCODING_CENTIDEGREES, INDEX_SUFFIX
+from testutil import POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT
+
+
+def make_recording():
+    frames = numpy.array([POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT, POSITION_ZERO])
+    times = numpy.array([100.0, 100.02, 100.04, 100.06])
+    return (times, frames)
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.session')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_float32_round_trip(self):
+        (times, frames) = make_recording()
+        write_session(self.path, times, frames, ENCODING_FLOAT32)
+        with Session(self.path) as session:
+            self.assertEqual(len(session), 4, "Should read back all frames")
+            self.assertEqual(session.joint_names, JOINT_NAMES, "Should read back joint names")
+            self.assertTrue(numpy.array_equal(session.times, times), "Timestamps should be exact")
+            self.assertTrue(numpy.allclose(session[:], frames, atol=1e-6), "Angles should survive float32")
+
+    def test_centidegrees_round_trip(self):
+        (times, frames) = make_recording()
+        write_session(self.path, times, frames, ENCODING_CENTIDEGREES)
+        with Session(self.path) as session:
+            self.assertEqual(session.encoding, ENCODING_CENTIDEGREES, "Should report encoding")
+            self.assertTrue(numpy.allclose(session[:], frames, atol=numpy.radians(0.005)),
+                            "Angles should be accurate to a hundredth of a degree")
+
+    def test_slicing(self):
+        (times, frames) = make_recording()
+        write_session(self.path, times, frames)
+        with Session(self.path) as session:
+            self.assertEqual(session[1:3].shape, (2, len(JOINT_NAMES)), "Slice should return frames")
+            self.assertTrue(numpy.allclose(session[-1], frames[-1], atol=1e-6), "Should index from the end")
+            self.assertTrue(numpy.allclose(session.column('LShoulderPitch'),
+                                           frames[:, JOINT_NAMES.index('LShoulderPitch')], atol=1e-6),
+                            "Should read a single joint column")
+            self.assertAlmostEqual(session.pose(1)['LShoulderPitch'], POSITION_ARMS_UP[2], 6,
+                                   "Should return frames as poses")
+
+    def test_incremental_writes(self):
+        (times, frames) = make_recording()
+        with SessionWriter(self.path) as writer:
+            writer.write(times[:1], frames[:1])
+            writer.write(times[1:], frames[1:])
+        with Session(self.path) as session:
+            self.assertTrue(numpy.array_equal(session.times, times), "Chunks should be joined in order")
+        self.assertFalse(os.path.exists(self.path + '.spool'), "Spool file should be removed")
+
+    def test_failed_close_keeps_spool(self):
+        (times, frames) = make_recording()
+        writer = SessionWriter(self.path)
+        writer.write(times, frames)
+
+        def disk_full():
+            raise IOError("No space left on device")
+        writer._write_columns = disk_full
+        self.assertRaises(IOError, writer.close)
+        self.assertTrue(os.path.exists(self.path + '.spool'), "Spool should be kept if the session was not written")
+        spooled = numpy.fromfile(self.path + '.spool', dtype=numpy.float64).reshape(len(times), -1)
+        self.assertTrue(numpy.array_equal(spooled[:, 0], times), "Spool should still hold the capture")
+        writer.close()
+
+    def test_close_twice(self):
+        (times, frames) = make_recording()
+        writer = SessionWriter(self.path)
+        writer.write(times, frames)
+        writer.close()
+        writer.close()
+        with Session(self.path) as session:
+            self.assertEqual(len(session), len(times), "Second close should do nothing")
+
+    def test_empty_session(self):
+        SessionWriter(self.path).close()
+        with Session(self.path) as session:
+            self.assertEqual(len(session), 0, "Empty session should have no frames")
+
+    def test_not_a_session(self):
+        with open(self.path, 'wb') as f:
+            f.write('x' * 100)
+        self.assertRaises(SessionFormatError, Session, self.path)
+
+
+class TestSessionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.session')
+        # 100 frames at 10Hz starting at an arbitrary wall clock time
+        self.times = 1000.0 + numpy.arange(100) * 0.1
+        frames = numpy.zeros((100, len(JOINT_NAMES)))
+        frames[:, 0] = numpy.arange(100)
+        write_session(self.path, self.times, frames)
+        # use a small stride so seeks cross index blocks
+        write_index(self.path, self.times, 8)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_seek(self):
+        with Session(self.path) as session:
+            self.assertEqual(session.index_stride, 8, "Should use the index on disk")
+            for i in range(100):
+                self.assertEqual(session.seek(i * 0.1), i, "Exact timestamp should find its frame")
+                self.assertEqual(session.seek(i * 0.1 - 0.05), i, "Should seek to the next frame")
+            self.assertEqual(session.seek(-5.0), 0, "Seeking before the start should give the first frame")
+            self.assertEqual(session.seek(50.0), 100, "Seeking past the end should give the length")
+
+    def test_window(self):
+        with Session(self.path) as session:
+            (times, frames) = session.frames_between(2.0, 3.0)
+            self.assertEqual(list(frames[:, 0]), range(20, 30), "Window should include start but not end")
+            self.assertTrue(numpy.array_equal(times, self.times[20:30]), "Window should return timestamps")
+
+    def test_iter_window(self):
+        with Session(self.path) as session:
+            chunks = list(session.iter_window(1.0, 8.0, 16))
+            self.assertEqual([len(t) for (t, _) in chunks], [16, 16, 16, 16, 6], "Should iterate in chunks")
+            joined = numpy.concatenate([f[:, 0] for (_, f) in chunks])
+            self.assertEqual(list(joined), range(10, 80), "Chunks should cover the window in order")
+
+    def test_rebuilds_missing_index(self):
+        os.remove(self.path + INDEX_SUFFIX)
+        with Session(self.path) as session:
+            self.assertEqual(session.seek(4.25), 43, "Should seek without an index file")
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX), "Index should be rebuilt")
+
+
+if __name__ == "__main__":
+    unittest.main()
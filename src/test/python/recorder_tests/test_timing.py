@@ -0,0 +1,96 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import unittest
+
+from naoutil.offline import OfflineBackend
+from recorder.core import Robot
+from recorder.timing import Timings
+
+
+class TestTimings(unittest.TestCase):
+
+    def test_percentiles(self):
+        timings = Timings()
+        for i in range(1, 101):
+            timings.add('stage', i / 1000.0)
+        (p50, p95, p99) = timings.percentiles('stage')
+        self.assertAlmostEqual(0.0505, p50, 6, "p50 should be the median")
+        self.assertAlmostEqual(0.09505, p95, 6, "p95 should be near the top")
+        self.assertTrue(p95 < p99 <= 0.1, "p99 should be between p95 and the max")
+        self.assertIsNone(timings.percentiles('other'), "Span that has not run has no percentiles")
+
+    def test_window_is_rolling(self):
+        timings = Timings(window=10)
+        for i in range(100):
+            timings.add('stage', float(i))
+        stats = timings.stats('stage')
+        self.assertEqual(100, stats.count, "Count should include every run")
+        self.assertEqual(range(90, 100), timings.recent('stage'), "Only the most recent runs should be kept")
+
+    def test_span_records_on_error(self):
+        timings = Timings()
+        try:
+            with timings.span('failing'):
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(1, timings.stats('failing').count, "Span should be recorded when the body raises")
+
+    def test_timed_function(self):
+        timings = Timings()
+        double = timings.timed('double', lambda x: x * 2)
+        self.assertEqual(4, double(2), "Wrapped function should return its result")
+        self.assertEqual(['double'], timings.names(), "Call should be timed")
+
+    def test_report(self):
+        timings = Timings()
+        timings.add('keyframe', 0.012)
+        lines = timings.report().split("\n")
+        self.assertEqual(2, len(lines), "Report should have a header and a line per span")
+        self.assertTrue(lines[1].startswith('keyframe'), "Line should start with the span name")
+        self.assertTrue('12.00' in lines[1], "Times should be in milliseconds")
+
+
+class CodeDisplay(object):
+    def __init__(self):
+        self.code = []
+
+    def append_code(self, code):
+        self.code.append(code)
+
+    def add_status(self, message):
+        pass
+
+
+class TestRobotTimings(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = OfflineBackend(speed=50)
+        self.display = CodeDisplay()
+        self.robot = Robot(self.display, self.display, metadata_cache_dir=None)
+        self.robot.connect(None, None, backend=self.backend)
+
+    def tearDown(self):
+        self.robot.disconnect()
+
+    def test_keyframe_stages(self):
+        self.robot.keyframe()
+        names = self.robot.timings.names()
+        for stage in ['keyframe', 'keyframe.get_angles', 'keyframe.joint_changes', 'keyframe.get_translator',
+                      'keyframe.detect_command', 'keyframe.commands_to_text']:
+            self.assertTrue(stage in names, "Stage {} should be timed".format(stage))
+
+    def test_spoken_keyframe(self):
+        self.backend.recognise('now key frame')
+        names = self.robot.timings.names()
+        for stage in ['event.WordRecognized', 'word.now key frame', 'keyframe', 'keyframe.append_code']:
+            self.assertTrue(stage in names, "Stage {} should be timed".format(stage))
+        self.assertEqual(1, len(self.display.code), "Keyframe should be added to the code")
+
+
+if __name__ == "__main__":
+    unittest.main()
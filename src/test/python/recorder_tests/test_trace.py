@@ -0,0 +1,174 @@
+'''
+Created on 18 Oct 2026
+
+@author: davesnowdon
+'''
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from naoutil.naoenv import make_environment
+from naoutil.offline import OfflineBackend
+from naoutil.trace import TraceRecorder, ChromeTraceRecorder, ReplayBackend, ReplayError, read_trace
+from fluentnao.nao import Nao
+from recorder.core import Robot
+
+
+class StatusDisplay(object):
+    def add_status(self, message):
+        pass
+
+
+def make_nao(backend, recorder=None):
+    nao = Nao(make_environment(None, backend=backend, recorder=recorder), metadata_cache_dir=None)
+    return nao
+
+
+class TestTraceRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "session.trace.gz")
+        self.backend = OfflineBackend(speed=50)
+
+    def tearDown(self):
+        self.backend.shutdown()
+        shutil.rmtree(self.dir)
+
+    def test_records_calls(self):
+        with TraceRecorder(self.path) as recorder:
+            env = make_environment(None, backend=self.backend, recorder=recorder)
+            angles = env.motion.getAngles("Head", True)
+            taskId = env.tts.post.say("hello")
+            env.tts.wait(taskId, 0)
+            self.assertRaises(RuntimeError, env.motion.getAngles, "Tail", True)
+
+        calls = read_trace(self.path)
+        self.assertEqual(4, len(calls), "Every call should be recorded")
+        self.assertEqual(["getAngles", "say", "wait", "getAngles"], [c['method'] for c in calls],
+                         "Calls should be recorded in order")
+        self.assertEqual(["Head", True], calls[0]['args'], "Arguments should be recorded")
+        self.assertEqual(angles, calls[0]['result'], "Result should be recorded")
+        self.assertTrue(calls[1]['post'], "Post calls should be marked")
+        self.assertTrue('error' in calls[3], "Exception should be recorded")
+        self.assertTrue(calls[0]['thread'], "Thread should be recorded")
+
+    def test_replay_matches_recorded_session(self):
+        with TraceRecorder(self.path) as recorder:
+            nao = make_nao(self.backend, recorder)
+            nao.arms.up().go()
+            recorded = nao.env.motion.getAngles("Body", True)
+
+        replay = ReplayBackend(self.path)
+        nao = make_nao(replay)
+        nao.arms.up().go()
+        self.assertEqual(recorded, nao.env.motion.getAngles("Body", True),
+                         "Replayed session should see the recorded angles")
+        self.assertTrue(replay.replayed > 0, "Calls should be served from the trace")
+
+    def test_repeated_calls_replay_in_order(self):
+        with TraceRecorder(self.path) as recorder:
+            motion = make_environment(None, backend=self.backend, recorder=recorder).motion
+            motion.angleInterpolation("HeadYaw", 0.5, 0.1, True)
+            first = motion.getAngles("HeadYaw", True)
+            motion.angleInterpolation("HeadYaw", 1.0, 0.1, True)
+            second = motion.getAngles("HeadYaw", True)
+
+        motion = make_environment(None, backend=ReplayBackend(self.path)).motion
+        self.assertEqual(first, motion.getAngles("HeadYaw", True), "First result should come first")
+        self.assertEqual(second, motion.getAngles("HeadYaw", True), "Then the second")
+        self.assertEqual(second, motion.getAngles("HeadYaw", True), "The last result should be repeated")
+
+    def test_unrecorded_calls(self):
+        with TraceRecorder(self.path) as recorder:
+            make_environment(None, backend=self.backend, recorder=recorder).motion.getAngles("Head", True)
+
+        motion = make_environment(None, backend=ReplayBackend(self.path)).motion
+        self.assertEqual(2, len(motion.getAngles("LArm", True)),
+                         "Other arguments should fall back to any recorded call of the method")
+        self.assertRaises(ReplayError, motion.getLimits, "Body")
+
+        strict = make_environment(None, backend=ReplayBackend(self.path, strict=True)).motion
+        self.assertRaises(ReplayError, strict.getAngles, "LArm", True)
+
+    def test_replay_errors(self):
+        with TraceRecorder(self.path) as recorder:
+            motion = make_environment(None, backend=self.backend, recorder=recorder).motion
+            self.assertRaises(RuntimeError, motion.getAngles, "Tail", True)
+
+        motion = make_environment(None, backend=ReplayBackend(self.path)).motion
+        self.assertRaises(RuntimeError, motion.getAngles, "Tail", True)
+
+    def test_robot_keyframe_replay(self):
+        robot = Robot(StatusDisplay(), metadata_cache_dir=None)
+        with TraceRecorder(self.path) as recorder:
+            robot.connect(None, None, backend=self.backend, recorder=recorder)
+            robot.nao.arms.out().go()
+            recorded = robot.keyframe()
+            robot.disconnect()
+
+        robot = Robot(StatusDisplay(), metadata_cache_dir=None)
+        robot.connect(None, None, backend=ReplayBackend(self.path))
+        robot.nao.arms.out().go()
+        self.assertEqual(recorded, robot.keyframe(), "Replayed keyframe should match the recorded one")
+
+
+class TestChromeTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "session.json")
+        self.backend = OfflineBackend(speed=50)
+
+    def tearDown(self):
+        self.backend.shutdown()
+        shutil.rmtree(self.dir)
+
+    def events(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_calls_tasks_and_go(self):
+        with ChromeTraceRecorder(self.path, buffer_events=4) as recorder:
+            nao = make_nao(self.backend, recorder)
+            nao.arms.up().go()
+
+        events = self.events()
+        names = [(e['name'], e['ph']) for e in events]
+        self.assertTrue(('go', 'B') in names and ('go', 'E') in names, "go() should be a span")
+        self.assertTrue(('ALMotion.post.angleInterpolation', 'B') in names, "Post call should be traced")
+        self.assertTrue(('ALMotion.wait', 'E') in names, "Wait should be traced")
+
+        tasks = [e for e in events if e.get('cat') == 'task']
+        self.assertEqual(['b', 'e'], [e['ph'] for e in tasks], "Posted task should begin and end")
+        self.assertEqual(tasks[0]['id'], tasks[1]['id'], "Task events should share an id")
+
+        go = [e['ts'] for e in events if e['name'] == 'go']
+        rpcs = [e['ts'] for e in events if e['name'] in ('ALMotion.post.angleInterpolation', 'ALMotion.wait')]
+        self.assertTrue(go[0] <= min(rpcs) and max(rpcs) <= go[1], "Calls made by go() should be inside its span")
+
+    def test_threads_are_named(self):
+        with ChromeTraceRecorder(self.path) as recorder:
+            make_environment(None, backend=self.backend, recorder=recorder).motion.getAngles("Head", True)
+
+        events = self.events()
+        names = [e for e in events if e['ph'] == 'M']
+        self.assertEqual(1, len(names), "Each thread should be named once")
+        call = [e for e in events if e['ph'] == 'B'][0]
+        self.assertEqual(names[0]['tid'], call['tid'], "Call should be on the named thread")
+
+    def test_buffer_is_bounded(self):
+        recorder = ChromeTraceRecorder(self.path, buffer_events=10)
+        for i in range(25):
+            with recorder.span('step'):
+                pass
+        self.assertTrue(len(recorder.buffer) < 10, "Events beyond the buffer size should be written out")
+        recorder.close()
+        self.assertEqual(51, len(self.events()), "Every event should be in the file")
+
+
+if __name__ == "__main__":
+    unittest.main()